@@ -1,11 +1,89 @@
 from __future__ import annotations
 
-from typing import List, Optional, Dict
+import json
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, List, Literal, Optional, Dict, Union
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
+
+from risk_engine import default_engine, EvaluationContext, Finding
+from risk_engine.deferred import DeferredWorkers
+from risk_engine.findings_store import MAX_PAGE, STATS_GROUPS, FindingsStore
+from risk_engine.models import dump_findings
+from risk_engine.hot_reload import PolicyReloader
+from risk_engine.log_sink import active_sinks
+from risk_engine.logging_utils import log_results
+from risk_engine.metrics import RequestMetrics, counter, gauge, render_prometheus
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library encoder
+    orjson = None
+
+# Upper bound on items per /evaluate/batch call, to keep request memory bounded.
+MAX_BATCH_ITEMS = 10_000
+# Responses at least this large are gzipped for clients that accept it.
+GZIP_MIN_BYTES = 1024
+
+engine = default_engine()
+# Durable queue + worker threads for rules tagged `tier: deferred`; only
+# created once the policy has such rules (see ensure_deferred_workers).
+deferred_workers: Optional[DeferredWorkers] = None
+_deferred_lock = threading.Lock()
+_started = False
+
+
+def ensure_deferred_workers(ruleset: Any = None) -> Optional[DeferredWorkers]:
+    """The deferred workers, built and started when the rule set first has a deferred tier."""
+    global deferred_workers
+    if ruleset is None:
+        ruleset = engine.ruleset
+    if deferred_workers is None and ruleset.has_deferred:
+        with _deferred_lock:
+            if deferred_workers is None:
+                workers = DeferredWorkers.from_policy(engine)
+                if _started:
+                    workers.start()
+                deferred_workers = workers
+    return deferred_workers
+
+
+# Rebuilds rules in the background when config/policies.yaml changes and
+# swaps them into `engine` atomically.
+policy_reloader = PolicyReloader(engine, "config/policies.yaml", on_reload=ensure_deferred_workers)
+# Indexed findings store (policy `findings_store` section) behind /findings
+# and /stats; evaluations are written to it through its LogSink.
+_store_path = (engine.ruleset.policy_meta.get("findings_store") or {}).get("path")
+findings_store = FindingsStore(_store_path) if _store_path else None
+request_metrics = RequestMetrics()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _started
+    with _deferred_lock:
+        _started = True
+        if deferred_workers is not None:
+            deferred_workers.start()
+    ensure_deferred_workers()
+    policy_reloader.start()
+    yield
+    policy_reloader.stop()
+    with _deferred_lock:
+        _started = False
+        if deferred_workers is not None:
+            deferred_workers.stop()
+    engine.close()
+    if findings_store is not None:
+        findings_store.close()
 
-from risk_engine import default_engine, EvaluationContext, RiskFinding
 
 app = FastAPI(
     title="AI Risk Navigator API",
@@ -14,9 +92,65 @@ app = FastAPI(
         "Wraps the rule-based risk engine used by the Streamlit dashboard."
     ),
     version="0.1.0",
+    lifespan=lifespan,
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
 
-engine = default_engine()
+
+class FastJSONResponse(Response):
+    """
+    JSON response for content that is already plain dicts/lists: encoded
+    with orjson when installed, without a pydantic validation pass.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(
+            content, ensure_ascii=False, separators=(",", ":"), default=str
+        ).encode("utf-8")
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-route request counts and latencies. Plain ASGI rather than
+    @app.middleware("http"), which wraps every request and response in
+    extra tasks and streams.
+    """
+
+    def __init__(self, app: Any, metrics: RequestMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded.
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - started,
+            )
+
+
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
 
 
 # ---------- Request / Response Schemas ---------- #
@@ -29,32 +163,107 @@ class EvaluationRequest(BaseModel):
     user_id: Optional[str] = None
     source: Optional[str] = None
     extra: Optional[Dict] = None
+    # "gate": cheapest-first, stop at the first finding at the policy's gate
+    # severity (see RiskEngine.evaluate_gate); "document": bounded-memory
+    # windowed evaluation with aggregated findings, used automatically for
+    # responses past the policy's large_document.auto_min_chars
+    # (see RiskEngine.evaluate_document); "full": run every rule.
+    mode: Literal["full", "gate", "document"] = "full"
+    # "slim": reply with the findings and interaction ID only, instead of
+    # echoing the prompt and response back.
+    response_mode: Literal["full", "slim"] = "full"
+    # Generated when not given.
+    interaction_id: Optional[str] = None
 
 
 class EvaluationResponse(BaseModel):
+    interaction_id: Optional[str] = None
     prompt: str
     response: str
     latency_ms: Optional[float] = None
     model_name: Optional[str] = None
     user_id: Optional[str] = None
     source: Optional[str] = None
+    mode: str = "full"
+    # Gate mode only: whether a finding at the gate severity fired.
+    gate_triggered: Optional[bool] = None
+    # Document mode only: windows, chars and per-rule omitted counts.
+    document: Optional[Dict] = None
+    # Set when deferred rules were queued: their IDs and where to fetch
+    # their findings once done.
+    deferred: Optional[Dict] = None
     findings: List[Dict]
 
 
-# ---------- Endpoints ---------- #
+class SlimEvaluationResponse(BaseModel):
+    interaction_id: str
+    mode: str = "full"
+    gate_triggered: Optional[bool] = None
+    document: Optional[Dict] = None
+    deferred: Optional[Dict] = None
+    findings: List[Dict]
 
-@app.get("/health", summary="Health check")
-def health():
-    return {"status": "ok", "engine_rules": len(engine.rules)}
 
+class DeferredFindingsResponse(BaseModel):
+    interaction_id: str
+    # queued, running, done or failed.
+    status: str
+    attempts: int
+    enqueued_at: float
+    finished_at: Optional[float] = None
+    findings: Optional[List[Dict]] = None
+    error: Optional[str] = None
 
-@app.post(
-    "/evaluate",
-    response_model=EvaluationResponse,
-    summary="Evaluate LLM interaction for risks",
-)
-def evaluate(req: EvaluationRequest):
-    ctx = EvaluationContext(
+
+class FindingsPage(BaseModel):
+    # Newest first; each finding carries its evaluation's timestamp, model,
+    # user, source and interaction ID.
+    findings: List[Dict]
+    # Pass as `cursor` for the next page; None on the last page.
+    next_cursor: Optional[str] = None
+
+
+class FindingStats(BaseModel):
+    group_by: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+    total: int
+    counts: Dict[str, int]
+
+
+class StreamStart(BaseModel):
+    """First message on /evaluate/stream; the response follows in chunks."""
+    prompt: str
+    # Names the deferred evaluation queued at the end; generated when not given.
+    interaction_id: Optional[str] = None
+    latency_ms: Optional[float] = None
+    model_name: Optional[str] = None
+    user_id: Optional[str] = None
+    source: Optional[str] = None
+    extra: Optional[Dict] = None
+
+
+class BatchEvaluationRequest(BaseModel):
+    items: List[EvaluationRequest] = Field(..., max_length=MAX_BATCH_ITEMS)
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    elapsed_ms: float
+    findings: List[Dict]
+    # Set when deferred rules were queued for the item, as on /evaluate.
+    interaction_id: Optional[str] = None
+    deferred: Optional[Dict] = None
+
+
+class BatchEvaluationResponse(BaseModel):
+    count: int
+    total_ms: float
+    results: List[BatchItemResult]
+
+
+def _to_context(req: EvaluationRequest) -> EvaluationContext:
+    return EvaluationContext(
         prompt=req.prompt,
         response=req.response,
         latency_ms=req.latency_ms,
@@ -64,14 +273,316 @@ def evaluate(req: EvaluationRequest):
         extra=req.extra or {},
     )
 
-    findings: List[RiskFinding] = engine.evaluate(ctx)
+
+def _enqueue_deferred(ruleset: Any, items: List[Any]) -> List[Dict]:
+    """
+    Queue (interaction ID, context) pairs for the deferred tier; returns the
+    `deferred` field of each response. A blocking SQLite write (busy timeout
+    up to 30 s): async endpoints run it in the threadpool. A repeated
+    interaction ID keeps its first queued evaluation.
+    """
+    workers = ensure_deferred_workers(ruleset)
+    queued = workers.queue.enqueue_many(items)
+    workers.notify()
+    rules = [rule.id for rule in ruleset.tiers["deferred"]]
+    return [
+        {
+            "status": "queued" if ok else "duplicate",
+            "rules": rules,
+            "url": f"/evaluate/{interaction_id}/deferred",
+        }
+        for (interaction_id, _), ok in zip(items, queued)
+    ]
+
+
+def _log_inline(
+    ctx: EvaluationContext, findings: List[Finding], interaction_id: Optional[str], tier: Optional[str] = "inline"
+) -> None:
+    """
+    Queue an evaluation for the risk log, and for the findings store when
+    one is configured. Deferred findings follow from the workers under the
+    same interaction ID.
+    """
+    log_results(ctx, findings, interaction_id=interaction_id, tier=tier)
+    if findings_store is not None:
+        log_results(ctx, findings, findings_store.path, interaction_id=interaction_id, tier=tier)
+
+
+# ---------- Endpoints ---------- #
+
+@app.get("/health", summary="Health check")
+def health():
+    return {
+        "status": "ok",
+        "engine_rules": len(engine.rules),
+        "policy_version": engine.policy_version,
+        "policy_reload": policy_reloader.status(),
+        "deferred": deferred_workers.status() if deferred_workers is not None else None,
+        "findings_store": findings_store.counts() if findings_store is not None else None,
+        "engine_stats": engine.stats(),
+    }
+
+
+@app.post(
+    "/evaluate",
+    response_model=Union[EvaluationResponse, SlimEvaluationResponse],
+    summary="Evaluate LLM interaction for risks",
+)
+async def evaluate(req: EvaluationRequest):
+    ctx = _to_context(req)
+    interaction_id = req.interaction_id or uuid.uuid4().hex
+
+    mode = req.mode
+    auto_min_chars = engine.document_options.auto_min_chars
+    if mode == "full" and auto_min_chars and len(ctx.response) >= auto_min_chars:
+        mode = "document"
+
+    gate_triggered = None
+    document = None
+    deferred = None
+    ruleset = engine.ruleset
+    if mode == "document":
+        # Seconds of CPU on multi-megabyte input: keep it off the event loop.
+        # Every tier runs here, in one windowed pass.
+        result = await run_in_threadpool(engine.evaluate_document, ctx)
+        findings: List[Finding] = result.findings
+        document = {"windows": result.windows, "chars": result.chars, "omitted": result.omitted}
+    else:
+        # Only inline rules run on the request path; deferred ones are queued.
+        if mode == "gate":
+            if len(ctx.prompt) + len(ctx.response) >= engine.offload_min_chars:
+                # Large input: keep the gate's rule pass off the event loop too.
+                gate = await run_in_threadpool(engine.evaluate_gate, ctx)
+            else:
+                gate = engine.evaluate_gate(ctx)
+            findings = gate.findings
+            gate_triggered = gate.triggered
+        else:
+            findings = await engine.evaluate_async(ctx, tier="inline")
+        if ruleset.has_deferred:
+            [deferred] = await run_in_threadpool(_enqueue_deferred, ruleset, [(interaction_id, ctx)])
+
+    # Document mode ran every tier.
+    _log_inline(ctx, findings, interaction_id, tier=None if mode == "document" else "inline")
+
+    if req.response_mode == "slim":
+        return FastJSONResponse({
+            "interaction_id": interaction_id,
+            "mode": mode,
+            "gate_triggered": gate_triggered,
+            "document": document,
+            "deferred": deferred,
+            "findings": dump_findings(findings, mode="json"),
+        })
 
     return EvaluationResponse(
+        interaction_id=interaction_id,
         prompt=ctx.prompt,
         response=ctx.response,
         latency_ms=ctx.latency_ms,
         model_name=ctx.model_name,
         user_id=ctx.user_id,
         source=ctx.source,
-        findings=[f.model_dump() for f in findings],
+        mode=mode,
+        gate_triggered=gate_triggered,
+        document=document,
+        deferred=deferred,
+        findings=dump_findings(findings),
+    )
+
+
+@app.get(
+    "/evaluate/{interaction_id}/deferred",
+    response_model=DeferredFindingsResponse,
+    summary="Status and findings of an interaction's deferred rules",
+)
+def deferred_findings(interaction_id: str):
+    job = deferred_workers.queue.get(interaction_id) if deferred_workers is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="No deferred evaluation for this interaction ID")
+    return job
+
+
+def _require_store() -> FindingsStore:
+    if findings_store is None:
+        raise HTTPException(status_code=503, detail="Findings store not enabled (policy findings_store section)")
+    return findings_store
+
+
+@app.get("/findings", response_model=FindingsPage, summary="Query stored findings, newest first")
+def query_findings(
+    rule_id: Optional[str] = None,
+    severity: Optional[str] = None,
+    risk_type: Optional[str] = None,
+    model_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    source: Optional[str] = None,
+    interaction_id: Optional[str] = None,
+    start: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+    end: Optional[str] = Query(None, description="ISO timestamp, inclusive"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE),
+):
+    store = _require_store()
+    filters = {
+        "rule_id": rule_id, "severity": severity, "risk_type": risk_type, "model_name": model_name,
+        "user_id": user_id, "source": source, "interaction_id": interaction_id,
+    }
+    try:
+        findings, next_cursor = store.query_findings(filters, start, end, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"findings": findings, "next_cursor": next_cursor})
+
+
+@app.get("/stats", response_model=FindingStats, summary="Stored finding counts by day, rule, severity or model")
+def finding_stats(
+    group_by: Literal[STATS_GROUPS] = "rule_id",
+    start: Optional[str] = Query(None, description="First day (YYYY-MM-DD), inclusive"),
+    end: Optional[str] = Query(None, description="Last day (YYYY-MM-DD), inclusive"),
+    rule_id: Optional[str] = None,
+    severity: Optional[str] = None,
+    model_name: Optional[str] = None,
+):
+    store = _require_store()
+    counts = store.stats(
+        group_by, start, end, {"rule_id": rule_id, "severity": severity, "model_name": model_name}
+    )
+    return {"group_by": group_by, "start": start, "end": end, "total": sum(counts.values()), "counts": counts}
+
+
+@app.post(
+    "/evaluate/batch",
+    response_model=BatchEvaluationResponse,
+    summary="Evaluate many LLM interactions in one call",
+)
+def evaluate_batch(req: BatchEvaluationRequest):
+    # Inline rules only, as on /evaluate; the deferred tier is queued per item.
+    ruleset = engine.ruleset
+    contexts = [_to_context(item) for item in req.items]
+    batch = engine.evaluate_batch(contexts, tier="inline")
+
+    results = [
+        {"index": i, "elapsed_ms": elapsed_ms, "findings": dump_findings(findings, mode="json")}
+        for i, (findings, elapsed_ms) in enumerate(zip(batch.findings, batch.item_ms))
+    ]
+    if ruleset.has_deferred:
+        items = [
+            (item.interaction_id or uuid.uuid4().hex, ctx) for item, ctx in zip(req.items, contexts)
+        ]
+        for result, (interaction_id, _), deferred in zip(
+            results, items, _enqueue_deferred(ruleset, items)
+        ):
+            result["interaction_id"] = interaction_id
+            result["deferred"] = deferred
+    for item, result, ctx, findings in zip(req.items, results, contexts, batch.findings):
+        _log_inline(ctx, findings, result.get("interaction_id", item.interaction_id))
+
+    # Already plain data in the BatchEvaluationResponse shape; skip re-validating it.
+    return FastJSONResponse({
+        "count": len(batch.findings),
+        "total_ms": batch.total_ms,
+        "results": results,
+    })
+
+
+@app.websocket("/evaluate/stream")
+async def evaluate_stream(websocket: WebSocket):
+    """
+    Incremental evaluation of a streamed response.
+
+    Client messages: one StreamStart object, then {"chunk": "..."} per
+    response chunk, then {"done": true} (optionally with "latency_ms").
+    The server sends {"type": "findings", ...} as soon as a chunk triggers
+    findings, so a gateway can cut the stream off, and a final
+    {"type": "final", ...} with the remaining findings before closing.
+    Only inline rules run on the stream; when the policy has deferred
+    rules, the final message carries `interaction_id` and `deferred` as
+    on /evaluate.
+    """
+    await websocket.accept()
+    try:
+        start = StreamStart.model_validate(await websocket.receive_json())
+        ruleset = engine.ruleset
+        session = engine.stream(
+            tier="inline",
+            prompt=start.prompt,
+            latency_ms=start.latency_ms,
+            model_name=start.model_name,
+            user_id=start.user_id,
+            source=start.source or "api-stream",
+            extra=start.extra or {},
+        )
+        while True:
+            message = await websocket.receive_json()
+            if message.get("done"):
+                updates = {"latency_ms": message["latency_ms"]} if "latency_ms" in message else {}
+                findings = session.close(**updates)
+                final = {
+                    "type": "final",
+                    "chars": session.chars,
+                    "findings": dump_findings(findings, mode="json"),
+                    "total_findings": len(session.findings),
+                }
+                ctx = session.context()
+                interaction_id = start.interaction_id
+                if ruleset.has_deferred:
+                    interaction_id = interaction_id or uuid.uuid4().hex
+                    [final["deferred"]] = await run_in_threadpool(
+                        _enqueue_deferred, ruleset, [(interaction_id, ctx)]
+                    )
+                    final["interaction_id"] = interaction_id
+                _log_inline(ctx, session.findings, interaction_id)
+                await websocket.send_json(final)
+                break
+            findings = session.feed(message.get("chunk", ""))
+            if findings:
+                await websocket.send_json({
+                    "type": "findings",
+                    "chars": session.chars,
+                    "findings": dump_findings(findings, mode="json"),
+                })
+    except WebSocketDisconnect:
+        return  # the client cut the stream off
+    await websocket.close()
+
+
+@app.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+def metrics():
+    sections = [request_metrics.render()]
+    if engine.metrics is not None:
+        sections.append(engine.metrics.render())
+
+    sinks = active_sinks()
+    sections.append(gauge(
+        "risk_log_sink_queue_depth", "Records waiting in a log sink queue.",
+        [({"path": s.path}, s.queue_depth) for s in sinks],
+    ))
+    sections.append(counter(
+        "risk_log_sink_dropped_total", "Records dropped because a log sink queue was full.",
+        [({"path": s.path}, s.dropped) for s in sinks],
+    ))
+    sections.append(gauge(
+        "risk_offload_queue_depth", "cpu_heavy rule runs waiting for an offload thread.",
+        [({}, engine.offload_queue_depth)],
+    ))
+
+    if engine.result_cache is not None:
+        cache = engine.result_cache.stats()
+        sections.append(counter(
+            "risk_result_cache_lookups_total", "Result cache lookups by outcome.",
+            [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+        ))
+        sections.append(gauge(
+            "risk_result_cache_entries", "Entries held by the result cache.",
+            [({}, cache["entries"])],
+        ))
+
+    reload = policy_reloader.status()
+    sections.append(counter(
+        "risk_policy_reloads_total", "Policy reload attempts by outcome.",
+        [({"result": "ok"}, reload["reload_count"]), ({"result": "failed"}, reload["failed_reloads"])],
+    ))
+    return PlainTextResponse(
+        render_prometheus(*sections), media_type="text/plain; version=0.0.4"
     )
@@ -1,5 +1,6 @@
 import streamlit as st
 from collections import Counter
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from risk_engine import (
@@ -7,6 +8,34 @@ from risk_engine import (
     EvaluationContext,
     log_results,
 )
+from risk_engine.log_store import INDEX_FILE, SegmentedLogStore
+
+LOG_DIR = "logs/risks"
+EXPORT_WINDOWS = {
+    "Last hour": timedelta(hours=1),
+    "Last 24 hours": timedelta(days=1),
+    "Last 7 days": timedelta(days=7),
+    "All": None,
+}
+
+
+@st.cache_data(show_spinner=False)
+def export_logs(window: str, index_mtime: float) -> bytes:
+    """Concatenate only the log segments overlapping the chosen window."""
+    span = EXPORT_WINDOWS[window]
+    start = None
+    if span is not None:
+        start = (datetime.utcnow() - span).isoformat() + "Z"
+    return b"".join(SegmentedLogStore(LOG_DIR).iter_lines(start=start))
+
+
+@st.cache_resource(show_spinner=False)
+def import_legacy_logs() -> bool:
+    """
+    History from before segmented logs (logs/risks.jsonl) joins the store.
+    Once per server process, not on every rerun of the script.
+    """
+    return SegmentedLogStore(LOG_DIR).import_legacy()
 
 
 # --- Page config --- #
@@ -18,13 +47,14 @@ st.set_page_config(
 # --- Sidebar: screenshot + export --- #
 screenshot_mode = st.sidebar.checkbox("🖼️ Screenshot Mode", value=False)
 
-# Helper to read logs safely
-logs_path = Path("logs/risks.jsonl")
-if logs_path.exists():
-    log_text = logs_path.read_text(encoding="utf-8")
+# Export reads only the segments covering the selected window
+import_legacy_logs()
+index_path = Path(LOG_DIR) / INDEX_FILE
+if index_path.exists():
+    window = st.sidebar.selectbox("Log window", list(EXPORT_WINDOWS), index=1)
     st.sidebar.download_button(
         label="⬇️ Download Logs (JSONL)",
-        data=log_text,
+        data=export_logs(window, index_path.stat().st_mtime),
         file_name="ai_risk_navigator_logs.jsonl",
         mime="application/json",
     )
@@ -99,7 +129,7 @@ if submitted:
         log_results(ctx, findings)
 
         if not screenshot_mode:
-            st.success("Evaluation complete. Logged to `logs/risks.jsonl`.")
+            st.success("Evaluation complete. Logged to `logs/risks/`.")
 
         # --- Summary panel --- #
         if findings:
@@ -113,7 +143,7 @@ if submitted:
                 col.metric(label.capitalize(), severity_counts.get(label, 0))
 
             if not screenshot_mode:
-                st.caption("Counts are per evaluation; full logs are in `logs/risks.jsonl`.")
+                st.caption("Counts are per evaluation; full logs are in `logs/risks/`.")
 
             st.markdown("#### By risk type")
             tcols = st.columns(len(type_counts) or 1)
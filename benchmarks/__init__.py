@@ -0,0 +1 @@
+"""Synthetic corpora and performance benchmarks; see benchmarks.run."""
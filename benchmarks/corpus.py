@@ -0,0 +1,144 @@
+"""
+Reproducible synthetic corpora for benchmarking the rule engine.
+
+    python -m benchmarks.corpus -n 10000 --seed 7 -o corpus.jsonl
+
+The output is the JSONL format read by `python -m risk_engine.offline`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional
+
+from risk_engine.models import EvaluationContext
+from risk_engine.rules_advanced.hallucination_rule import HallucinationRule
+from risk_engine.rules_advanced.injection_rule import PromptInjectionRule
+from risk_engine.rules_builtin import BiasHeuristicRule, ToxicKeywordRule
+
+_FILLER = (
+    "the model answered quickly and the user asked a follow up question about "
+    "pricing support latency quality release notes documentation deployment "
+    "region account settings billing history summary report schedule team "
+    "project roadmap feedback meeting customer travel weather recipe article"
+).split()
+
+_MODELS = ["gpt-small", "gpt-large", "local-llama", "claude-mini", "mistral-7b"]
+
+
+@dataclass
+class CorpusSpec:
+    """
+    Knobs for generate_corpus(). Densities are per-sentence probabilities,
+    rates are per-item probabilities.
+    """
+
+    size: int = 1000
+    seed: int = 7
+    response_sentences: int = 8
+    sentence_words: int = 14
+    match_density: float = 0.05   # toxic / biased phrase in a sentence
+    pii_density: float = 0.05     # email, phone, SSN or card in a sentence
+    injection_rate: float = 0.05  # injection phrase in the prompt
+    capital_rate: float = 0.1     # "capital of X" question in the prompt
+    latency_spike_rate: float = 0.02
+
+
+def _phrase_lists() -> Dict[str, List[str]]:
+    # Taken from the rules' defaults so the corpus tracks the rule set.
+    return {
+        "toxic": ToxicKeywordRule().blocked_terms,
+        "bias": BiasHeuristicRule().biased_patterns,
+        "injection": PromptInjectionRule().patterns,
+        "capitals": sorted(HallucinationRule().capitals.items()),
+    }
+
+
+def _pii(rng: random.Random) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"user{rng.randrange(10_000)}@example{rng.randrange(10)}.com"
+    if kind == 1:
+        return f"{rng.randrange(200, 999)}-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}"
+    if kind == 2:
+        return f"{rng.randrange(100, 999)}-{rng.randrange(10, 99)}-{rng.randrange(1000, 9999)}"
+    return " ".join(str(rng.randrange(1000, 9999)) for _ in range(4))
+
+
+def iter_corpus(spec: CorpusSpec) -> Iterator[EvaluationContext]:
+    rng = random.Random(spec.seed)
+    phrases = _phrase_lists()
+    harmful = phrases["toxic"] + phrases["bias"]
+
+    for i in range(spec.size):
+        prompt_words = rng.choices(_FILLER, k=rng.randint(4, 16))
+        answer = None
+        if rng.random() < spec.capital_rate:
+            country, capitals = rng.choice(phrases["capitals"])
+            prompt_words += ["what", "is", "the", "capital", "of", f"{country}?"]
+            answer = rng.choice(capitals) if rng.random() < 0.8 else "atlantis"
+        if rng.random() < spec.injection_rate:
+            prompt_words.insert(rng.randrange(len(prompt_words) + 1), rng.choice(phrases["injection"]))
+
+        sentences: List[str] = []
+        for _ in range(spec.response_sentences):
+            words = rng.choices(_FILLER, k=rng.randint(spec.sentence_words // 2, spec.sentence_words))
+            if rng.random() < spec.match_density:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(harmful))
+            if rng.random() < spec.pii_density:
+                words.insert(rng.randrange(len(words) + 1), _pii(rng))
+            sentences.append(" ".join(words).capitalize() + ".")
+        if answer is not None:
+            sentences.insert(0, f"The capital is {answer.title()}.")
+
+        latency = rng.lognormvariate(6.0, 0.4)
+        if rng.random() < spec.latency_spike_rate:
+            latency *= 5
+
+        yield EvaluationContext(
+            prompt=" ".join(prompt_words),
+            response=" ".join(sentences),
+            latency_ms=round(latency, 1),
+            model_name=rng.choice(_MODELS),
+            user_id=f"user-{rng.randrange(1000)}",
+            source="benchmark",
+            extra={"item": i},
+        )
+
+
+def generate_corpus(spec: CorpusSpec) -> List[EvaluationContext]:
+    return list(iter_corpus(spec))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic evaluation corpus as JSONL.")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("-n", "--size", type=int, default=CorpusSpec.size)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    parser.add_argument("--response-sentences", type=int, default=CorpusSpec.response_sentences)
+    parser.add_argument("--match-density", type=float, default=CorpusSpec.match_density)
+    parser.add_argument("--pii-density", type=float, default=CorpusSpec.pii_density)
+    parser.add_argument("--injection-rate", type=float, default=CorpusSpec.injection_rate)
+    args = parser.parse_args(argv)
+
+    spec = CorpusSpec(
+        size=args.size,
+        seed=args.seed,
+        response_sentences=args.response_sentences,
+        match_density=args.match_density,
+        pii_density=args.pii_density,
+        injection_rate=args.injection_rate,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        for ctx in iter_corpus(spec):
+            f.write(json.dumps(ctx.model_dump(mode="json")) + "\n")
+    print(f"Wrote {spec.size} items to {args.output} ({json.dumps(asdict(spec))})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
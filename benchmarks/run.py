@@ -0,0 +1,246 @@
+"""
+Benchmarks for the rule engine and API.
+
+    python -m benchmarks.run -o bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.15
+
+Each rule from the policy file is timed on its own, then RiskEngine.evaluate
+and evaluate_batch end to end, then POST /evaluate through an in-process
+client. Every benchmark runs `repeat` times over the same synthetic corpus
+and the fastest run is reported. With --baseline, a benchmark whose mean
+per-item time grew by more than --threshold is a regression and the exit
+status is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from risk_engine.engine import RiskEngine, RuleSet
+from risk_engine.models import EvaluationContext
+from risk_engine.result_cache import ResultCache
+from risk_engine.rules_base import detach_state
+
+from .corpus import CorpusSpec, generate_corpus
+
+GROUPS = ("rules", "engine", "api")
+
+
+@dataclass
+class BenchResult:
+    name: str
+    items: int
+    repeat: int
+    best_total_ms: float
+    mean_us: float
+    p50_us: float
+    p99_us: float
+    items_per_s: float
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(
+    name: str,
+    fn: Callable[[Any], Any],
+    make_items: Callable[[], Sequence[Any]],
+    repeat: int,
+    batch_size: int = 1,
+) -> BenchResult:
+    """
+    Time fn(item) for every item; keep the run with the lowest total.
+    With batch_size > 1 each item is a batch and timings are per element.
+    """
+    clock = time.perf_counter
+    best: Optional[List[float]] = None
+    for _ in range(repeat):
+        items = make_items()  # built outside the timed region
+        timings = []
+        for item in items:
+            t0 = clock()
+            fn(item)
+            timings.append(clock() - t0)
+        if best is None or sum(timings) < sum(best):
+            best = timings
+
+    total = sum(best)
+    count = len(best) * batch_size
+    ordered = sorted(t / batch_size for t in best)
+    return BenchResult(
+        name=name,
+        items=count,
+        repeat=repeat,
+        best_total_ms=total * 1e3,
+        mean_us=total / count * 1e6,
+        p50_us=_percentile(ordered, 0.5) * 1e6,
+        p99_us=_percentile(ordered, 0.99) * 1e6,
+        items_per_s=count / total if total else 0.0,
+    )
+
+
+def _fresh(corpus: List[EvaluationContext]) -> Callable[[], List[EvaluationContext]]:
+    # New objects per run, so cached text views from a previous run don't count.
+    return lambda: [ctx.model_copy() for ctx in corpus]
+
+
+# ---------- benchmark groups ---------- #
+
+def bench_rules(corpus: List[EvaluationContext], policy: str, repeat: int) -> List[BenchResult]:
+    ruleset = RuleSet.from_policy(policy, persist_state=False)
+    return [
+        measure(f"rule.{rule.id}", rule.apply, _fresh(corpus), repeat)
+        for rule in ruleset.rules
+    ]
+
+
+def bench_engine(corpus: List[EvaluationContext], policy: str, repeat: int) -> List[BenchResult]:
+    engine = RiskEngine.from_ruleset(RuleSet.from_policy(policy, persist_state=False))
+    results = [measure("engine.evaluate", engine.evaluate, _fresh(corpus), repeat)]
+
+    batch_size = 100
+
+    def batches() -> List[List[EvaluationContext]]:
+        return [
+            [ctx.model_copy() for ctx in corpus[i:i + batch_size]]
+            for i in range(0, len(corpus) - batch_size + 1, batch_size)
+        ]
+
+    results.append(measure(
+        f"engine.evaluate_batch[{batch_size}]", engine.evaluate_batch, batches, repeat, batch_size
+    ))
+
+    cached = RiskEngine.from_ruleset(
+        RuleSet.from_policy(policy, persist_state=False), result_cache=ResultCache()
+    )
+    for ctx in corpus:
+        cached.evaluate(ctx)
+    results.append(measure("engine.evaluate[cache-hit]", cached.evaluate, _fresh(corpus), repeat))
+    return results
+
+
+def bench_api(corpus: List[EvaluationContext], api_items: int, repeat: int) -> List[BenchResult]:
+    from fastapi.testclient import TestClient
+
+    import api_service
+
+    # Measure the uncached request path; repeated runs would otherwise be
+    # answered from the result cache.
+    api_service.engine.result_cache = None
+    # Synthetic traffic must not end up in the service's latency baselines.
+    detach_state(api_service.engine.rules)
+    client = TestClient(api_service.app)
+    payloads = [
+        ctx.model_dump(mode="json", exclude={"extra"}) for ctx in corpus[:api_items]
+    ]
+
+    slim_payloads = [dict(payload, response_mode="slim") for payload in payloads]
+
+    def post(payload: Dict[str, Any]) -> None:
+        response = client.post("/evaluate", json=payload)
+        response.raise_for_status()
+
+    return [
+        measure("api.evaluate", post, lambda: payloads, repeat),
+        measure("api.evaluate[slim]", post, lambda: slim_payloads, repeat),
+    ]
+
+
+# ---------- baseline comparison ---------- #
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> List[str]:
+    """Print a comparison table; returns the names that regressed."""
+    regressions: List[str] = []
+    print(f"\n{'benchmark':<34} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {'-':>12} {current['mean_us']:>12.2f} {'new':>8}")
+            continue
+        change = current["mean_us"] / base["mean_us"] - 1 if base["mean_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<34} {base['mean_us']:>12.2f} {current['mean_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark rules, engine and API.")
+    parser.add_argument("-o", "--output", help="Write results JSON here.")
+    parser.add_argument("--baseline", help="Results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed slowdown of mean time per item (default 0.15 = 15%%).")
+    parser.add_argument("--groups", default=",".join(GROUPS),
+                        help=f"Comma-separated subset of {', '.join(GROUPS)}.")
+    parser.add_argument("--policy", default="config/policies.yaml")
+    parser.add_argument("-n", "--size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--api-items", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    spec = CorpusSpec(size=args.size, seed=args.seed)
+    corpus = generate_corpus(spec)
+
+    results: List[BenchResult] = []
+    if "rules" in groups:
+        results += bench_rules(corpus, args.policy, args.repeat)
+    if "engine" in groups:
+        results += bench_engine(corpus, args.policy, args.repeat)
+    if "api" in groups:
+        results += bench_api(corpus, args.api_items, args.repeat)
+
+    print(f"{'benchmark':<34} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'items/s':>10}")
+    for r in results:
+        print(f"{r.name:<34} {r.mean_us:>10.2f} {r.p50_us:>10.2f} {r.p99_us:>10.2f} {r.items_per_s:>10.0f}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "policy": args.policy,
+            "repeat": args.repeat,
+            "corpus": asdict(spec),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("corpus") != report["meta"]["corpus"]:
+        print("warning: baseline was measured on a different corpus", file=sys.stderr)
+    regressions = compare(report["results"], baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than "
+              f"{args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,48 @@
-from .models import RiskType, Severity, RiskFinding, EvaluationContext
-from .rules_base import Rule
-from .engine import RiskEngine, default_engine
-from .logging_utils import log_results
-
-__all__ = [
-    "RiskType",
-    "Severity",
-    "RiskFinding",
-    "EvaluationContext",
-    "Rule",
-    "RiskEngine",
-    "default_engine",
-    "log_results",
-]
+"""
+Public API of the risk engine. Names are imported from their submodules on
+first access, so `import risk_engine` stays cheap and a worker only pays for
+the parts it uses.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+# Public name -> submodule defining it.
+_EXPORTS = {
+    "RiskType": "models",
+    "Severity": "models",
+    "Finding": "models",
+    "RiskFinding": "models",
+    "EvaluationContext": "models",
+    "Rule": "rules_base",
+    "RiskEngine": "engine",
+    "BatchEvaluation": "engine",
+    "RuleSet": "engine",
+    "default_engine": "engine",
+    "DocumentOptions": "documents",
+    "log_results": "logging_utils",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .documents import DocumentOptions
+    from .engine import BatchEvaluation, RiskEngine, RuleSet, default_engine
+    from .logging_utils import log_results
+    from .models import EvaluationContext, Finding, RiskFinding, RiskType, Severity
+    from .rules_base import Rule
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .models import EvaluationContext
+from .phrase_scanner import PhraseAutomaton
+from .rules_base import Rule
+
+
+class ApplicabilityIndex:
+    """
+    Dispatch index over the cheap preconditions rules declare.
+
+    Built once per RuleSet. For a context it returns the slots (positions in
+    the rule list) of rules that can possibly fire: every required field is
+    set, the context's source is allowed, and at least one trigger substring
+    occurs. Triggers of all rules are merged into one PhraseAutomaton per
+    field and matched against the shared lowercase view, so the check costs
+    one scan per field however many rules declare triggers.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.size = len(rules)
+        self.unconditional: Set[int] = set()
+        self._requires: Dict[Tuple[str, ...], List[int]] = {}
+        self._sources: Dict[int, frozenset] = {}
+        self._triggered: Set[int] = set()
+        self._trigger_automata: Dict[str, PhraseAutomaton] = {}
+
+        triggers: Dict[str, List[Tuple[str, int]]] = {}
+        for slot, rule in enumerate(rules):
+            conditional = False
+            if rule.requires:
+                self._requires.setdefault(tuple(sorted(rule.requires)), []).append(slot)
+                conditional = True
+            if rule.sources is not None:
+                self._sources[slot] = frozenset(rule.sources)
+                conditional = True
+            if rule.triggers:
+                self._triggered.add(slot)
+                for field, phrases in rule.triggers.items():
+                    for phrase in phrases:
+                        triggers.setdefault(field, []).append((phrase.lower(), slot))
+                conditional = True
+            if not conditional:
+                self.unconditional.add(slot)
+
+        self._trigger_automata = {
+            field: PhraseAutomaton(entries) for field, entries in triggers.items()
+        }
+
+    @property
+    def trivial(self) -> bool:
+        """True when no rule declares a precondition."""
+        return len(self.unconditional) == self.size
+
+    def applicable(self, ctx: EvaluationContext) -> Set[int]:
+        """Slots of the rules that can fire on `ctx`."""
+        allowed = set(self.unconditional)
+        if self.trivial:
+            return allowed
+
+        blocked: Set[int] = set()
+        for fields, slots in self._requires.items():
+            if any(getattr(ctx, field) in (None, "") for field in fields):
+                blocked.update(slots)
+        for slot, sources in self._sources.items():
+            if ctx.source not in sources:
+                blocked.add(slot)
+
+        fired: Set[int] = set()
+        if self._trigger_automata:
+            prepared = ctx.prepared()
+            for field, automaton in self._trigger_automata.items():
+                fired |= automaton.scan(prepared.view(field).lower)
+        blocked |= self._triggered - fired
+
+        allowed.update(
+            slot for slot in range(self.size)
+            if slot not in blocked and slot not in self.unconditional
+        )
+        return allowed
+
+
+def precondition_fields(rule: Rule) -> Optional[Tuple[str, ...]]:
+    """Context fields a rule's preconditions read, for cache keys."""
+    fields = set(rule.requires)
+    if rule.triggers:
+        fields.update(rule.triggers)
+    if rule.sources is not None:
+        fields.add("source")
+    return tuple(sorted(fields)) if fields else None
@@ -0,0 +1,416 @@
+"""
+Deferred rule tier: a durable local job queue and the workers draining it.
+
+Policies tag expensive rules with `tier: deferred`. The request path runs
+only the inline rules and enqueues the interaction here; a pool of workers
+later runs the deferred rules on it, stores their findings by interaction
+ID and writes them to the risk log. The queue is a SQLite database in WAL
+mode, so queued work survives restarts and worker processes on the same
+host can share it. A job whose worker dies is picked up again once its
+lease expires, up to max_attempts times.
+
+Workers run as threads of the API process (policy `deferred.workers`), or
+as separate processes:
+
+    python -m risk_engine.deferred --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .logging_utils import log_results
+from .models import EvaluationContext, Finding, dump_findings
+
+DEFAULT_QUEUE_PATH = "logs/deferred.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    interaction_id TEXT NOT NULL UNIQUE,
+    context TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL,
+    findings TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    interaction_id: str
+    context: EvaluationContext
+    attempts: int
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of interactions awaiting their deferred rules.
+
+    Job states: queued -> running (leased to a worker for lease_s) -> done
+    or failed. Each thread gets its own connection, opened on first use.
+    The context is dropped once a job is done; the row then only keeps the
+    findings for retrieval by interaction ID until purged.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_QUEUE_PATH,
+        lease_s: float = 60.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Durable across process crashes; an OS crash may lose the last commits.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, interaction_id: str, ctx: EvaluationContext) -> bool:
+        """Queue `ctx`; False if the interaction ID was queued before."""
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO jobs (interaction_id, context, enqueued_at) VALUES (?, ?, ?)",
+            (interaction_id, ctx.model_dump_json(), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def enqueue_many(self, items: Iterable[Tuple[str, EvaluationContext]]) -> List[bool]:
+        """Queue (interaction ID, context) pairs in one transaction; enqueue() per item."""
+        now = time.time()
+        queued: List[bool] = []
+        with self._transaction() as conn:
+            for interaction_id, ctx in items:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO jobs (interaction_id, context, enqueued_at) VALUES (?, ?, ?)",
+                    (interaction_id, ctx.model_dump_json(), now),
+                )
+                queued.append(cursor.rowcount == 1)
+        return queued
+
+    def claim(self, limit: int = 1) -> List[Job]:
+        """
+        Lease up to `limit` jobs, oldest first: queued ones and running ones
+        whose lease expired. Jobs out of attempts are marked failed instead.
+        """
+        now = time.time()
+        jobs: List[Job] = []
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, interaction_id, context, attempts FROM jobs"
+                " WHERE status IN ('queued', 'running')"
+                " AND (status = 'queued' OR lease_until < ?)"
+                " ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            for job_id, interaction_id, context, attempts in rows:
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?,"
+                        " lease_until = NULL WHERE id = ?",
+                        ("lease expired after the last attempt", now, job_id),
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                    " lease_until = ? WHERE id = ?",
+                    (now + self.lease_s, job_id),
+                )
+                jobs.append(Job(
+                    job_id, interaction_id,
+                    EvaluationContext.model_validate_json(context), attempts + 1,
+                ))
+        return jobs
+
+    def complete(self, job: Job, findings: List[Finding]) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = 'done', findings = ?, context = NULL,"
+            " lease_until = NULL, finished_at = ? WHERE id = ?",
+            (json.dumps(dump_findings(findings, mode="json")), time.time(), job.id),
+        )
+
+    def fail(self, job: Job, error: str) -> None:
+        """Record an error; the job is retried until max_attempts."""
+        final = job.attempts >= self.max_attempts
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, finished_at = ?"
+            " WHERE id = ?",
+            ("failed" if final else "queued", error, time.time() if final else None, job.id),
+        )
+
+    def get(self, interaction_id: str) -> Optional[Dict[str, Any]]:
+        """Status and, once done, deferred findings of an interaction."""
+        row = self._conn().execute(
+            "SELECT status, attempts, enqueued_at, finished_at, findings, error"
+            " FROM jobs WHERE interaction_id = ?",
+            (interaction_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, attempts, enqueued_at, finished_at, findings, error = row
+        return {
+            "interaction_id": interaction_id,
+            "status": status,
+            "attempts": attempts,
+            "enqueued_at": enqueued_at,
+            "finished_at": finished_at,
+            "findings": json.loads(findings) if findings is not None else None,
+            "error": error,
+        }
+
+    def purge(self, max_age_s: float) -> int:
+        """Delete done and failed jobs finished more than max_age_s ago."""
+        cursor = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (time.time() - max_age_s,),
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(("queued", "running", "done", "failed"), 0)
+        counts.update(self._conn().execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ).fetchall())
+        return counts
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class DeferredWorkers:
+    """
+    Threads that drain a JobQueue, running the engine's deferred rules.
+
+    Each job's findings are stored in the queue and logged to the risk log
+    with the interaction ID and tier "deferred" (and to the findings store
+    at store_path, when one is configured). notify() wakes an idle
+    worker right after an enqueue; otherwise workers poll every
+    poll_interval_s. Rule evaluation holds the GIL, so CPU-heavy deferred
+    tiers are better served by worker processes (see main()) with
+    `workers: 0` in the API.
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        queue: JobQueue,
+        workers: int = 2,
+        batch_size: int = 8,
+        poll_interval_s: float = 0.5,
+        retention_s: Optional[float] = 7 * 24 * 3600.0,
+        log_path: str = "logs/risks",
+        store_path: Optional[str] = None,
+    ) -> None:
+        self.engine = engine
+        self.queue = queue
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.retention_s = retention_s
+        self.log_path = log_path
+        self.store_path = store_path
+
+        self.processed = 0
+        self.failed = 0
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._last_purge = 0.0
+
+    @classmethod
+    def from_policy(cls, engine: Any, workers: Optional[int] = None) -> DeferredWorkers:
+        """Queue and workers configured by the rule set's `policy.deferred` section."""
+        options = dict(engine.ruleset.policy_meta.get("deferred") or {})
+        queue = JobQueue(
+            options.pop("queue_path", DEFAULT_QUEUE_PATH),
+            lease_s=options.pop("lease_s", 60.0),
+            max_attempts=options.pop("max_attempts", 3),
+        )
+        if workers is not None:
+            options["workers"] = workers
+        store = engine.ruleset.policy_meta.get("findings_store") or {}
+        options.setdefault("store_path", store.get("path"))
+        return cls(engine, queue, **options)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "workers": sum(t.is_alive() for t in self._threads),
+            "processed": self.processed,
+            "failed": self.failed,
+            "queue": self.queue.stats(),
+        }
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def run_once(self) -> int:
+        """Claim and process one batch of jobs; returns how many were claimed."""
+        jobs = self.queue.claim(self.batch_size)
+        for job in jobs:
+            try:
+                findings = self.engine.evaluate(job.context, tier="deferred")
+                self.queue.complete(job, findings)
+            except Exception as e:
+                self.failed += 1
+                self.queue.fail(job, f"{type(e).__name__}: {e}")
+                continue
+            self.processed += 1
+            for path in (self.log_path, self.store_path):
+                if path:
+                    log_results(
+                        job.context, findings, path,
+                        interaction_id=job.interaction_id, tier="deferred",
+                    )
+        return len(jobs)
+
+    def start(self) -> None:
+        if self._threads or self.workers <= 0:
+            return
+        self._stopped.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"deferred-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                self._maybe_purge()
+                if self.run_once():
+                    continue
+                self._wakeup.wait(self.poll_interval_s)
+                self._wakeup.clear()
+        finally:
+            self.queue.close()
+
+    def _maybe_purge(self) -> None:
+        if self.retention_s is None:
+            return
+        now = time.monotonic()
+        if now - self._last_purge >= 60.0:
+            self._last_purge = now
+            self.queue.purge(self.retention_s)
+
+
+def _worker_process(policy_path: str, stop: Any) -> None:
+    import signal
+
+    # Ctrl-C reaches the whole process group; only the parent reacts, by
+    # setting `stop` (interrupting a wait() here could leave its lock held).
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .engine import RiskEngine
+    from .hot_reload import PolicyReloader
+    from .log_sink import close_all_sinks
+    from .snapshot import load_ruleset
+
+    engine = RiskEngine.from_ruleset(load_ruleset(policy_path))
+    reloader = PolicyReloader(engine, policy_path)
+    reloader.start()
+    workers = DeferredWorkers.from_policy(engine, workers=1)
+    workers.start()
+    try:
+        stop.wait()
+    finally:
+        workers.stop()
+        reloader.stop()
+        close_all_sinks()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.deferred",
+        description="Run worker processes for the deferred rule tier, or inspect the job queue.",
+    )
+    parser.add_argument("--policy", default="config/policies.yaml")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core)")
+    parser.add_argument("--stats", action="store_true", help="Print job counts by status and exit")
+    parser.add_argument("--get", metavar="INTERACTION_ID", help="Print one job's status and findings and exit")
+    args = parser.parse_args(argv)
+
+    if args.stats or args.get:
+        from .snapshot import load_ruleset
+
+        options = load_ruleset(args.policy).policy_meta.get("deferred") or {}
+        queue = JobQueue(options.get("queue_path", DEFAULT_QUEUE_PATH))
+        result = queue.stats() if args.stats else queue.get(args.get)
+        print(json.dumps(result, indent=2))
+        return 0 if result is not None else 1
+
+    import multiprocessing
+    import signal
+
+    stop = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(args.policy, stop), name=f"deferred-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"{len(processes)} deferred workers running; Ctrl-C to stop", file=sys.stderr)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
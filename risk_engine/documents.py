@@ -0,0 +1,272 @@
+"""
+Bounded-memory evaluation of very large responses (RAG output, code dumps).
+
+RiskEngine.evaluate_document() runs every rule that reads the response over
+overlapping windows of it rather than the whole text. Text views, regex
+matches and per-match findings then only ever exist for one window, and
+what is kept across windows is capped: repeated findings of a rule collapse
+into one aggregated finding with a count and a few sample offsets, and each
+rule keeps at most max_findings_per_rule of those. Time is linear in the
+response length and memory is bounded by memory_limit_bytes.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .models import SEVERITY_RANK, Finding
+from .rules_base import Rule
+
+# Rough working set per window character: the slice, its lower-case and
+# normalized views, word tokens and the match objects rules build.
+WINDOW_BYTES_PER_CHAR = 16
+# Smallest window memory_limit_bytes may shrink a window to.
+MIN_WINDOW_CHARS = 4096
+# Per aggregated finding, on top of its message and metadata.
+GROUP_OVERHEAD_BYTES = 512
+# EvaluationContext.extra key of a window's context: the (start, end) range
+# of its response that the window owns. Rules summarizing matches themselves
+# (see FindingAggregator) count only matches starting in it.
+OWNED_RANGE_KEY = "document_window"
+
+
+@dataclass
+class DocumentOptions:
+    """
+    Settings of large-document mode (the policy's `large_document` section).
+
+    overlap_chars of context are added on both sides of every window; it
+    must cover the longest single match a rule can make. Half of
+    memory_limit_bytes goes to the window working set (windows shrink to
+    fit), half to the findings kept. The API switches to this mode for
+    responses of at least auto_min_chars characters (0 disables that).
+    """
+    window_chars: int = 262_144
+    overlap_chars: int = 512
+    max_findings_per_rule: int = 50
+    max_samples: int = 5
+    memory_limit_bytes: int = 64 * 1024 * 1024
+    auto_min_chars: int = 1_048_576
+
+    def __post_init__(self) -> None:
+        if self.window_chars < 1 or self.overlap_chars < 0:
+            raise ValueError("window_chars must be positive and overlap_chars non-negative")
+        if self.window_budget < MIN_WINDOW_CHARS:
+            raise ValueError(
+                f"memory_limit_bytes={self.memory_limit_bytes} leaves less than "
+                f"{MIN_WINDOW_CHARS} characters per window"
+            )
+
+    @property
+    def window_budget(self) -> int:
+        """Largest window (owned part) the memory limit allows."""
+        return self.memory_limit_bytes // 2 // WINDOW_BYTES_PER_CHAR - 2 * self.overlap_chars
+
+    @property
+    def effective_window(self) -> int:
+        return min(self.window_chars, self.window_budget)
+
+
+@dataclass
+class Window:
+    """
+    One window of a document: text[lo:hi] is evaluated, and a match is
+    reported by the window whose owned range [start, end) it starts in.
+    """
+    index: int
+    lo: int
+    start: int
+    end: int
+    hi: int
+
+
+@dataclass
+class DocumentEvaluation:
+    """Outcome of evaluate_document()."""
+    findings: List[Finding]
+    windows: int
+    chars: int
+    # Rule ID -> findings dropped by max_findings_per_rule or the memory limit.
+    omitted: Dict[str, int] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+
+def windowed_rule(rule: Rule) -> bool:
+    """Whether a rule runs per window: it reads the response (or may) and allows it."""
+    if not rule.windowed:
+        return False
+    if rule.reads is None:
+        return not rule.stateful
+    return "response" in rule.reads
+
+
+def iter_windows(text: str, options: DocumentOptions) -> Iterator[Window]:
+    """
+    Cover `text` with windows of options.effective_window owned characters.
+    Cuts move back to whitespace when there is some within half the
+    overlap, so words are rarely split. Empty text still gets one window.
+    """
+    size = options.effective_window
+    overlap = options.overlap_chars
+    n = len(text)
+    start = 0
+    index = 0
+    while True:
+        end = min(start + size, n)
+        if end < n:
+            end = _snap(text, end, max(start + 1, end - overlap // 2))
+        yield Window(index, max(0, start - overlap), start, end, min(n, end + overlap))
+        if end >= n:
+            return
+        start = end
+        index += 1
+
+
+def _snap(text: str, end: int, floor: int) -> int:
+    for i in range(end, floor, -1):
+        if text[i - 1].isspace():
+            return i
+    return end
+
+
+class _Group:
+    """Findings of one rule that collapse into one aggregated finding."""
+
+    __slots__ = ("order", "first", "first_offset", "count", "windows", "last_window", "samples")
+
+    def __init__(self, order: Tuple[int, int], first: Finding) -> None:
+        self.order = order
+        self.first = first
+        self.first_offset: Optional[int] = None
+        self.count = 0
+        self.windows = 0
+        self.last_window = -1
+        self.samples: List[int] = []
+
+
+class FindingAggregator:
+    """
+    Merges the findings of every window into bounded aggregated findings.
+
+    Findings group by rule, severity and their `kind` metadata (or, without
+    one, their message). Findings carrying an integer `offset` into the
+    window are counted once, by the window owning that offset, and their
+    absolute offsets become sample_offsets. A rule's own summary finding
+    (metadata `count` and `sample_offsets`, e.g. PIIRule past
+    max_matches_per_kind) adds its `omitted` (else `count`) as reported;
+    on a window, the rule counts only matches starting in the owned range
+    given by OWNED_RANGE_KEY, so no match is counted twice. Findings without
+    offsets count the windows they were seen in.
+    """
+
+    def __init__(self, options: DocumentOptions) -> None:
+        self.options = options
+        self.groups: Dict[Hashable, _Group] = {}
+        self.per_rule: Dict[str, int] = {}
+        # Rule ID -> [dropped count, most severe dropped finding, rule slot].
+        self.dropped: Dict[str, List] = {}
+        self.bytes_used = 0
+        self.bytes_limit = options.memory_limit_bytes // 2
+        self._seq = 0
+
+    def add(self, slot: int, findings: List[Finding], window: Optional[Window] = None) -> None:
+        """Add one rule's findings; `window` is None for rules run on the whole context."""
+        max_samples = self.options.max_samples
+        for finding in findings:
+            meta = finding.metadata
+            offset = meta.get("offset")
+            offsets: List[int] = []
+            count = 0
+            if type(offset) is int:
+                if window is not None:
+                    offset += window.lo
+                    if not window.start <= offset < window.end:
+                        continue
+                offsets.append(offset)
+                count = 1
+            elif type(meta.get("count")) is int and "sample_offsets" in meta:
+                # The listed matches were counted above as findings of their own.
+                offsets = meta["sample_offsets"]
+                if window is not None:
+                    offsets = [o + window.lo for o in offsets]
+                    offsets = [o for o in offsets if window.start <= o < window.end]
+                count = meta.get("omitted", meta["count"])
+
+            key = (finding.rule_id, finding.severity, meta.get("kind") or finding.message)
+            group = self.groups.get(key)
+            if group is None:
+                group = self._new_group(key, slot, finding, max(count, 1))
+                if group is None:
+                    continue
+            if count:
+                if group.first_offset is None:
+                    group.first_offset = offsets[0] if offsets else None
+                group.count += count
+                room = max_samples - len(group.samples)
+                if room > 0:
+                    group.samples.extend(offsets[:room])
+            index = window.index if window is not None else -1
+            if group.last_window != index:
+                group.last_window = index
+                group.windows += 1
+
+    def _new_group(self, key: Hashable, slot: int, finding: Finding, count: int) -> Optional[_Group]:
+        rule_id = finding.rule_id
+        size = GROUP_OVERHEAD_BYTES + len(finding.message) + sum(
+            len(v) if isinstance(v, str) else 16 for v in finding.metadata.values()
+        )
+        if (
+            self.per_rule.get(rule_id, 0) >= self.options.max_findings_per_rule
+            or self.bytes_used + size > self.bytes_limit
+        ):
+            dropped = self.dropped.setdefault(rule_id, [0, finding, slot])
+            dropped[0] += count
+            if SEVERITY_RANK[finding.severity] > SEVERITY_RANK[dropped[1].severity]:
+                dropped[1] = finding
+            return None
+        self.per_rule[rule_id] = self.per_rule.get(rule_id, 0) + 1
+        self.bytes_used += size
+        self._seq += 1
+        group = self.groups[key] = _Group((slot, self._seq), finding)
+        return group
+
+    @property
+    def omitted(self) -> Dict[str, int]:
+        return {rule_id: entry[0] for rule_id, entry in self.dropped.items()}
+
+    def findings(self) -> List[Finding]:
+        """Aggregated findings in rule order, each rule's dropped count last."""
+        out: List[Tuple[Tuple[int, float], Finding]] = [
+            (group.order, self._aggregate(group)) for group in self.groups.values()
+        ]
+        for rule_id, (count, worst, slot) in self.dropped.items():
+            out.append(((slot, float("inf")), Finding(
+                risk_type=worst.risk_type,
+                severity=worst.severity,
+                rule_id=rule_id,
+                rule_name=worst.rule_name,
+                message=f"{count} further {rule_id} findings not listed (large-document caps).",
+                metadata={"omitted": count},
+            )))
+        out.sort(key=lambda item: item[0])
+        return [finding for _, finding in out]
+
+    @staticmethod
+    def _aggregate(group: _Group) -> Finding:
+        first = group.first
+        metadata = dict(first.metadata)
+        message = first.message
+        if group.count == 0:
+            if group.windows <= 1:
+                return first
+            metadata["windows"] = group.windows
+        else:
+            if "offset" in metadata and group.first_offset is not None:
+                metadata["offset"] = group.first_offset
+            if group.count > 1 or "count" in metadata:
+                metadata.pop("omitted", None)
+                metadata["count"] = group.count
+                metadata["sample_offsets"] = list(group.samples)
+                if "count" not in first.metadata:
+                    message = f"{message} ({group.count} occurrences)"
+        return Finding(first.risk_type, first.severity, first.rule_id, first.rule_name, message, metadata)
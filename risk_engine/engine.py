@@ -1,52 +1,607 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set
 
-from .models import EvaluationContext, RiskFinding, RiskType, Severity
-from .rules_base import Rule
+from .models import SEVERITY_RANK, EvaluationContext, Finding, RiskType, Severity
+from .applicability import ApplicabilityIndex
+from .documents import (
+    OWNED_RANGE_KEY,
+    DocumentEvaluation,
+    DocumentOptions,
+    FindingAggregator,
+    iter_windows,
+    windowed_rule,
+)
+from .metrics import EngineMetrics
+from .phrase_scanner import PhraseScanner
+from .result_cache import ResultCache
+from .rules_base import TIERS, PhraseRule, Rule, detach_state
 from .rule_registry import RuleRegistry
+from .streaming import StreamSession
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+@dataclass
+class BatchEvaluation:
+    """Findings and timings of one evaluate_batch() call, in input order."""
+    findings: List[List[Finding]]
+    item_ms: List[float]
+    total_ms: float
+
+
+@dataclass
+class GateEvaluation:
+    """
+    Outcome of evaluate_gate(): findings so far and whether the gate tripped.
+
+    Every rule of the rule set is counted once: rules_run were called,
+    rules_inapplicable were scheduled but their preconditions ruled them
+    out, rules_deferred belong to the deferred tier, and rules_skipped are
+    the other inline rules (unable to reach the gate severity, or not
+    reached before the gate stopped).
+    """
+    findings: List[Finding]
+    triggered: bool
+    rules_run: int
+    rules_skipped: int
+    rules_inapplicable: int = 0
+    rules_deferred: int = 0
+
+
+class RuleSet:
+    """
+    A fully built list of rules plus its compiled phrase scanner.
+
+    Treated as immutable once built: the engine replaces its RuleSet with a
+    single reference assignment, so every evaluation runs against one
+    consistent snapshot even while a new policy is being swapped in.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        phrase_scanner: Optional[PhraseScanner] = None,
+        policy_version: Optional[str] = None,
+    ):
+        self.rules: List[Rule] = list(rules)
+        # Fused matcher for every PhraseRule; compiled once, reused per evaluation.
+        self.phrase_scanner = phrase_scanner or PhraseScanner(self.rules)
+        self.policy_version = policy_version
+        # `policy:` section of the policy file, for engine-level options.
+        self.policy_meta: Dict[str, Any] = {}
+        # Result-cache namespace: unique per RuleSet, so cached findings are
+        # never reused across policy versions or rule list changes.
+        self.cache_namespace = (policy_version, object())
+        self._gate_schedules: Dict[Severity, List[Rule]] = {}
+        # Preconditions of every rule, compiled once; see ApplicabilityIndex.
+        self.applicability = ApplicabilityIndex(self.rules)
+        self.slots: Dict[int, int] = {id(rule): slot for slot, rule in enumerate(self.rules)}
+        # Rules of each tier, in policy order.
+        self.tiers: Dict[str, List[Rule]] = {
+            tier: [rule for rule in self.rules if rule.tier == tier] for tier in TIERS
+        }
+
+    # Pickled by engine snapshots (see snapshot.py). Maps keyed by id() and the
+    # cache namespace are per process, so they are rebuilt on load.
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["slots"], state["cache_namespace"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.cache_namespace = (self.policy_version, object())
+        self.slots = {id(rule): slot for slot, rule in enumerate(self.rules)}
+
+    @classmethod
+    def from_policy(cls, config_path: str = "config/policies.yaml", persist_state: bool = True) -> "RuleSet":
+        """
+        Rules of a policy file. Tools pass persist_state=False so stateful
+        rules start empty and leave the service's state (e.g. latency
+        baselines) alone; see Rule.detach_state().
+        """
+        registry = RuleRegistry(config_path)
+        rules = registry.load()
+        if not persist_state:
+            detach_state(rules)
+        ruleset = cls(rules, registry.phrase_scanner, registry.policy_version)
+        ruleset.policy_meta = registry.policy_meta
+        return ruleset
+
+    def tier_rules(self, tier: Optional[str]) -> List[Rule]:
+        """Rules of `tier`; every rule when tier is None."""
+        if tier is None:
+            return self.rules
+        try:
+            return self.tiers[tier]
+        except KeyError:
+            raise ValueError(f"Unknown rule tier {tier!r}; expected one of {TIERS}") from None
+
+    @property
+    def has_deferred(self) -> bool:
+        return bool(self.tiers["deferred"])
+
+    def gate_schedule(self, stop_severity: Severity) -> List[Rule]:
+        """
+        Inline rules able to reach `stop_severity`, cheapest first (policy
+        order breaks ties). Computed once per severity.
+        """
+        schedule = self._gate_schedules.get(stop_severity)
+        if schedule is None:
+            floor = SEVERITY_RANK[stop_severity]
+            eligible = [
+                (rule.cost, i, rule) for i, rule in enumerate(self.rules)
+                if SEVERITY_RANK[rule.max_severity] >= floor and rule.tier == "inline"
+            ]
+            schedule = [rule for _, _, rule in sorted(eligible, key=lambda e: e[:2])]
+            self._gate_schedules[stop_severity] = schedule
+        return schedule
 
 
 class RiskEngine:
     """Core deterministic engine. Runs all registered rules."""
 
-    def __init__(self, rules: Optional[List[Rule]] = None):
-        self.rules: List[Rule] = rules or []
+    def __init__(
+        self,
+        rules: Optional[List[Rule]] = None,
+        phrase_scanner: Optional[PhraseScanner] = None,
+        offload_workers: int = 4,
+        offload_min_chars: int = 4096,
+        policy_version: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
+        metrics: Optional[EngineMetrics] = None,
+        gate_severity: Severity = Severity.CRITICAL,
+        gate_max_findings: Optional[int] = None,
+        document_options: Optional[DocumentOptions] = None,
+    ):
+        self.ruleset = RuleSet(rules or [], phrase_scanner, policy_version)
+        # Optional memo of findings for repeated content; see ResultCache.
+        self.result_cache = result_cache
+        # Optional per-rule call/finding/error counters and timings.
+        self.metrics = metrics
+        # Defaults for evaluate_gate().
+        self.gate_severity = Severity(gate_severity)
+        self.gate_max_findings = gate_max_findings
+        # Windowing and caps of evaluate_document().
+        self.document_options = document_options or DocumentOptions()
+        # evaluate_async(): cpu_heavy rules move off the event loop once the
+        # prompt + response reach offload_min_chars; below that the thread hop
+        # costs more than the rule.
+        self.offload_workers = offload_workers
+        self.offload_min_chars = offload_min_chars
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Offloaded runs submitted but not yet started (offload_queue_depth).
+        self._offload_waiting = 0
+        self._offload_lock = threading.Lock()
+
+    @classmethod
+    def from_ruleset(cls, ruleset: RuleSet, **options) -> "RiskEngine":
+        engine = cls(**options)
+        engine.ruleset = ruleset
+        return engine
+
+    @property
+    def rules(self) -> List[Rule]:
+        return self.ruleset.rules
+
+    @property
+    def phrase_scanner(self) -> PhraseScanner:
+        return self.ruleset.phrase_scanner
+
+    @property
+    def policy_version(self) -> Optional[str]:
+        return self.ruleset.policy_version
+
+    def swap_ruleset(self, ruleset: RuleSet) -> RuleSet:
+        """Atomically replace the active rule set; returns the previous one."""
+        previous, self.ruleset = self.ruleset, ruleset
+        return previous
+
+    def apply_policy_options(
+        self, policy_meta: Dict[str, Any], previous: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Configure the engine from the `policy:` section of a policy file (see
+        default_engine()). With `previous`, the section the engine was last
+        configured from, only options whose settings changed are touched, so
+        options set in code and the metrics collected so far survive reloads.
+        """
+        def changed(key: str) -> bool:
+            return previous is None or policy_meta.get(key) != previous.get(key)
+
+        if changed("result_cache"):
+            cache_options = policy_meta.get("result_cache")
+            self.result_cache = ResultCache(**cache_options) if cache_options else None
+        if changed("metrics"):
+            metrics_options = policy_meta.get("metrics") or {}
+            if self.metrics is None:
+                self.metrics = EngineMetrics(**metrics_options)
+            else:
+                self.metrics.configure(**metrics_options)
+        if changed("gate"):
+            gate = policy_meta.get("gate") or {}
+            self.gate_severity = Severity(gate.get("stop_severity", Severity.CRITICAL))
+            self.gate_max_findings = gate.get("max_findings")
+        if changed("large_document"):
+            self.document_options = DocumentOptions(**(policy_meta.get("large_document") or {}))
 
     def register_rule(self, rule: Rule) -> None:
-        self.rules.append(rule)
-
-    def evaluate(self, ctx: EvaluationContext) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
-
-        for rule in self.rules:
-            try:
-                rule_findings = rule.apply(ctx)
-                if rule_findings:
-                    findings.extend(rule_findings)
-            except Exception as e:
-                findings.append(
-                    RiskFinding(
-                        risk_type=RiskType.SAFETY,
-                        severity=Severity.LOW,
-                        rule_id="ENGINE-ERROR",
-                        rule_name="Rule Execution Error",
-                        message=f"Error in rule {rule.id}: {e}",
-                        metadata={"rule_name": rule.name},
+        current = self.ruleset
+        scanner = None if isinstance(rule, PhraseRule) else current.phrase_scanner
+        self.swap_ruleset(RuleSet(current.rules + [rule], scanner, current.policy_version))
+
+    def evaluate(self, ctx: EvaluationContext, tier: Optional[str] = None) -> List[Finding]:
+        """Run every rule, or only the rules of `tier` ("inline" / "deferred")."""
+        ruleset = self.ruleset
+        rules = ruleset.tier_rules(tier)
+        if self.result_cache is not None:
+            return self._evaluate_cached(ctx, rules, ruleset)
+        return self._evaluate_with(ctx, rules, ruleset)
+
+    def evaluate_batch(
+        self, contexts: Iterable[EvaluationContext], tier: Optional[str] = None
+    ) -> BatchEvaluation:
+        """
+        Evaluate many contexts against one snapshot of the rule set and its
+        compiled scanner, with every rule or only those of `tier`. Results
+        and per-item timings keep the input order.
+        """
+        ruleset = self.ruleset
+        rules = ruleset.tier_rules(tier)
+        cached = self.result_cache is not None
+        evaluate = self._evaluate_with
+        evaluate_cached = self._evaluate_cached
+        clock = time.perf_counter
+
+        findings: List[List[Finding]] = []
+        item_ms: List[float] = []
+        started = clock()
+        for ctx in contexts:
+            t0 = clock()
+            if cached:
+                findings.append(evaluate_cached(ctx, rules, ruleset))
+            else:
+                findings.append(evaluate(ctx, rules, ruleset))
+            item_ms.append((clock() - t0) * 1000.0)
+
+        return BatchEvaluation(
+            findings=findings,
+            item_ms=item_ms,
+            total_ms=(clock() - started) * 1000.0,
+        )
+
+    def evaluate_gate(
+        self,
+        ctx: EvaluationContext,
+        stop_severity: Optional[Severity] = None,
+        max_findings: Optional[int] = None,
+    ) -> GateEvaluation:
+        """
+        Blocking-path evaluation: answer "did anything at stop_severity or
+        above fire?" as cheaply as possible.
+
+        Only rules whose max_severity can reach stop_severity run, cheapest
+        first, and evaluation stops at the first finding at that severity or
+        once max_findings findings were collected. Findings are those of the
+        rules that ran, in run order.
+        """
+        stop_severity = Severity(stop_severity or self.gate_severity)
+        if max_findings is None:
+            max_findings = self.gate_max_findings
+        ruleset = self.ruleset
+        schedule = ruleset.gate_schedule(stop_severity)
+        floor = SEVERITY_RANK[stop_severity]
+
+        index = ruleset.applicability
+        applicable = None if index.trivial else index.applicable(ctx)
+        slots = ruleset.slots
+
+        findings: List[Finding] = []
+        triggered = False
+        rules_run = 0
+        inapplicable = 0
+        results = self._iter_rules(ctx, schedule, ruleset, applicable=applicable)
+        for rule, rule_findings in zip(schedule, results):
+            if applicable is not None and slots[id(rule)] not in applicable:
+                inapplicable += 1
+                continue
+            rules_run += 1
+            findings.extend(rule_findings)
+            if any(SEVERITY_RANK[f.severity] >= floor for f in rule_findings):
+                triggered = True
+                break
+            if max_findings is not None and len(findings) >= max_findings:
+                break
+        results.close()  # records the rules run so far in the metrics
+
+        deferred = len(ruleset.tiers["deferred"])
+        return GateEvaluation(
+            findings=findings,
+            triggered=triggered,
+            rules_run=rules_run,
+            rules_skipped=len(ruleset.rules) - rules_run - inapplicable - deferred,
+            rules_inapplicable=inapplicable,
+            rules_deferred=deferred,
+        )
+
+    def evaluate_document(
+        self, ctx: EvaluationContext, options: Optional[DocumentOptions] = None
+    ) -> DocumentEvaluation:
+        """
+        Bounded-memory evaluation of a very large response (see documents.py).
+
+        Rules reading the response run on overlapping windows of it; the
+        others, and rules that are not `windowed`, run once on the whole
+        context. Repeated findings are aggregated per rule and kind, and
+        capped. The result cache is bypassed.
+        """
+        options = options or self.document_options
+        ruleset = self.ruleset
+        started = time.perf_counter()
+        per_window: List[Rule] = []
+        per_window_slots: List[int] = []
+        whole: List[Rule] = []
+        whole_slots: List[int] = []
+        for slot, rule in enumerate(ruleset.rules):
+            if windowed_rule(rule):
+                per_window.append(rule)
+                per_window_slots.append(slot)
+            else:
+                whole.append(rule)
+                whole_slots.append(slot)
+
+        aggregator = FindingAggregator(options)
+        for slot, rule_findings in zip(whole_slots, self._iter_rules(ctx, whole, ruleset)):
+            aggregator.add(slot, rule_findings)
+
+        text = ctx.response
+        windows = 0
+        if per_window:
+            for window in iter_windows(text, options):
+                owned = (window.start - window.lo, window.end - window.lo)
+                window_ctx = ctx.model_copy(update={
+                    "response": text[window.lo:window.hi],
+                    "extra": {**ctx.extra, OWNED_RANGE_KEY: owned},
+                })
+                for slot, rule_findings in zip(
+                    per_window_slots, self._iter_rules(window_ctx, per_window, ruleset)
+                ):
+                    aggregator.add(slot, rule_findings, window)
+                windows += 1
+
+        return DocumentEvaluation(
+            findings=aggregator.findings(),
+            windows=windows,
+            chars=len(text),
+            omitted=aggregator.omitted,
+            elapsed_ms=(time.perf_counter() - started) * 1000.0,
+        )
+
+    async def evaluate_async(
+        self, ctx: EvaluationContext, tier: Optional[str] = None
+    ) -> List[Finding]:
+        """
+        Event-loop friendly evaluate(). Cheap rules run inline on the loop
+        while rules marked cpu_heavy run concurrently on the engine's bounded
+        offload executor. Findings keep the same order as evaluate().
+        """
+        import asyncio  # only needed by async callers, who have it loaded already
+
+        ruleset = self.ruleset
+        rules = ruleset.tier_rules(tier)
+        lookup = None
+        if self.result_cache is not None:
+            lookup = self.result_cache.lookup(ctx, rules, ruleset.cache_namespace)
+            rules = lookup.rules_to_run
+
+        heavy = [rule for rule in rules if rule.cpu_heavy]
+        if not heavy or len(ctx.prompt) + len(ctx.response) < self.offload_min_chars:
+            results = self._run_rules(ctx, rules, ruleset)
+        else:
+            # Build the shared text views and run the shared phrase scan once,
+            # before two threads read them. On input this large both cost more
+            # than the thread hop, so they run off the event loop too.
+            loop = asyncio.get_running_loop()
+            phrase_matches = await loop.run_in_executor(
+                self._offload_executor(), self._prepare, ctx, rules, ruleset
+            )
+            # One timing decision covers both threads.
+            timed = self.metrics is not None and self.metrics.should_time()
+            with self._offload_lock:
+                self._offload_waiting += 1
+            offloaded = loop.run_in_executor(
+                self._offload_executor(),
+                self._run_offloaded, ctx, heavy, ruleset, phrase_matches, timed,
+            )
+            light = iter(self._run_rules(
+                ctx, [r for r in rules if not r.cpu_heavy], ruleset, phrase_matches, timed
+            ))
+            heavy_results = iter(await offloaded)
+            results = [next(heavy_results) if rule.cpu_heavy else next(light) for rule in rules]
+
+        if lookup is not None:
+            return lookup.complete(results)
+        findings: List[Finding] = []
+        for rule_findings in results:
+            findings.extend(rule_findings)
+        return findings
+
+    @property
+    def offload_queue_depth(self) -> int:
+        """cpu_heavy rule runs waiting for an offload thread."""
+        return self._offload_waiting
+
+    def _prepare(
+        self, ctx: EvaluationContext, rules: List[Rule], ruleset: RuleSet
+    ) -> Optional[Dict]:
+        """Build the text views of `ctx`; phrase matches if any of `rules` uses them."""
+        ctx.prepared()
+        scanner = ruleset.phrase_scanner
+        if any(isinstance(r, PhraseRule) and scanner.covers(r) for r in rules):
+            return scanner.scan(ctx)
+        return None
+
+    def _run_offloaded(
+        self, ctx: EvaluationContext, rules: List[Rule], ruleset: RuleSet, *args: Any
+    ) -> List[List[Finding]]:
+        with self._offload_lock:
+            self._offload_waiting -= 1
+        return self._run_rules(ctx, rules, ruleset, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        """Rule counts, per-rule call/skip counters and cache stats."""
+        index = self.ruleset.applicability
+        return {
+            "rules": len(self.rules),
+            "unconditional_rules": len(index.unconditional),
+            "policy_version": self.policy_version,
+            "rule_stats": self.metrics.snapshot() if self.metrics is not None else {},
+            "result_cache": self.result_cache.stats() if self.result_cache is not None else None,
+        }
+
+    def stream(self, tier: Optional[str] = None, **fields) -> StreamSession:
+        """
+        Start incremental evaluation of a streamed response, with every rule
+        or only those of `tier`. `fields` are the EvaluationContext fields
+        other than `response`, e.g. prompt.
+        """
+        return StreamSession(self, tier=tier, **fields)
+
+    def close(self) -> None:
+        """Shut down the offload executor used by evaluate_async()."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _offload_executor(self) -> ThreadPoolExecutor:
+        executor = self._executor
+        if executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.offload_workers,
+                        thread_name_prefix="risk-offload",
                     )
-                )
+                executor = self._executor
+        return executor
+
+    def _evaluate_cached(
+        self, ctx: EvaluationContext, rules: List[Rule], ruleset: RuleSet
+    ) -> List[Finding]:
+        lookup = self.result_cache.lookup(ctx, rules, ruleset.cache_namespace)
+        return lookup.complete(self._run_rules(ctx, lookup.rules_to_run, ruleset))
+
+    def _evaluate_with(
+        self, ctx: EvaluationContext, rules: List[Rule], ruleset: RuleSet
+    ) -> List[Finding]:
+        findings: List[Finding] = []
+        for rule_findings in self._run_rules(ctx, rules, ruleset):
+            findings.extend(rule_findings)
         return findings
 
+    def _run_rules(
+        self,
+        ctx: EvaluationContext,
+        rules: List[Rule],
+        ruleset: RuleSet,
+        phrase_matches: Optional[Dict] = None,
+        timed: Optional[bool] = None,
+    ) -> List[List[Finding]]:
+        """Run `rules` (members of `ruleset`) in order; one findings list per rule."""
+        return list(self._iter_rules(ctx, rules, ruleset, phrase_matches, timed))
+
+    def _iter_rules(
+        self,
+        ctx: EvaluationContext,
+        rules: List[Rule],
+        ruleset: RuleSet,
+        phrase_matches: Optional[Dict] = None,
+        timed: Optional[bool] = None,
+        applicable: Optional[Set[int]] = None,
+    ) -> Iterator[List[Finding]]:
+        """
+        Run `rules` lazily in order, yielding each rule's findings. Rules the
+        applicability index rules out yield [] without being called.
+        `phrase_matches` (a phrase scan already done for `ctx`), `timed` and
+        `applicable` (the index's slots for `ctx`) let callers that split one
+        evaluation across calls, or count skipped rules, share them.
+        """
+        scanner = ruleset.phrase_scanner
+        index = ruleset.applicability
+        if applicable is None and not index.trivial:
+            applicable = index.applicable(ctx)
+        slots = ruleset.slots
+        metrics = self.metrics
+        # The shared phrase scan is timed as part of the first phrase rule.
+        if timed is None:
+            timed = metrics is not None and metrics.should_time()
+        clock = time.perf_counter
+        t0 = 0.0
+        # Counted per evaluation and merged into the metrics under one lock,
+        # once the caller is done with this iterator (or abandons it).
+        calls: List[Any] = []
+        skipped: List[str] = []
+
+        try:
+            for rule in rules:
+                if applicable is not None and slots[id(rule)] not in applicable:
+                    skipped.append(rule.id)
+                    yield []
+                    continue
+                if timed:
+                    t0 = clock()
+                error = False
+                try:
+                    if isinstance(rule, PhraseRule) and scanner.covers(rule):
+                        if phrase_matches is None:
+                            phrase_matches = scanner.scan(ctx)
+                        matches = phrase_matches.get(rule)
+                        rule_findings = rule.build_findings(ctx, matches) if matches else []
+                    else:
+                        rule_findings = rule.apply(ctx) or []
+                except Exception as e:
+                    error = True
+                    rule_findings = [
+                        Finding(
+                            risk_type=RiskType.SAFETY,
+                            severity=Severity.LOW,
+                            rule_id="ENGINE-ERROR",
+                            rule_name="Rule Execution Error",
+                            message=f"Error in rule {rule.id}: {e}",
+                            metadata={"rule_name": rule.name},
+                        )
+                    ]
+                calls.append((rule.id, clock() - t0 if timed else None, len(rule_findings), error))
+                yield rule_findings
+        finally:
+            if metrics is not None and (calls or skipped):
+                metrics.merge(calls, skipped)
 
 def default_engine() -> RiskEngine:
     """
     Factory for default engine instance.
-    Uses RuleRegistry + config/policies.yaml to load rules dynamically.
+    Uses RuleRegistry + config/policies.yaml to load rules dynamically, or
+    the policy's compiled snapshot when it is current (see snapshot.py).
+    A `policy.result_cache` section enables the result cache with its options;
+    `policy.metrics` configures per-rule instrumentation (always on),
+    `policy.gate` the defaults of evaluate_gate() and `policy.large_document`
+    the DocumentOptions of evaluate_document().
     """
-    registry = RuleRegistry("config/policies.yaml")
-    rules = registry.load()
-    return RiskEngine(rules)
+    from .snapshot import load_ruleset
 
+    ruleset = load_ruleset("config/policies.yaml")
+    engine = RiskEngine.from_ruleset(ruleset)
+    engine.apply_policy_options(ruleset.policy_meta)
+    return engine
 
 if __name__ == "__main__":
     # Simple demo / self-test
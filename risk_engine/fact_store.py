@@ -0,0 +1,216 @@
+"""
+Compiled, memory-mapped fact store for the hallucination check.
+
+Source facts are JSONL, one object per line. Fact lines map an entity (and
+its aliases) to the acceptable answers for a relation; optional cue lines
+give the prompt phrases that ask for a relation (default "<relation> of"):
+
+    {"relation": "capital", "entity": "France", "aliases": ["French Republic"], "values": ["Paris"]}
+    {"relation": "capital", "cues": ["capital of", "capital city of"]}
+
+Compile once, then point HallucinationRule's `fact_store` param at the file:
+
+    python -m risk_engine.fact_store facts.jsonl -o config/facts.idx
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .mapped_index import (
+    HashIndex,
+    build_index,
+    pack_strings,
+    trie_longest,
+    trie_records,
+    unpack_strings,
+    write_index,
+)
+from .models import TextView
+
+MAGIC = b"RNFACTS1"
+
+# Key spaces of the index: a token trie of entity names (see
+# mapped_index.trie_records) and the facts themselves.
+_ENTITY = b"e:"
+_FACT = b"f:"
+
+# Skipped between a cue and the entity: "capital of the United Kingdom".
+_ARTICLES = frozenset(["the"])
+
+
+def _tokens(text: str) -> List[str]:
+    return TextView(text).tokens
+
+
+def compile_facts(records: Iterable[Dict[str, Any]]) -> bytes:
+    """Build the index file contents from fact and cue records."""
+    canonical_of: Dict[str, str] = {}
+    facts: Dict[Tuple[str, str], List[str]] = {}
+    cues: Dict[str, List[str]] = {}
+    max_tokens = 0
+
+    for record in records:
+        relation = str(record["relation"]).strip().lower()
+        if "cues" in record:
+            cues.setdefault(relation, []).extend(
+                " ".join(_tokens(cue)) for cue in record["cues"]
+            )
+            continue
+
+        names = [record["entity"], *record.get("aliases", ())]
+        canonical = " ".join(_tokens(names[0]))
+        if not canonical:
+            raise ValueError(f"Empty entity name in {record!r}")
+        for name in names:
+            tokens = _tokens(name)
+            key = " ".join(tokens)
+            if not key:
+                continue
+            previous = canonical_of.setdefault(key, canonical)
+            if previous != canonical:
+                raise ValueError(f"Alias {name!r} names both {previous!r} and {canonical!r}")
+            max_tokens = max(max_tokens, len(tokens))
+
+        values = facts.setdefault((relation, canonical), [])
+        values.extend(v for v in record["values"] if v not in values)
+
+    for relation, _ in facts:
+        cues.setdefault(relation, [f"{relation} of"])
+
+    index = trie_records(
+        _ENTITY, {name: canonical.encode("utf-8") for name, canonical in canonical_of.items()}
+    )
+    for (relation, canonical), values in facts.items():
+        index[_FACT + f"{relation}\0{canonical}".encode("utf-8")] = pack_strings(values)
+
+    meta = {
+        "cues": {relation: sorted(set(c for c in phrases if c)) for relation, phrases in cues.items()},
+        "facts": len(facts),
+        "entity_names": len(canonical_of),
+        "max_entity_tokens": max_tokens,
+    }
+    return build_index(MAGIC, index, meta)
+
+
+def iter_fact_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: {e}") from e
+
+
+class FactStore:
+    """
+    Entity -> relation -> accepted values, backed by a HashIndex.
+
+    Entities are matched on normalized word tokens through a token trie
+    stored in the index, so finding every known entity in a prompt is one
+    left-to-right pass whose cost depends on the prompt, not on how many
+    facts are stored. Obtain one with open() (memory-mapped file) or
+    from_facts() (in-memory, same format).
+    """
+
+    def __init__(self, index: HashIndex) -> None:
+        self.index = index
+        self.meta = index.meta
+        self.max_entity_tokens: int = self.meta.get("max_entity_tokens", 0)
+        # First cue token -> (cue tokens, relation), to find cues without a scan per cue.
+        self._cues: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for relation, phrases in self.meta.get("cues", {}).items():
+            for phrase in phrases:
+                tokens = tuple(phrase.split())
+                self._cues.setdefault(tokens[0], []).append((tokens, relation))
+
+    @classmethod
+    def open(cls, path: str) -> FactStore:
+        return cls(HashIndex.open(path, MAGIC))
+
+    @classmethod
+    def from_facts(cls, records: Iterable[Dict[str, Any]]) -> FactStore:
+        return cls(HashIndex(compile_facts(records), MAGIC))
+
+    def __len__(self) -> int:
+        return self.meta.get("facts", 0)
+
+    @property
+    def cue_words(self) -> Tuple[str, ...]:
+        """First word of every cue phrase; a prompt without one asks nothing."""
+        return tuple(sorted(self._cues))
+
+    def entity_at(self, tokens: Sequence[str], start: int) -> Optional[Tuple[str, int]]:
+        """Longest known entity starting at tokens[start]: (canonical name, end)."""
+        hit = trie_longest(self.index.get, _ENTITY, tokens, start, self.max_entity_tokens)
+        if hit is None:
+            return None
+        return hit[0].decode("utf-8"), hit[1]
+
+    def entities(self, tokens: Sequence[str]) -> List[Tuple[int, int, str]]:
+        """Every known entity in `tokens` as (start, end, canonical name), longest first."""
+        found: List[Tuple[int, int, str]] = []
+        i = 0
+        while i < len(tokens):
+            hit = self.entity_at(tokens, i)
+            if hit is None:
+                i += 1
+                continue
+            found.append((i, hit[1], hit[0]))
+            i = hit[1]
+        return found
+
+    def questions(self, tokens: Sequence[str]) -> List[Tuple[str, str]]:
+        """(relation, entity) pairs asked for by a cue directly followed by an entity."""
+        asked: List[Tuple[str, str]] = []
+        cues = self._cues
+        for i, token in enumerate(tokens):
+            for cue, relation in cues.get(token, ()):
+                end = i + len(cue)
+                if tuple(tokens[i:end]) != cue:
+                    continue
+                if end < len(tokens) and tokens[end] in _ARTICLES:
+                    end += 1
+                hit = self.entity_at(tokens, end)
+                if hit is not None and (relation, hit[0]) not in asked:
+                    asked.append((relation, hit[0]))
+        return asked
+
+    def lookup(self, relation: str, entity: str) -> Optional[List[str]]:
+        blob = self.index.get(_FACT + f"{relation}\0{entity}".encode("utf-8"))
+        if blob is None:
+            return None
+        return unpack_strings(blob)[0]
+
+    def close(self) -> None:
+        self.index.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.fact_store",
+        description="Compile a JSONL fact file into a memory-mappable fact store.",
+    )
+    parser.add_argument("input", help="Fact JSONL path")
+    parser.add_argument("-o", "--output", required=True, help="Compiled store path")
+    args = parser.parse_args(argv)
+
+    blob = compile_facts(iter_fact_records(args.input))
+    write_index(args.output, blob)
+    store = FactStore.open(args.output)
+    print(
+        f"{args.output}: {len(store)} facts, {store.meta['entity_names']} entity names, "
+        f"{len(blob)} bytes",
+        file=sys.stderr,
+    )
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
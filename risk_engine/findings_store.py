@@ -0,0 +1,343 @@
+"""
+Indexed, queryable findings store (SQLite in WAL mode).
+
+An optional log target next to the append-only risk log: any log path
+ending in `.sqlite3` or `.db` is a FindingsStore (see log_sink.open_target),
+so log_results(ctx, findings, "logs/findings.sqlite3") goes through the
+same batching LogSink and every batch becomes one transaction.
+
+Each finding is one row, carrying its evaluation's timestamp, model, user,
+source and interaction ID, so filters need no join. The row is indexed for
+the usual questions ("PII-001 findings for model X last week"). Queries
+page newest first with a keyset cursor on (timestamp, id), so a page costs
+the same on the first or the millionth row. Per-day counts by rule,
+severity and model are kept in a rollup table while writing, and /stats
+reads them without scanning findings.
+
+Existing risk logs can be loaded with:
+
+    python -m risk_engine.findings_store logs/risks -o logs/findings.sqlite3
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+STORE_SUFFIXES = (".sqlite3", ".db")
+# Filters accepted by query_findings(), all equality matches on indexed columns.
+FINDING_FILTERS = ("rule_id", "severity", "risk_type", "model_name", "user_id", "source", "interaction_id")
+# Dimensions of the daily rollup; stats() groups by one of these.
+STATS_GROUPS = ("day", "rule_id", "severity", "model_name")
+MAX_PAGE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    ts TEXT,
+    interaction_id TEXT,
+    tier TEXT,
+    model_name TEXT,
+    user_id TEXT,
+    source TEXT,
+    latency_ms REAL,
+    findings INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluations_ts ON evaluations (ts);
+CREATE INDEX IF NOT EXISTS evaluations_interaction ON evaluations (interaction_id);
+
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    evaluation_id INTEGER NOT NULL,
+    ts TEXT,
+    rule_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    risk_type TEXT,
+    rule_name TEXT,
+    message TEXT,
+    metadata TEXT,
+    model_name TEXT,
+    user_id TEXT,
+    source TEXT,
+    interaction_id TEXT
+);
+-- SQLite appends the rowid to every index, so each of these serves both the
+-- filter and the (ts, id) page order without a sort.
+CREATE INDEX IF NOT EXISTS findings_ts ON findings (ts);
+CREATE INDEX IF NOT EXISTS findings_rule ON findings (rule_id, ts);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity, ts);
+CREATE INDEX IF NOT EXISTS findings_model ON findings (model_name, ts);
+CREATE INDEX IF NOT EXISTS findings_model_rule ON findings (model_name, rule_id, ts);
+CREATE INDEX IF NOT EXISTS findings_user ON findings (user_id, ts);
+CREATE INDEX IF NOT EXISTS findings_interaction ON findings (interaction_id);
+
+CREATE TABLE IF NOT EXISTS finding_counts (
+    day TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, rule_id, severity, model_name)
+) WITHOUT ROWID;
+"""
+
+# Fields of a queried finding; "timestamp" is the ts column.
+_FINDING_FIELDS = (
+    "id", "timestamp", "rule_id", "severity", "risk_type", "rule_name", "message", "metadata",
+    "model_name", "user_id", "source", "interaction_id",
+)
+
+
+def is_store_path(path: str) -> bool:
+    return path.endswith(STORE_SUFFIXES)
+
+
+def encode_cursor(ts: Optional[str], row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([ts, row_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        ts, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(ts or ""), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+class FindingsStore:
+    """
+    SQLite findings store; also a LogSink target (append/sync/close).
+
+    Writes come from one thread (the sink's writer); readers may be any
+    number of threads, each with its own connection, and never block the
+    writer under WAL.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._conn()  # create the schema up front
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                conn.executescript(_SCHEMA)
+                self._connections.append(conn)
+            self._local.conn = conn
+        return conn
+
+    # ---------- writing ---------- #
+
+    def append_records(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Insert log records (as built by log_results) in one transaction."""
+        conn = self._conn()
+        rows: List[Tuple[Any, ...]] = []
+        counts: Dict[Tuple[str, str, str, str], int] = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                ts = record.get("timestamp")
+                model = record.get("model_name")
+                user = record.get("user_id")
+                source = record.get("source")
+                interaction_id = record.get("interaction_id")
+                findings = record.get("findings") or ()
+                evaluation_id = conn.execute(
+                    "INSERT INTO evaluations (ts, interaction_id, tier, model_name, user_id,"
+                    " source, latency_ms, findings) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ts, interaction_id, record.get("tier"), model, user, source,
+                     record.get("latency_ms"), len(findings)),
+                ).lastrowid
+                day = (ts or "")[:10]
+                for f in findings:
+                    rows.append((
+                        evaluation_id, ts, f["rule_id"], f["severity"], f.get("risk_type"),
+                        f.get("rule_name"), f.get("message"),
+                        json.dumps(f.get("metadata") or {}, separators=(",", ":"), default=str),
+                        model, user, source, interaction_id,
+                    ))
+                    key = (day, f["rule_id"], f["severity"], model or "")
+                    counts[key] = counts.get(key, 0) + 1
+            conn.executemany(
+                "INSERT INTO findings (evaluation_id, ts, rule_id, severity, risk_type, rule_name,"
+                " message, metadata, model_name, user_id, source, interaction_id)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO finding_counts (day, rule_id, severity, model_name, count)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (day, rule_id, severity, model_name)"
+                " DO UPDATE SET count = count + excluded.count",
+                [key + (n,) for key, n in counts.items()],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def append(self, lines: Sequence[bytes], timestamps: Sequence[Optional[str]]) -> None:
+        self.append_records([json.loads(line) for line in lines])
+
+    def sync(self) -> None:
+        self._conn().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    # ---------- reading ---------- #
+
+    def query_findings(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of findings, newest first, and the cursor of the next page
+        (None on the last). `filters` maps FINDING_FILTERS to values;
+        start/end bound the ISO timestamp inclusively, compared as strings,
+        so end="2026-08-08" stops before that day.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        for name, value in (filters or {}).items():
+            if name not in FINDING_FILTERS:
+                raise ValueError(f"Unknown filter {name!r}; expected one of {FINDING_FILTERS}")
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts <= ?")
+            params.append(end)
+        if cursor is not None:
+            clauses.append("(ts, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        limit = max(1, min(limit, MAX_PAGE))
+        sql = "SELECT {} FROM findings".format(", ".join(_FINDING_FIELDS).replace("timestamp", "ts"))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+
+        page = []
+        for row in rows[:limit]:
+            item = dict(zip(_FINDING_FIELDS, row))
+            item["metadata"] = json.loads(item["metadata"]) if item["metadata"] else {}
+            page.append(item)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last[1], last[0])
+        return page, next_cursor
+
+    def stats(
+        self,
+        group_by: str = "rule_id",
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, int]:
+        """
+        Finding counts per `group_by` value (one of STATS_GROUPS) from the
+        daily rollup. Days are YYYY-MM-DD, inclusive; filters may be
+        rule_id, severity and model_name ("" for findings without a model).
+        """
+        if group_by not in STATS_GROUPS:
+            raise ValueError(f"group_by must be one of {STATS_GROUPS}")
+        clauses: List[str] = []
+        params: List[Any] = []
+        for name, value in (filters or {}).items():
+            if name not in STATS_GROUPS[1:]:
+                raise ValueError(f"Unknown stats filter {name!r}; expected one of {STATS_GROUPS[1:]}")
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        if start_day is not None:
+            clauses.append("day >= ?")
+            params.append(start_day[:10])
+        if end_day is not None:
+            clauses.append("day <= ?")
+            params.append(end_day[:10])
+        sql = f"SELECT {group_by}, SUM(count) FROM finding_counts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" GROUP BY {group_by} ORDER BY SUM(count) DESC"
+        return dict(self._conn().execute(sql, params).fetchall())
+
+    def counts(self) -> Dict[str, int]:
+        """Rows per table (evaluations, findings), from the rowid maxima."""
+        conn = self._conn()
+        return {
+            table: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            for table in ("evaluations", "findings")
+        }
+
+
+def import_records(store: FindingsStore, records: Iterable[Dict[str, Any]], batch_size: int = 5000) -> int:
+    """Bulk-load log records; returns how many were written."""
+    batch: List[Dict[str, Any]] = []
+    written = 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            store.append_records(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        store.append_records(batch)
+        written += len(batch)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .log_store import iter_log_records
+
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.findings_store",
+        description="Load a risk log (segmented store or JSONL) into a findings store.",
+    )
+    parser.add_argument("log", help="Segmented log store directory or JSONL file")
+    parser.add_argument("-o", "--output", required=True, help="Findings store path (.sqlite3 or .db)")
+    parser.add_argument("--start", help="Only records at or after this ISO timestamp")
+    parser.add_argument("--end", help="Only records at or before this ISO timestamp")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    store = FindingsStore(args.output)
+    written = import_records(store, iter_log_records(args.log, args.start, args.end), args.batch_size)
+    counts = store.counts()
+    store.close()
+    print(
+        f"{args.output}: imported {written} records; "
+        f"{counts['evaluations']} evaluations, {counts['findings']} findings in store",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Compiled term lexicons shared by phrase rules.
+
+A lexicon source is a text file with one term or phrase per line (blank
+lines and lines starting with '#' are ignored). It is compiled once into a
+memory-mapped token trie (see mapped_index), so a 50k-term list costs
+each worker process neither parse time nor a Python list of strings:
+
+    python -m risk_engine.lexicon config/lexicons/toxic.txt -o config/lexicons/toxic.lex
+
+Policies reference lexicons through the `lexicons` param of phrase rules.
+A source path is compiled to `<path>.lex` on first use, and again whenever
+the source is newer than that file. Where that file cannot be written (e.g.
+a read-only config mount), the source is compiled in memory in each process
+instead; ship the compiled file alongside to keep the shared mapping.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .mapped_index import TRIE_COMPLETE, TRIE_PREFIX, HashIndex, build_index, trie_records, write_index
+from .models import TextView
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RNLEXIC1"
+COMPILED_SUFFIX = ".lex"
+
+_TERM = b"t:"
+# Per-process memo of first-token lookups. Common words repeat across texts,
+# so this absorbs most index probes while staying small.
+_MEMO_LIMIT = 50_000
+_MISSING = object()
+
+_open_lexicons: Dict[str, Lexicon] = {}
+_open_lock = threading.Lock()
+
+
+def iter_terms(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            term = line.strip()
+            if term and not term.startswith("#"):
+                yield term
+
+
+def compile_terms(terms: Iterable[str]) -> bytes:
+    """Build the lexicon file contents. Terms are matched on normalized word tokens."""
+    phrases: Dict[str, bytes] = {}
+    max_tokens = 0
+    for term in terms:
+        tokens = TextView(term).tokens
+        if not tokens:
+            continue
+        key = " ".join(tokens)
+        # The first spelling of a term is the one reported.
+        phrases.setdefault(key, " ".join(term.split()).encode("utf-8"))
+        max_tokens = max(max_tokens, len(tokens))
+    meta = {"terms": len(phrases), "max_tokens": max_tokens}
+    return build_index(MAGIC, trie_records(_TERM, phrases), meta)
+
+
+class Lexicon:
+    """
+    Word-boundary-aware matcher over a compiled lexicon.
+
+    Texts are matched as normalized word tokens (TextView.tokens), so "kill"
+    does not match "skill" and a phrase matches across any whitespace or
+    punctuation between its words. The file is mapped on first use.
+    """
+
+    def __init__(self, path: str, index: Optional[HashIndex] = None) -> None:
+        self.path = path
+        self._index = index
+        self._memo: Dict[str, Optional[bytes]] = {}
+        # Modification time of the file when loaded through load_lexicon().
+        self.mtime: Optional[float] = None
+        # Term list the file was compiled from, when loaded from one.
+        self.source: Optional[str] = None
+
+    @property
+    def index(self) -> HashIndex:
+        if self._index is None:
+            self._index = HashIndex.open(self.path, MAGIC)
+        return self._index
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        if self.source is not None or self._index is None or self._index.path is not None:
+            # File-backed: unpickling goes through the shared, lazy loader,
+            # from the source so that edited term lists are recompiled.
+            return (load_lexicon, (self.source or self.path,))
+        return (Lexicon, (self.path, self._index))
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str], name: str = "<memory>") -> Lexicon:
+        return cls(name, HashIndex(compile_terms(terms), MAGIC))
+
+    def __len__(self) -> int:
+        return self.index.meta.get("terms", 0)
+
+    def find(self, tokens: Sequence[str]) -> Set[str]:
+        """Every lexicon term occurring in `tokens`, as originally spelled."""
+        found: Set[str] = set()
+        index = self.index
+        get = index.get
+        memo = self._memo
+        max_tokens = index.meta.get("max_tokens", 0)
+        n = len(tokens)
+        for start, first in enumerate(tokens):
+            node = memo.get(first, _MISSING)
+            if node is _MISSING:
+                node = get(_TERM + first.encode("utf-8"))
+                if len(memo) >= _MEMO_LIMIT:
+                    memo.clear()
+                memo[first] = node
+            key = first
+            end = start + 1
+            while node is not None:
+                if node[0] & TRIE_COMPLETE:
+                    found.add(node[1:].decode("utf-8"))
+                if not node[0] & TRIE_PREFIX or end >= n or end - start >= max_tokens:
+                    break
+                key = f"{key} {tokens[end]}"
+                node = get(_TERM + key.encode("utf-8"))
+                end += 1
+        return found
+
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+
+def compiled_path(path: str) -> str:
+    """The compiled lexicon for `path`, (re)compiling a source file if stale."""
+    if path.endswith(COMPILED_SUFFIX):
+        return path
+    target = path + COMPILED_SUFFIX
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(path):
+        write_index(target, compile_terms(iter_terms(path)))
+    return target
+
+
+def load_lexicon(path: str) -> Lexicon:
+    """
+    Shared Lexicon for a source or compiled path. Rules referencing the same
+    file (including across policy reloads) share one mapping, or one
+    in-memory lexicon when the compiled file cannot be written.
+    """
+    try:
+        target = os.path.realpath(compiled_path(path))
+    except OSError as e:
+        if not os.path.exists(path):
+            raise
+        return _memory_lexicon(path, e)
+    with _open_lock:
+        lexicon = _open_lexicons.get(target)
+        mtime = os.path.getmtime(target)
+        if lexicon is None or lexicon.mtime != mtime:
+            lexicon = Lexicon(target)
+            lexicon.mtime = mtime
+            _open_lexicons[target] = lexicon
+        if not path.endswith(COMPILED_SUFFIX):
+            lexicon.source = os.path.abspath(path)
+        return lexicon
+
+
+def _memory_lexicon(path: str, error: OSError) -> Lexicon:
+    """Lexicon compiled in memory from a source whose compiled file cannot be written."""
+    source = os.path.abspath(path)
+    mtime = os.path.getmtime(source)
+    with _open_lock:
+        lexicon = _open_lexicons.get(source)
+        if lexicon is None or lexicon.mtime != mtime:
+            logger.warning(
+                "Cannot write %s (%s); compiling the lexicon in memory. "
+                "Precompile it with python -m risk_engine.lexicon to share one mapping.",
+                path + COMPILED_SUFFIX, error,
+            )
+            lexicon = Lexicon.from_terms(iter_terms(source), name=source)
+            lexicon.mtime = mtime
+            lexicon.source = source
+            _open_lexicons[source] = lexicon
+        return lexicon
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.lexicon",
+        description="Compile a term list (one per line) into a memory-mappable lexicon.",
+    )
+    parser.add_argument("input", help="Term list path")
+    parser.add_argument("-o", "--output", help=f"Compiled path (default: input + {COMPILED_SUFFIX})")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.input + COMPILED_SUFFIX
+    blob = compile_terms(iter_terms(args.input))
+    write_index(output, blob)
+    lexicon = Lexicon(output)
+    print(f"{output}: {len(lexicon)} terms, {len(blob)} bytes", file=sys.stderr)
+    lexicon.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
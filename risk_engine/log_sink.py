@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from .findings_store import FindingsStore, is_store_path
+from .log_store import SegmentedLogStore
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("none", "interval", "always")
+ON_FULL_POLICIES = ("block", "drop")
+# Default wait of flush() and close(), in seconds.
+DEFAULT_TIMEOUT = 30.0
+
+
+class _Marker:
+    """Queue control item; `done` is set once the writer has handled it."""
+
+    def __init__(self, stop: bool = False) -> None:
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class JsonlFile:
+    """Plain append-only JSONL file target."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def append(self, lines: Sequence[bytes], timestamps: Sequence[Optional[str]]) -> None:
+        view = memoryview(b"".join(lines))
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def sync(self) -> None:
+        os.fsync(self._fd)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_target(path: str) -> Any:
+    """
+    A `.jsonl` path is a single file, a `.sqlite3` or `.db` path a
+    FindingsStore; anything else is a SegmentedLogStore.
+    """
+    if path.endswith(".jsonl"):
+        return JsonlFile(path)
+    if is_store_path(path):
+        return FindingsStore(path)
+    return SegmentedLogStore(path)
+
+
+class LogSink:
+    """
+    Long-lived JSONL writer fed through a bounded in-memory queue.
+
+    Callers only enqueue records; a background thread serializes whatever has
+    accumulated and hands it to the target (a JsonlFile or SegmentedLogStore)
+    as one append, i.e. a single write() on an O_APPEND descriptor. Each batch
+    costs one syscall and lines from several processes never interleave.
+    A FindingsStore target gets each batch as records, in one transaction.
+
+    target:   overrides the target chosen from `path` by open_target(),
+              e.g. a SegmentedLogStore with custom rollover limits.
+    fsync:    "none" (leave it to the OS), "interval" (at most every
+              fsync_interval seconds) or "always" (after every batch).
+    on_full:  "block" waits for queue space, "drop" discards the record and
+              counts it in `dropped`.
+
+    Values JSON cannot encode are written with str(). A record that still
+    cannot be serialized, or that a FindingsStore rejects, is dropped on its
+    own and counted in `errors`. Every error is kept in `last_error` and
+    logged, and the writer keeps draining the queue.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.2,
+        fsync: str = "none",
+        fsync_interval: float = 1.0,
+        max_queue: int = 10_000,
+        max_batch: int = 1_000,
+        on_full: str = "block",
+        target: Optional[Any] = None,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        if on_full not in ON_FULL_POLICIES:
+            raise ValueError(f"on_full must be one of {ON_FULL_POLICIES}, got {on_full!r}")
+
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        self.on_full = on_full
+
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+        self.target = target if target is not None else open_target(path)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._last_fsync = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-sink:{path}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Enqueue one record. Returns False if it was dropped."""
+        if self._closed:
+            raise RuntimeError(f"Log sink for {self.path} is closed")
+        if self.on_full == "drop":
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self._put(record)
+        return True
+
+    def flush(self, timeout: Optional[float] = DEFAULT_TIMEOUT) -> bool:
+        """
+        Block until every record submitted before this call is written.
+        Returns False if that took longer than `timeout` seconds.
+        """
+        if self._closed:
+            return True
+        marker = _Marker()
+        self._put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+        """Write out everything queued, fsync if configured, and stop."""
+        if self._closed:
+            return
+        self._closed = True
+        marker = _Marker(stop=True)
+        self._put(marker)
+        marker.done.wait(timeout)
+        self._thread.join(timeout)
+
+    def _put(self, item: Any) -> None:
+        # Wait for queue space, but not on a writer thread that has gone.
+        while True:
+            try:
+                self._queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    raise RuntimeError(f"Log sink writer for {self.path} has stopped") from None
+
+    # ---------- writer thread ---------- #
+
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            batch: List[Dict[str, Any]] = []
+            markers: List[_Marker] = []
+            try:
+                item = q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._maybe_fsync(force=False)
+                continue
+
+            while True:
+                if isinstance(item, _Marker):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+
+            stop = any(m.stop for m in markers)
+            try:
+                if batch:
+                    self._write(batch)
+                if markers:
+                    self._maybe_fsync(force=stop and self.fsync != "none")
+                if stop:
+                    self.target.close()
+            except Exception as e:
+                self._error(e)
+            finally:
+                for marker in markers:
+                    marker.done.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if hasattr(self.target, "append_records"):
+            # Indexed stores take the records as they are; no JSON round trip.
+            try:
+                self.target.append_records(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    self._error(e)
+                    return
+                # Each append is one transaction, so nothing of the batch was
+                # written: retry record by record, losing only the bad ones.
+                for record in batch:
+                    self._write([record])
+                return
+        else:
+            lines: List[bytes] = []
+            timestamps: List[Optional[str]] = []
+            for record in batch:
+                try:
+                    lines.append((json.dumps(record, default=str) + "\n").encode("utf-8"))
+                except Exception as e:
+                    self._error(e)
+                    continue
+                timestamps.append(record.get("timestamp"))
+            if not lines:
+                return
+            try:
+                self.target.append(lines, timestamps)
+            except Exception as e:
+                self._error(e)
+                return
+            batch = lines
+        self.written += len(batch)
+        self._maybe_fsync(force=self.fsync == "always")
+
+    def _maybe_fsync(self, force: bool) -> None:
+        if self.fsync == "none":
+            return
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            try:
+                self.target.sync()
+            except Exception as e:
+                self._error(e)
+            self._last_fsync = now
+
+    def _error(self, e: Exception) -> None:
+        self.errors += 1
+        self.last_error = f"{type(e).__name__}: {e}"
+        logger.warning("Log sink for %s: %s", self.path, self.last_error)
+
+
+# ---------- Process-wide sinks, one per log path ---------- #
+
+_sinks: Dict[str, LogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def open_sink(path: str, **options: Any) -> LogSink:
+    """Create (or replace) the shared sink for `path` with custom options."""
+    key = os.path.abspath(path)
+    with _sinks_lock:
+        old = _sinks.pop(key, None)
+        sink = _sinks[key] = LogSink(path, **options)
+    if old is not None:
+        old.close()
+    return sink
+
+
+def get_sink(path: str) -> LogSink:
+    """Return the shared sink for `path`, creating one with defaults."""
+    key = os.path.abspath(path)
+    sink = _sinks.get(key)
+    if sink is None:
+        with _sinks_lock:
+            sink = _sinks.get(key)
+            if sink is None:
+                sink = _sinks[key] = LogSink(path)
+    return sink
+
+
+def active_sinks() -> List[LogSink]:
+    with _sinks_lock:
+        return list(_sinks.values())
+
+
+def close_all_sinks() -> None:
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+def _forget_sinks_after_fork() -> None:
+    # Writer threads do not survive fork(); children open their own sinks.
+    global _sinks_lock
+    _sinks.clear()
+    _sinks_lock = threading.Lock()
+
+
+atexit.register(close_all_sinks)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_sinks_after_fork)
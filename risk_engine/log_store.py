@@ -0,0 +1,439 @@
+"""
+Rotating, compressed, segment-indexed storage for risk logs.
+
+A store is a directory of numbered JSONL segments plus a sidecar index:
+
+    logs/risks/
+        index.json
+        segment-000001.jsonl.gz    closed, compressed
+        segment-000002.jsonl       active, still being appended to
+
+The index records, per segment, its time range, record count, size and a
+sparse list of (timestamp, byte offset) checkpoints. Readers use it to open
+only the segments that overlap a time window and to skip ahead inside them
+instead of reading the whole history.
+
+A single-file log from before segmented stores (`logs/risks.jsonl` next to
+`logs/risks/`) is moved into the store as its oldest, closed segment by
+import_legacy(), which writers call before their first append.
+"""
+from __future__ import annotations
+
+import contextlib
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:  # POSIX only; without it a store must have a single writer process.
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+# (store directory, segment id) of the active segments written by stores of
+# this process. Several stores may share a directory (e.g. a sink being
+# replaced), so the writer pid alone cannot tell an orphan from a live segment.
+_owned_segments: Set[Tuple[str, int]] = set()
+_owned_lock = threading.Lock()
+
+
+class _ActiveSegment:
+    def __init__(self, seg_id: int, path: str) -> None:
+        self.id = seg_id
+        self.path = path
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.bytes = os.fstat(self.fd).st_size
+        self.records = 0
+        self.first_ts: Optional[str] = None
+        self.last_ts: Optional[str] = None
+        self.checkpoints: List[List[Any]] = []
+        self.opened_at = time.monotonic()
+
+
+class SegmentedLogStore:
+    """
+    Append-only JSONL log split into size/time bounded segments.
+
+    Writers call append() with already-serialized lines (LogSink does this
+    from its background thread). Closed segments are gzip-compressed in the
+    background. Several processes may write to the same store: each owns its
+    own active segment, and index updates are serialized with a file lock.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_age_s: float = 3600.0,
+        compress: bool = True,
+        checkpoint_every: int = 1000,
+        index_interval_s: float = 5.0,
+    ) -> None:
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age_s = max_segment_age_s
+        self.compress = compress
+        self.checkpoint_every = checkpoint_every
+        self.index_interval_s = index_interval_s
+
+        self._active: Optional[_ActiveSegment] = None
+        self._key = os.path.realpath(directory)
+        self._index_written_at = 0.0
+        self._sealers: List[threading.Thread] = []
+
+    # ---------- index ---------- #
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def read_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": INDEX_VERSION, "next_id": 1, "segments": []}
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+    @contextlib.contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Any]]:
+        """Read-modify-write the index under an inter-process lock."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self.read_index()
+                yield index
+                self._write_index(index)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _entry(index: Dict[str, Any], seg_id: int) -> Dict[str, Any]:
+        for entry in index["segments"]:
+            if entry["id"] == seg_id:
+                return entry
+        raise KeyError(f"Segment {seg_id} missing from index")
+
+    # ---------- writing ---------- #
+
+    @property
+    def legacy_path(self) -> str:
+        """Single-file log this store replaces: the directory name plus .jsonl."""
+        return os.path.normpath(self.directory) + ".jsonl"
+
+    def import_legacy(self) -> bool:
+        """
+        Move the legacy single-file log, if any, into the store as its
+        oldest segment. Safe to call from several processes; returns
+        whether this call imported it.
+        """
+        legacy = self.legacy_path
+        if not os.path.isfile(legacy):
+            return False
+        with self._locked_index() as index:
+            if not os.path.isfile(legacy):
+                return False  # imported by another process meanwhile
+            seg_id = index["next_id"]
+            index["next_id"] = seg_id + 1
+            name = f"segment-{seg_id:06d}.jsonl"
+            path = os.path.join(self.directory, name)
+            os.replace(legacy, path)
+            entry = {"id": seg_id, "file": name, "active": False, "legacy": os.path.basename(legacy)}
+            entry.update(_scan_segment(path, self.checkpoint_every))
+            index["segments"].insert(0, entry)
+        if self.compress:
+            self._compress(seg_id, path)
+        return True
+
+    def append(self, lines: Sequence[bytes], timestamps: Sequence[Optional[str]]) -> None:
+        """Append newline-terminated lines; rolls the segment over first if due."""
+        active = self._active
+        if active is None or self._due_for_rollover(active):
+            active = self._roll()
+
+        offset = active.bytes
+        for line, ts in zip(lines, timestamps):
+            if ts is not None:
+                if active.records % self.checkpoint_every == 0:
+                    active.checkpoints.append([ts, offset])
+                if active.first_ts is None:
+                    active.first_ts = ts
+                active.last_ts = ts
+            active.records += 1
+            offset += len(line)
+
+        view = memoryview(b"".join(lines))
+        while view:
+            view = view[os.write(active.fd, view):]
+        active.bytes = offset
+
+        if time.monotonic() - self._index_written_at >= self.index_interval_s:
+            self._publish_active()
+
+    def sync(self) -> None:
+        if self._active is not None:
+            os.fsync(self._active.fd)
+
+    def close(self) -> None:
+        """Seal the active segment and wait for background compression."""
+        if self._active is not None:
+            self._seal(self._active, background=False)
+            self._active = None
+        for thread in self._sealers:
+            thread.join()
+        self._sealers.clear()
+
+    def _due_for_rollover(self, active: _ActiveSegment) -> bool:
+        return active.bytes >= self.max_segment_bytes or (
+            time.monotonic() - active.opened_at >= self.max_segment_age_s
+        )
+
+    def _roll(self) -> _ActiveSegment:
+        if self._active is None:
+            self.import_legacy()
+            self._recover_orphans()
+        else:
+            self._seal(self._active, background=True)
+
+        with self._locked_index() as index:
+            seg_id = index["next_id"]
+            index["next_id"] = seg_id + 1
+            name = f"segment-{seg_id:06d}.jsonl"
+            index["segments"].append(
+                {
+                    "id": seg_id,
+                    "file": name,
+                    "active": True,
+                    "writer": os.getpid(),
+                    "first_ts": None,
+                    "last_ts": None,
+                    "records": 0,
+                    "bytes": 0,
+                    "checkpoints": [],
+                }
+            )
+            with _owned_lock:
+                _owned_segments.add((self._key, seg_id))
+        self._active = _ActiveSegment(seg_id, os.path.join(self.directory, name))
+        self._index_written_at = time.monotonic()
+        return self._active
+
+    def _publish_active(self) -> None:
+        active = self._active
+        with self._locked_index() as index:
+            entry = self._entry(index, active.id)
+            entry.update(
+                first_ts=active.first_ts,
+                last_ts=active.last_ts,
+                records=active.records,
+                bytes=active.bytes,
+                checkpoints=active.checkpoints,
+            )
+        self._index_written_at = time.monotonic()
+
+    def _seal(self, segment: _ActiveSegment, background: bool) -> None:
+        os.close(segment.fd)
+        with self._locked_index() as index:
+            entry = self._entry(index, segment.id)
+            entry.update(
+                active=False,
+                first_ts=segment.first_ts,
+                last_ts=segment.last_ts,
+                records=segment.records,
+                bytes=segment.bytes,
+                checkpoints=segment.checkpoints,
+            )
+            entry.pop("writer", None)
+        with _owned_lock:
+            _owned_segments.discard((self._key, segment.id))
+        if not self.compress:
+            return
+        if background:
+            thread = threading.Thread(
+                target=self._compress, args=(segment.id, segment.path), daemon=True
+            )
+            thread.start()
+            self._sealers = [t for t in self._sealers if t.is_alive()] + [thread]
+        else:
+            self._compress(segment.id, segment.path)
+
+    def _compress(self, seg_id: int, path: str) -> None:
+        gz_path = path + ".gz"
+        tmp = gz_path + ".tmp"
+        with open(path, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp, gz_path)
+        with self._locked_index() as index:
+            entry = self._entry(index, seg_id)
+            entry["file"] = os.path.basename(gz_path)
+            entry["compressed"] = True
+        os.remove(path)
+
+    def _recover_orphans(self) -> None:
+        """Seal active segments left behind by writers that are gone."""
+        orphans: List[Dict[str, Any]] = []
+        with self._locked_index() as index, _owned_lock:
+            for entry in index["segments"]:
+                if entry.get("active") and self._orphaned(entry):
+                    path = os.path.join(self.directory, entry["file"])
+                    entry.update(_scan_segment(path, self.checkpoint_every))
+                    entry["active"] = False
+                    entry.pop("writer", None)
+                    orphans.append(entry)
+        if self.compress:
+            for entry in orphans:
+                path = os.path.join(self.directory, entry["file"])
+                if os.path.exists(path):
+                    self._compress(entry["id"], path)
+
+    def _orphaned(self, entry: Dict[str, Any]) -> bool:
+        writer = entry.get("writer")
+        if writer == os.getpid():
+            # Ours unless no store of this process holds it (e.g. the pid
+            # of a crashed writer was reused).
+            return (self._key, entry["id"]) not in _owned_segments
+        return not _pid_alive(writer)
+
+    # ---------- reading ---------- #
+
+    def segments(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries overlapping [start, end] (ISO timestamps), oldest first."""
+        selected = []
+        for entry in self.read_index()["segments"]:
+            first, last = entry.get("first_ts"), entry.get("last_ts")
+            if entry.get("active"):
+                last = None  # still growing; the index may lag behind
+            if end is not None and first is not None and first > end:
+                continue
+            if start is not None and last is not None and last < start:
+                continue
+            if not entry.get("active") and not entry.get("records"):
+                continue
+            selected.append(entry)
+        return selected
+
+    def iter_lines(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[bytes]:
+        """Stream raw JSONL lines from the segments overlapping the window."""
+        for entry in self.segments(start, end):
+            with self._open_segment(entry) as f:
+                if start is not None:
+                    f.seek(_seek_offset(entry.get("checkpoints") or [], start))
+                yield from f
+
+    def iter_records(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream decoded records whose timestamp falls within [start, end]."""
+        for line in self.iter_lines(start, end):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            ts = record.get("timestamp")
+            if ts is not None:
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts > end:
+                    continue
+            yield record
+
+    def _open_segment(self, entry: Dict[str, Any]) -> IO[bytes]:
+        path = os.path.join(self.directory, entry["file"])
+        candidates = [path] if path.endswith(".gz") else [path, path + ".gz"]
+        for candidate in candidates:
+            try:
+                if candidate.endswith(".gz"):
+                    return gzip.open(candidate, "rb")
+                return open(candidate, "rb")
+            except FileNotFoundError:
+                continue  # compressed (and removed) since the index was read
+        raise FileNotFoundError(path)
+
+
+def _seek_offset(checkpoints: List[List[Any]], start: str) -> int:
+    offset = 0
+    for ts, pos in checkpoints:
+        if ts > start:
+            break
+        offset = pos
+    return offset
+
+
+def _scan_segment(path: str, checkpoint_every: int) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {
+        "first_ts": None, "last_ts": None, "records": 0, "bytes": 0, "checkpoints": [],
+    }
+    if not os.path.exists(path):
+        return stats
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                ts = json.loads(line).get("timestamp")
+            except ValueError:
+                ts = None
+            if ts is not None:
+                if stats["records"] % checkpoint_every == 0:
+                    stats["checkpoints"].append([ts, offset])
+                stats["first_ts"] = stats["first_ts"] or ts
+                stats["last_ts"] = ts
+            stats["records"] += 1
+            offset += len(line)
+    stats["bytes"] = offset
+    return stats
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _forget_owned_after_fork() -> None:
+    # The child writes its own segments; the parent's are identified by its pid.
+    global _owned_lock
+    _owned_segments.clear()
+    _owned_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_owned_after_fork)
+
+
+def iter_log_records(
+    path: str, start: Optional[str] = None, end: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """Stream records from a segmented store directory or a plain JSONL file."""
+    if os.path.isdir(path):
+        yield from SegmentedLogStore(path).iter_records(start, end)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            ts = record.get("timestamp")
+            if ts is not None and (
+                (start is not None and ts < start) or (end is not None and ts > end)
+            ):
+                continue
+            yield record
@@ -1,24 +1,27 @@
 from __future__ import annotations
 
-import json
-import os
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from .models import EvaluationContext, RiskFinding
+from .log_sink import get_sink
+from .models import EvaluationContext, Finding, dump_findings
 
 
 def log_results(
     ctx: EvaluationContext,
-    findings: List[RiskFinding],
-    log_path: str = "logs/risks.jsonl",
+    findings: List[Finding],
+    log_path: str = "logs/risks",
+    interaction_id: Optional[str] = None,
+    tier: Optional[str] = None,
 ) -> None:
     """
-    Append a JSON line with context + findings to logs/risks.jsonl.
-    Creates the logs/ folder if it doesn't exist.
+    Queue a JSON line with context + findings for the risk log.
+    `log_path` is a segmented log store directory (see log_store), or a
+    single file if it ends in `.jsonl`. Lines are written in batches by the
+    shared LogSink for `log_path`; call get_sink(log_path).flush() to wait
+    for them to be written. `interaction_id` and `tier` are recorded when
+    given, e.g. for findings of deferred rules logged after the request.
     """
-    os.makedirs(os.path.dirname(log_path), exist_ok=True)
-
     record = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "prompt": ctx.prompt,
@@ -27,9 +30,12 @@ def log_results(
         "model_name": ctx.model_name,
         "user_id": ctx.user_id,
         "source": ctx.source,
-        "extra": ctx.extra,
-        "findings": [f.model_dump() for f in findings],
+        "extra": dict(ctx.extra),
+        "findings": dump_findings(findings, mode="json"),
     }
+    if interaction_id is not None:
+        record["interaction_id"] = interaction_id
+    if tier is not None:
+        record["tier"] = tier
 
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record) + "\n")
+    get_sink(log_path).submit(record)
@@ -0,0 +1,192 @@
+"""
+Read-only hash index stored in one file and memory-mapped.
+
+The file is a header, a JSON metadata blob, an open-addressing slot table and
+a data area of (key, value) records. Lookups hash the key, probe the slot
+table in place and compare the stored key, so nothing is parsed at load time:
+opening an index is O(1), processes mapping the same file share its pages,
+and lookup cost does not depend on the number of keys. Used by the fact
+store and the compiled lexicons.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Native byte order: the slot table is read through memoryview.cast(), so a
+# compiled file is meant for hosts of the architecture that compiled it.
+_HEADER = struct.Struct("=8sIIIQ")  # magic, slot count, key count, meta length, data length
+_SLOT = struct.Struct("=QQ")  # key hash, record offset in the data area (0 = empty)
+_RECORD = struct.Struct("=II")  # key length, value length; key and value follow
+_U16 = struct.Struct("=H")
+_crc32 = zlib.crc32
+_adler32 = zlib.adler32
+
+
+def key_hash(key: bytes) -> int:
+    """
+    64-bit key hash, stable across processes (unlike hash()). The low bits,
+    which pick the slot, come from CRC-32. Never 0, so a zeroed slot is
+    unambiguous.
+    """
+    return (_crc32(key) | (_adler32(key) << 32)) or 1
+
+
+def build_index(magic: bytes, records: Dict[bytes, bytes], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serialize `records` (key -> value) into the index file format."""
+    if len(magic) != 8:
+        raise ValueError("magic must be 8 bytes")
+    slots = 8
+    while slots < 2 * len(records):
+        slots *= 2
+    mask = slots - 1
+
+    table = bytearray(slots * _SLOT.size)
+    data = bytearray(b"\0")  # offset 0 marks an empty slot
+    for key, value in records.items():
+        offset = len(data)
+        data += _RECORD.pack(len(key), len(value)) + key + value
+        h = key_hash(key)
+        i = h & mask
+        while _SLOT.unpack_from(table, i * _SLOT.size)[1]:
+            i = (i + 1) & mask
+        _SLOT.pack_into(table, i * _SLOT.size, h, offset)
+
+    meta_blob = json.dumps(meta or {}, sort_keys=True).encode("utf-8")
+    header = _HEADER.pack(magic, slots, len(records), len(meta_blob), len(data))
+    return b"".join([header, meta_blob, bytes(table), bytes(data)])
+
+
+def write_index(path: str, blob: bytes) -> None:
+    """Write atomically, so readers never map a half-written file."""
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+class HashIndex:
+    """Lookups over a buffer produced by build_index(): bytes or an mmap."""
+
+    def __init__(self, buf: Any, magic: bytes, path: Optional[str] = None) -> None:
+        found, slots, keys, meta_len, data_len = _HEADER.unpack_from(buf, 0)
+        if found != magic:
+            raise ValueError(f"Not a {magic.decode('ascii', 'replace')} index (magic {found!r})")
+        self.magic = magic
+        # File the buffer maps, or None for an in-memory index.
+        self.path = path
+        self._buf = buf
+        self._mask = slots - 1
+        self._keys = keys
+        self._table = _HEADER.size + meta_len
+        self._data = self._table + slots * _SLOT.size
+        if len(buf) < self._data + data_len:
+            raise ValueError("Index file is truncated")
+        self.meta: Dict[str, Any] = json.loads(bytes(buf[_HEADER.size:self._table]) or b"{}")
+        # (hash, offset) pairs as native integers, read without struct calls.
+        self._slots = memoryview(buf)[self._table:self._data].cast("Q")
+
+    @classmethod
+    def open(cls, path: str, magic: bytes) -> HashIndex:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buf, magic, path)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickles (engine snapshots) refer to the file; it is mapped again on load.
+        if self.path is not None:
+            return (HashIndex.open, (self.path, self.magic))
+        return (HashIndex, (bytes(self._buf), self.magic))
+
+    def __len__(self) -> int:
+        return self._keys
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        buf = self._buf
+        slots = self._slots
+        mask = self._mask
+        h = key_hash(key)
+        i = h & mask
+        while True:
+            offset = slots[2 * i + 1]
+            if not offset:
+                return None
+            if slots[2 * i] == h:
+                pos = self._data + offset
+                klen, vlen = _RECORD.unpack_from(buf, pos)
+                pos += _RECORD.size
+                if buf[pos:pos + klen] == key:
+                    return buf[pos + klen:pos + klen + vlen]
+            i = (i + 1) & mask
+
+    def close(self) -> None:
+        self._slots.release()
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+
+def pack_strings(values: Iterable[str]) -> bytes:
+    parts = [s.encode("utf-8") for s in values]
+    return _U16.pack(len(parts)) + b"".join(_U16.pack(len(p)) + p for p in parts)
+
+
+def unpack_strings(blob: bytes, pos: int = 0) -> Tuple[List[str], int]:
+    """Strings packed by pack_strings() at `pos`, and the offset after them."""
+    (count,) = _U16.unpack_from(blob, pos)
+    pos += 2
+    out: List[str] = []
+    for _ in range(count):
+        (n,) = _U16.unpack_from(blob, pos)
+        pos += 2
+        out.append(blob[pos:pos + n].decode("utf-8"))
+        pos += n
+    return out, pos
+
+
+# ---------- token tries ---------- #
+# A phrase of word tokens is stored under its space-joined tokens, and every
+# shorter token prefix gets a node too, so the keys form a trie that is
+# walked one token at a time straight from the index.
+
+TRIE_PREFIX = 1  # a longer phrase continues from this node
+TRIE_COMPLETE = 2  # a phrase ends at this node
+
+
+def trie_records(namespace: bytes, phrases: Dict[str, bytes]) -> Dict[bytes, bytes]:
+    """Index records for `phrases` (space-joined tokens -> payload)."""
+    flags: Dict[str, int] = {}
+    for phrase in phrases:
+        tokens = phrase.split(" ")
+        for end in range(1, len(tokens)):
+            prefix = " ".join(tokens[:end])
+            flags[prefix] = flags.get(prefix, 0) | TRIE_PREFIX
+        flags[phrase] = flags.get(phrase, 0) | TRIE_COMPLETE
+    return {
+        namespace + key.encode("utf-8"): bytes([flag]) + phrases.get(key, b"")
+        for key, flag in flags.items()
+    }
+
+
+def trie_longest(
+    get: Any, namespace: bytes, tokens: Sequence[str], start: int, max_tokens: int
+) -> Optional[Tuple[bytes, int]]:
+    """
+    Longest phrase starting at tokens[start]: (payload, end), or None.
+    `get` maps an index key to its record, e.g. HashIndex.get.
+    """
+    best: Optional[Tuple[bytes, int]] = None
+    key = ""
+    for end in range(start, min(len(tokens), start + max_tokens)):
+        key = tokens[end] if end == start else f"{key} {tokens[end]}"
+        node = get(namespace + key.encode("utf-8"))
+        if node is None:
+            break
+        if node[0] & TRIE_COMPLETE:
+            best = (node[1:], end + 1)
+        if not node[0] & TRIE_PREFIX:
+            break
+    return best
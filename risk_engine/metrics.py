@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds in seconds.
+RULE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)
+REQUEST_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus semantics, non-cumulative storage).
+
+    Updates are plain integer increments without a lock; under heavy thread
+    contention a rare observation may be lost, which is acceptable for
+    monitoring and keeps observe() well under a microsecond.
+    """
+
+    def __init__(self, buckets: Sequence[float] = RULE_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out: List[Tuple[str, int]] = []
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            out.append(("+Inf" if bound == float("inf") else f"{bound:g}", running))
+        return out
+
+
+class RuleStats:
+    """Counters and sampled wall-time histogram for one rule."""
+
+    __slots__ = ("calls", "findings", "errors", "skipped", "duration")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.findings = 0
+        self.errors = 0
+        self.skipped = 0
+        self.duration = Histogram(RULE_BUCKETS)
+
+
+class EngineMetrics:
+    """
+    Per-rule instrumentation hooks used by RiskEngine.
+
+    Call, finding and error counts are exact. Wall time is measured for the
+    rules of every `sample_every`-th evaluation only, so the steady-state
+    cost per rule is a few attribute increments.
+    """
+
+    def __init__(self, sample_every: int = 1) -> None:
+        self.configure(sample_every)
+        self.rules: Dict[str, RuleStats] = {}
+        self._ticks = itertools.count()
+        # Rules of one evaluation may run on several threads (evaluate_async),
+        # as may concurrent evaluations.
+        self._lock = threading.Lock()
+
+    def configure(self, sample_every: int = 1) -> None:
+        """Change the options; the counters collected so far are kept."""
+        self.sample_every = max(1, int(sample_every))
+
+    def should_time(self) -> bool:
+        return next(self._ticks) % self.sample_every == 0
+
+    def record(self, rule_id: str, seconds: Optional[float], findings: int, error: bool) -> None:
+        self.merge([(rule_id, seconds, findings, error)], ())
+
+    def record_skip(self, rule_id: str) -> None:
+        self.merge((), [rule_id])
+
+    def merge(
+        self,
+        calls: Iterable[Tuple[str, Optional[float], int, bool]],
+        skipped: Iterable[str],
+    ) -> None:
+        """
+        Add the rule calls, as (rule_id, seconds or None, findings, error),
+        and the skipped rule IDs of one evaluation, under a single lock
+        acquisition instead of one per rule.
+        """
+        with self._lock:
+            rules = self.rules
+            for rule_id, seconds, findings, error in calls:
+                stats = rules.get(rule_id)
+                if stats is None:
+                    stats = rules[rule_id] = RuleStats()
+                stats.calls += 1
+                stats.findings += findings
+                if error:
+                    stats.errors += 1
+                if seconds is not None:
+                    stats.duration.observe(seconds)
+            for rule_id in skipped:
+                stats = rules.get(rule_id)
+                if stats is None:
+                    stats = rules[rule_id] = RuleStats()
+                stats.skipped += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rules = sorted(self.rules.items())
+        return {
+            rule_id: {
+                "calls": s.calls,
+                "skipped": s.skipped,
+                "findings": s.findings,
+                "errors": s.errors,
+            }
+            for rule_id, s in rules
+        }
+
+    def render(self) -> List[str]:
+        with self._lock:
+            rules = sorted(self.rules.items())
+        lines = _header("risk_rule_duration_seconds", "histogram",
+                        f"Sampled rule wall time (1 in {self.sample_every} evaluations).")
+        for rule_id, stats in rules:
+            lines.extend(_histogram_lines("risk_rule_duration_seconds", {"rule": rule_id}, stats.duration))
+        for name, attr, help_text in (
+            ("risk_rule_calls_total", "calls", "Rule executions."),
+            ("risk_rule_findings_total", "findings", "Findings produced by rule."),
+            ("risk_rule_errors_total", "errors", "Rule executions that raised."),
+            ("risk_rule_skipped_total", "skipped", "Evaluations where the rule's preconditions ruled it out."),
+        ):
+            lines.extend(_header(name, "counter", help_text))
+            lines.extend(_sample(name, {"rule": rule_id}, getattr(stats, attr)) for rule_id, stats in rules)
+        return lines
+
+
+class RequestMetrics:
+    """HTTP request latency histograms by route and counts by route and status."""
+
+    def __init__(self, buckets: Sequence[float] = REQUEST_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        hist = self.latency.get((method, route))
+        if hist is None:
+            hist = self.latency.setdefault((method, route), Histogram(self.buckets))
+        hist.observe(seconds)
+        key = (method, route, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self) -> List[str]:
+        lines = _header("http_request_duration_seconds", "histogram", "Request latency by route.")
+        for (method, route), hist in sorted(self.latency.items()):
+            lines.extend(_histogram_lines(
+                "http_request_duration_seconds", {"method": method, "route": route}, hist
+            ))
+        lines.extend(_header("http_requests_total", "counter", "Requests by route and status."))
+        for (method, route, status), n in sorted(self.responses.items()):
+            lines.append(_sample(
+                "http_requests_total", {"method": method, "route": route, "status": str(status)}, n
+            ))
+        return lines
+
+
+def gauge(name: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render a gauge family from (labels, value) pairs."""
+    lines = _header(name, "gauge", help_text)
+    lines.extend(_sample(name, labels, value) for labels, value in samples)
+    return lines
+
+
+def counter(name: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render a counter family from (labels, value) pairs."""
+    lines = _header(name, "counter", help_text)
+    lines.extend(_sample(name, labels, value) for labels, value in samples)
+    return lines
+
+
+def render_prometheus(*sections: List[str]) -> str:
+    """Join rendered metric families into one text exposition (format 0.0.4)."""
+    return "\n".join(line for section in sections for line in section) + "\n"
+
+
+# ---------- text format helpers ---------- #
+
+def _header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def _histogram_lines(name: str, labels: Dict[str, str], hist: Histogram) -> List[str]:
+    lines = [_sample(f"{name}_bucket", {**labels, "le": le}, n) for le, n in hist.cumulative()]
+    lines.append(_sample(f"{name}_sum", labels, hist.sum))
+    lines.append(_sample(f"{name}_count", labels, hist.count))
+    return lines
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    text = repr(value) if isinstance(value, float) else str(value)
+    if not labels:
+        return f"{name} {text}"
+    body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return f"{name}{{{body}}} {text}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
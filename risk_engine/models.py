@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import json
+import re
+import unicodedata
 from enum import Enum
-from typing import Any, Dict, Optional
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 
 class RiskType(str, Enum):
@@ -20,6 +24,15 @@ class Severity(str, Enum):
     CRITICAL = "critical"
 
 
+# Severities from least to most severe, for comparisons.
+SEVERITY_RANK: Dict[Severity, int] = {
+    Severity.LOW: 0,
+    Severity.MEDIUM: 1,
+    Severity.HIGH: 2,
+    Severity.CRITICAL: 3,
+}
+
+
 class RiskFinding(BaseModel):
     """Single risk finding produced by a rule."""
     risk_type: RiskType
@@ -30,6 +43,145 @@ class RiskFinding(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
+class Finding:
+    """
+    Lightweight finding used on the rule hot path.
+
+    Same fields and dump format as RiskFinding but a plain slotted object:
+    building one runs no validation. Rules may return either type; convert
+    with to_model() where a pydantic model is needed, or dump straight to
+    dicts/JSON at the API and log boundary.
+    """
+
+    __slots__ = ("risk_type", "severity", "rule_id", "rule_name", "message", "metadata")
+
+    def __init__(
+        self,
+        risk_type: RiskType,
+        severity: Severity,
+        rule_id: str,
+        rule_name: str,
+        message: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.risk_type = RiskType(risk_type)
+        self.severity = Severity(severity)
+        self.rule_id = rule_id
+        self.rule_name = rule_name
+        self.message = message
+        self.metadata = metadata if metadata is not None else {}
+
+    @classmethod
+    def from_model(cls, finding: RiskFinding) -> Finding:
+        return cls(
+            finding.risk_type, finding.severity, finding.rule_id,
+            finding.rule_name, finding.message, dict(finding.metadata),
+        )
+
+    def to_model(self) -> RiskFinding:
+        return RiskFinding(
+            risk_type=self.risk_type,
+            severity=self.severity,
+            rule_id=self.rule_id,
+            rule_name=self.rule_name,
+            message=self.message,
+            metadata=self.metadata,
+        )
+
+    def model_dump(self, mode: str = "python") -> Dict[str, Any]:
+        """Same dict as RiskFinding.model_dump(mode=mode)."""
+        json_mode = mode == "json"
+        return {
+            "risk_type": self.risk_type.value if json_mode else self.risk_type,
+            "severity": self.severity.value if json_mode else self.severity,
+            "rule_id": self.rule_id,
+            "rule_name": self.rule_name,
+            "message": self.message,
+            "metadata": dict(self.metadata),
+        }
+
+    def model_dump_json(self) -> str:
+        return json.dumps(self.model_dump(mode="json"), separators=(",", ":"), default=str)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Finding, RiskFinding)):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # mutable, like RiskFinding
+
+    def __repr__(self) -> str:
+        return (
+            f"Finding(rule_id={self.rule_id!r}, severity={self.severity.value!r}, "
+            f"message={self.message!r})"
+        )
+
+
+def dump_findings(findings: Iterable[Any], mode: str = "python") -> List[Dict[str, Any]]:
+    """model_dump() every finding, whether a Finding or a RiskFinding."""
+    return [f.model_dump(mode=mode) for f in findings]
+
+
+# Invisible characters commonly used to split words past keyword filters.
+_ZERO_WIDTH = dict.fromkeys(
+    map(ord, "\u00ad\u180e\u200b\u200c\u200d\u2060\u2061\u2062\u2063\u2064\ufeff"),
+    None,
+)
+_TOKEN_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"[^\s.!?][^.!?\n]*[.!?]*")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize, strip zero-width characters and lowercase."""
+    return unicodedata.normalize("NFKC", text).translate(_ZERO_WIDTH).lower()
+
+
+class TextView:
+    """
+    Derived views of one text field. Each view is computed on first access
+    and cached, so rules sharing a view pay for it once per evaluation.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def normalized(self) -> str:
+        """Lowercased NFKC text without zero-width characters."""
+        return normalize_text(self.text)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Word tokens of the normalized view."""
+        return _TOKEN_RE.findall(self.normalized)
+
+    @cached_property
+    def sentence_offsets(self) -> List[Tuple[int, int]]:
+        """(start, end) offsets of sentences in the original text."""
+        return [m.span() for m in _SENTENCE_RE.finditer(self.text)]
+
+
+class PreparedContext:
+    """
+    Lazily prepared text views for one EvaluationContext, shared by all rules.
+    Obtain it through EvaluationContext.prepared().
+    """
+
+    def __init__(self, ctx: EvaluationContext) -> None:
+        self.prompt = TextView(ctx.prompt)
+        self.response = TextView(ctx.response)
+
+    def view(self, field: str) -> TextView:
+        return getattr(self, field)
+
+    def is_current(self, ctx: EvaluationContext) -> bool:
+        return self.prompt.text is ctx.prompt and self.response.text is ctx.response
+
+
 class EvaluationContext(BaseModel):
     """
     Input to the engine for one LLM call.
@@ -42,3 +194,12 @@ class EvaluationContext(BaseModel):
     user_id: Optional[str] = None
     source: Optional[str] = None  # e.g., "chat", "api", "batch"
     extra: Dict[str, Any] = {}
+
+    _prepared: Optional[PreparedContext] = PrivateAttr(default=None)
+
+    def prepared(self) -> PreparedContext:
+        """Cached text views; rebuilt if prompt or response was reassigned."""
+        prepared = self._prepared
+        if prepared is None or not prepared.is_current(self):
+            prepared = self._prepared = PreparedContext(self)
+        return prepared
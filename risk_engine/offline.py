@@ -0,0 +1,300 @@
+"""
+Offline, multi-core evaluation of JSONL corpora.
+
+Each input line is an EvaluationContext record; each output line is the same
+record with a "line" number and the "findings" produced by the engine:
+
+    python -m risk_engine.offline interactions.jsonl -o scored.jsonl --workers 8
+
+Input is streamed in chunks to a process pool and at most a few chunks per
+worker are in flight (or waiting to be written in order), so memory stays
+bounded regardless of the corpus size.
+
+Stateful rules (e.g. adaptive latency baselines) depend on the order of the
+traffic they see, so the workers never run them. Instead the main process
+runs them in one pass over the results in input order, and each record's
+findings keep policy order. Results are the same for any number of workers
+or chunk size. With --unordered there is no input order to follow, and
+stateful rules are skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from .engine import RiskEngine
+from .models import EvaluationContext, dump_findings
+from .rules_base import Rule
+from .snapshot import load_ruleset
+
+Chunk = List[Tuple[int, str]]
+
+# Per-process engine, built once by the pool initializer.
+_worker_engine: Optional[RiskEngine] = None
+# Whether the main process runs the stateful rules; see score_chunk.
+_worker_stateful_pass = False
+
+
+@dataclass
+class PoolStats:
+    """Throughput and per-worker busy time of one pool run."""
+    records: int = 0
+    chunks: int = 0
+    wall_s: float = 0.0
+    busy_s: Dict[int, float] = field(default_factory=dict)
+    chunks_by_worker: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def records_per_s(self) -> float:
+        return self.records / self.wall_s if self.wall_s else 0.0
+
+    def report(self, out: IO[str]) -> None:
+        out.write(
+            f"Processed {self.records} records in {self.wall_s:.2f} s "
+            f"({self.records_per_s:.0f} records/s, {self.chunks} chunks)\n"
+        )
+        for pid in sorted(self.busy_s):
+            busy = self.busy_s[pid]
+            share = busy / self.wall_s * 100 if self.wall_s else 0.0
+            out.write(
+                f"  worker {pid}: {share:5.1f}% busy "
+                f"({busy:.2f} s, {self.chunks_by_worker[pid]} chunks)\n"
+            )
+
+
+def init_worker(policy_path: str, stateful_pass: bool = False) -> None:
+    """
+    Pool initializer: load the policy once per worker process. With
+    stateful_pass the main process runs the stateful rules (StatefulPass).
+    """
+    global _worker_engine, _worker_stateful_pass
+    _worker_engine = build_engine(policy_path)
+    _worker_stateful_pass = stateful_pass
+
+
+def build_engine(policy_path: str) -> RiskEngine:
+    # Offline runs must neither read nor overwrite the service's rule state.
+    return RiskEngine.from_ruleset(load_ruleset(policy_path, persist_state=False))
+
+
+def worker_engine() -> RiskEngine:
+    if _worker_engine is None:
+        raise RuntimeError("Worker engine not initialised; use init_worker as pool initializer")
+    return _worker_engine
+
+
+def stateful_reads(rules: Iterable[Rule]) -> Optional[Tuple[str, ...]]:
+    """Context fields the stateful `rules` read; None if any reads everything."""
+    fields: List[str] = []
+    for rule in rules:
+        if not rule.stateful:
+            continue
+        if rule.reads is None:
+            return None
+        fields.extend(f for f in rule.reads if f not in fields)
+    return tuple(fields)
+
+
+class StatefulPass:
+    """
+    Runs the stateful rules of a policy in the main process, over worker
+    results in input order, and merges their findings into each record.
+    """
+
+    def __init__(self, policy_path: str) -> None:
+        self.engine = build_engine(policy_path)
+        self.ruleset = self.engine.ruleset
+        self.rules = [rule for rule in self.ruleset.rules if rule.stateful]
+
+    def apply(self, result: Tuple[Dict[str, Any], Any, Any]) -> str:
+        """Output line of one score_chunk result from a stateful_pass worker."""
+        record, groups, inputs = result
+        if groups is None:
+            return json.dumps(record)
+        if not isinstance(inputs, EvaluationContext):
+            # The stateful rules read these fields only.
+            inputs = EvaluationContext.model_construct(prompt="", response="", **inputs)
+        stateful = iter(self.engine._run_rules(inputs, self.rules, self.ruleset))
+        stateless = iter(groups)
+        findings: List[Dict[str, Any]] = []
+        for rule in self.ruleset.rules:
+            if rule.stateful:
+                findings.extend(dump_findings(next(stateful), mode="json"))
+            else:
+                findings.extend(next(stateless))
+        record["findings"] = findings
+        return json.dumps(record)
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int, first_line: int = 1) -> Iterator[Chunk]:
+    """
+    Group non-blank lines into chunks of (line number, line); `first_line`
+    is the number of the first line, e.g. when resuming part-way through.
+    """
+    chunk: Chunk = []
+    for line_no, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _timed(fn: Callable[[Chunk], Any], chunk: Chunk) -> Tuple[int, float, Any]:
+    started = time.perf_counter()
+    result = fn(chunk)
+    return os.getpid(), time.perf_counter() - started, result
+
+
+def map_chunks(
+    fn: Callable[[Chunk], Any],
+    chunks: Iterable[Chunk],
+    stats: PoolStats,
+    workers: int,
+    initializer: Callable[..., None],
+    initargs: Tuple[Any, ...] = (),
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Apply `fn` to chunks in a process pool, yielding (chunk_seq, result).
+
+    At most `max_pending` chunks (default 2 per worker) are submitted or held
+    for reordering at any time. With ordered=True results are yielded in
+    input order, otherwise as soon as each chunk completes.
+    """
+    max_pending = max_pending or workers * 2
+    pending: Dict[Future, Tuple[int, int]] = {}
+    finished: Dict[int, Any] = {}
+    next_seq = 0
+    started = time.perf_counter()
+
+    def collect(block: bool) -> Iterator[Tuple[int, Any]]:
+        nonlocal next_seq
+        done, _ = wait(pending, return_when=FIRST_COMPLETED, timeout=None if block else 0)
+        for fut in done:
+            seq, size = pending.pop(fut)
+            pid, busy, result = fut.result()
+            stats.records += size
+            stats.chunks += 1
+            stats.busy_s[pid] = stats.busy_s.get(pid, 0.0) + busy
+            stats.chunks_by_worker[pid] = stats.chunks_by_worker.get(pid, 0) + 1
+            if ordered:
+                finished[seq] = result
+            else:
+                yield seq, result
+        while next_seq in finished:
+            yield next_seq, finished.pop(next_seq)
+            next_seq += 1
+
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+        for seq, chunk in enumerate(chunks):
+            while len(pending) + len(finished) >= max_pending:
+                yield from collect(block=True)
+            pending[pool.submit(_timed, fn, chunk)] = (seq, len(chunk))
+        while pending:
+            yield from collect(block=True)
+        yield from collect(block=False)
+
+    stats.wall_s = time.perf_counter() - started
+
+
+def score_chunk(chunk: Chunk) -> List[Any]:
+    """
+    Worker task: evaluate a chunk of JSONL lines with every rule that is not
+    stateful and return output lines. For a stateful pass, each result is
+    instead (record, findings per rule, context fields for StatefulPass).
+    """
+    engine = worker_engine()
+    ruleset = engine.ruleset
+    rules = [rule for rule in ruleset.rules if not rule.stateful]
+    reads = stateful_reads(ruleset.rules)
+    out: List[Any] = []
+    for line_no, line in chunk:
+        groups: Optional[List[List[Dict[str, Any]]]] = None
+        inputs: Any = None
+        try:
+            record = json.loads(line)
+            ctx = EvaluationContext.model_validate(record)
+            groups = [
+                dump_findings(findings, mode="json")
+                for findings in engine._run_rules(ctx, rules, ruleset)
+            ]
+            record["line"] = line_no
+            if _worker_stateful_pass:
+                # StatefulPass fills in the findings, in policy order.
+                record["findings"] = []
+                inputs = ctx if reads is None else {f: getattr(ctx, f) for f in reads}
+            else:
+                record["findings"] = [f for findings in groups for f in findings]
+        except Exception as e:
+            record = {"line": line_no, "error": str(e)}
+            groups = None
+        out.append((record, groups, inputs) if _worker_stateful_pass else json.dumps(record))
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.offline",
+        description="Evaluate a JSONL file of EvaluationContext records on all cores.",
+    )
+    parser.add_argument("input", help="Input JSONL path, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL path (default: stdout)")
+    parser.add_argument("--policy", default="config/policies.yaml", help="Policy file for the workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Records per task")
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Write results as chunks complete instead of in input order",
+    )
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats = PoolStats()
+    stateful: Optional[StatefulPass] = StatefulPass(args.policy)
+    if not stateful.rules:
+        stateful = None
+    elif args.unordered:
+        skipped = ", ".join(rule.id for rule in stateful.rules)
+        sys.stderr.write(f"--unordered: skipping stateful rules {skipped}\n")
+        stateful = None
+
+    try:
+        results = map_chunks(
+            score_chunk,
+            iter_chunks(src, args.chunk_size),
+            stats,
+            workers=args.workers,
+            initializer=init_worker,
+            initargs=(args.policy, stateful is not None),
+            ordered=not args.unordered,
+        )
+        for _, lines in results:
+            if stateful is not None:
+                lines = [stateful.apply(result) for result in lines]
+            dst.write("\n".join(lines))
+            dst.write("\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    stats.report(sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
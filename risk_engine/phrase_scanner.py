@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .models import EvaluationContext, normalize_text
+from .rules_base import PhraseRule, Rule
+
+# Marks a trie node at which a phrase ends.
+_END = ""
+
+# Below this many distinct phrases, one C-level substring search per phrase
+# beats the regex automaton; above it the automaton's cost stays flat.
+SUBSTRING_SCAN_LIMIT = 48
+
+
+class PhraseAutomaton:
+    """
+    Multi-pattern matcher for a fixed set of phrases.
+
+    All phrases are merged into one character trie, which is compiled into a
+    single prefix-factored regex so the scan runs inside the C regex engine
+    instead of a per-character Python loop. At every position the regex yields
+    the longest phrase starting there; shorter phrases that are prefixes of it
+    are recovered from a closure table built at compile time. Scanning cost
+    therefore depends on the text length and the phrase depth, not on how many
+    phrases are loaded. Small sets are scanned with plain substring search,
+    which is faster until the phrase count reaches SUBSTRING_SCAN_LIMIT.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Hashable]] = ()) -> None:
+        self._payloads: Dict[str, List[Hashable]] = {}
+        for phrase, payload in entries:
+            self._payloads.setdefault(phrase, []).append(payload)
+        self._regex: Optional[re.Pattern] = None
+        self._closure: Dict[str, Tuple[Hashable, ...]] = {}
+        self._always: Tuple[Hashable, ...] = ()
+        self._substring_table: Optional[List[Tuple[str, Tuple[Hashable, ...]]]] = None
+        self.max_phrase_len = 0
+        self.compile()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def compile(self) -> None:
+        trie: Dict[str, Any] = {}
+        for phrase in self._payloads:
+            if not phrase:
+                continue
+            node = trie
+            for ch in phrase:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+        # Empty phrases occur in every text, mirroring `"" in text`.
+        self._always = tuple(self._payloads.get("", ()))
+
+        self._closure = {}
+        for phrase in self._payloads:
+            if not phrase:
+                continue
+            payloads: List[Hashable] = []
+            for end in range(1, len(phrase) + 1):
+                prefix = phrase[:end]
+                if prefix in self._payloads:
+                    payloads.extend(self._payloads[prefix])
+            self._closure[phrase] = tuple(payloads)
+
+        self._regex = re.compile(_trie_to_regex(trie)) if trie else None
+        self.max_phrase_len = max(map(len, self._payloads), default=0)
+
+        if len(self._closure) <= SUBSTRING_SCAN_LIMIT:
+            self._substring_table = [
+                (phrase, tuple(self._payloads[phrase])) for phrase in self._closure
+            ]
+        else:
+            self._substring_table = None
+
+    def iter_matches(self, text: str, pos: int = 0):
+        """Yield (start, longest_phrase) for every position where a phrase starts."""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        m = search(text, pos)
+        while m is not None:
+            start = m.start()
+            yield start, m.group()
+            m = search(text, start + 1)
+
+    def payloads_for(self, longest: str) -> Tuple[Hashable, ...]:
+        """Payloads of `longest` and of every phrase that is a prefix of it."""
+        return self._closure[longest]
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Return the payloads of every phrase that occurs in `text`."""
+        found: Set[Hashable] = set(self._always)
+        if self._substring_table is not None:
+            for phrase, payloads in self._substring_table:
+                if phrase in text:
+                    found.update(payloads)
+            return found
+
+        closure = self._closure
+        for _, longest in self.iter_matches(text):
+            found.update(closure[longest])
+        return found
+
+
+def _trie_to_regex(node: Dict[str, Any]) -> str:
+    terminal = _END in node
+    branches = [
+        re.escape(ch) + _trie_to_regex(child)
+        for ch, child in sorted(node.items())
+        if ch != _END
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    # Greedy optional group: prefer the longer phrase, fall back to this one.
+    return "(?:" + "|".join(branches) + ")" + ("?" if terminal else "")
+
+
+class PhraseScanner:
+    """
+    Fused scanner over the phrase lists of every PhraseRule in a rule set.
+
+    One PhraseAutomaton is compiled per (text field, text view) pair, so an
+    evaluation prepares and scans each field once no matter how many phrase
+    rules are enabled. Matches are credited back to the owning rule as phrase
+    indices. Rules with lexicons also get the lexicon terms found in the
+    field's word tokens, as strings.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        self.rules: List[PhraseRule] = [r for r in rules if isinstance(r, PhraseRule)]
+        self._slots: Dict[int, int] = {id(rule): slot for slot, rule in enumerate(self.rules)}
+
+        entries: Dict[Tuple[str, str], List[Tuple[str, Tuple[int, int]]]] = {}
+        for slot, rule in enumerate(self.rules):
+            view = rule.text_view
+            prepare = normalize_text if view == "normalized" else str.lower
+            phrases = [prepare(p) for p in rule.get_phrases()]
+            for field in rule.fields:
+                bucket = entries.setdefault((field, view), [])
+                for idx, phrase in enumerate(phrases):
+                    bucket.append((phrase, (slot, idx)))
+
+        self.automata: Dict[Tuple[str, str], PhraseAutomaton] = {
+            key: PhraseAutomaton(key_entries) for key, key_entries in entries.items()
+        }
+        self.lexicon_rules: List[PhraseRule] = [r for r in self.rules if r.lexicons]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_slots"]  # keyed by id(), rebuilt on load
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._slots = {id(rule): slot for slot, rule in enumerate(self.rules)}
+
+    def covers(self, rule: Rule) -> bool:
+        return id(rule) in self._slots
+
+    def scan(self, ctx: EvaluationContext) -> Dict[PhraseRule, Dict[str, Set[int]]]:
+        """
+        Scan each text field once. Returns, per rule with at least one hit,
+        a map of field -> indices into rule.get_phrases() that occurred.
+        """
+        matches: Dict[PhraseRule, Dict[str, Set[int]]] = {}
+        rules = self.rules
+        prepared = ctx.prepared()
+
+        for (field, view), automaton in self.automata.items():
+            text = getattr(prepared.view(field), view)
+            for slot, idx in automaton.scan(text):
+                per_rule = matches.setdefault(rules[slot], {})
+                per_rule.setdefault(field, set()).add(idx)
+
+        if self.lexicon_rules:
+            for rule, per_field in self.scan_lexicons(ctx).items():
+                per_rule = matches.setdefault(rule, {})
+                for field, terms in per_field.items():
+                    per_rule.setdefault(field, set()).update(terms)
+        return matches
+
+    def scan_lexicons(
+        self, ctx: EvaluationContext, fields: Optional[Iterable[str]] = None
+    ) -> Dict[PhraseRule, Dict[str, Set[str]]]:
+        """Lexicon terms per rule and field; limited to `fields` if given."""
+        matches: Dict[PhraseRule, Dict[str, Set[str]]] = {}
+        only = set(fields) if fields is not None else None
+        prepared = ctx.prepared()
+        # Rules sharing a lexicon scan each field with it once.
+        found: Dict[Tuple[int, str], Set[str]] = {}
+        for rule in self.lexicon_rules:
+            for field in rule.fields:
+                if only is not None and field not in only:
+                    continue
+                for lexicon in rule.lexicons:
+                    key = (id(lexicon), field)
+                    terms = found.get(key)
+                    if terms is None:
+                        terms = found[key] = lexicon.find(prepared.view(field).tokens)
+                    if terms:
+                        matches.setdefault(rule, {}).setdefault(field, set()).update(terms)
+        return matches
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+EMAIL = "email address"
+SSN = "SSN-like pattern"
+PHONE = "phone number"
+# Label of the original regex rule, kept so findings compare with older logs.
+CARD = "long card-like number"
+
+# Report order, matching the original per-regex PIIRule.
+KINDS = (EMAIL, SSN, PHONE, CARD)
+
+_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+_DOMAIN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-")
+
+# Digits joined by at most two separator characters. Separators and digits
+# are disjoint, so the regex engine never has more than one way to extend a
+# match and each run is consumed in a single pass.
+_NUMERIC_RUN_RE = re.compile(r"[0-9](?:[ .()\-]{0,2}[0-9])*")
+_SSN_RE = re.compile(r"[0-9]{3}-[0-9]{2}-[0-9]{4}")
+# Contiguous, 4-4-4-4 style groups (optionally a short tail) or Amex 4-6-5.
+_CARD_RE = re.compile(
+    r"[0-9]{13,19}"
+    r"|[0-9]{4}([ \-])[0-9]{4}(?:\1[0-9]{4}){1,2}(?:\1[0-9]{1,3})?"
+    r"|[0-9]{4}([ \-])[0-9]{6}\2[0-9]{5}"
+)
+# North American grouping: optional leading 1, then 3-3-4 digits, with the
+# area code optionally in parentheses (the "(" precedes the run, see _match).
+_PHONE_RE = re.compile(
+    r"(?:1(?:[ .\-]?\(|[ .\-])?)?[0-9]{3}(?:\) ?|[ .\-])?[0-9]{3}[ .\-]?[0-9]{4}"
+)
+# ISO dates (and the timestamps starting with one) are never PII.
+_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_DIGITS = frozenset("0123456789")
+_DROP_SEPARATORS = str.maketrans("", "", " .()-\t\n\r\f\v")
+_PIECE_RE = re.compile(r"\S+")
+_MAX_GROUP = 5
+_MAX_NUMBER_CHARS = 64  # longer runs are always split
+# Digit counts _classify() can accept: local phone, SSN, phone, card.
+_DIGIT_COUNTS = frozenset([7] + list(range(9, 20)))
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class PIIMatch(NamedTuple):
+    kind: str
+    start: int
+    end: int
+
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+
+class PIIScanner:
+    """
+    Single-pass PII detector, linear in the length of the text.
+
+    Emails are found by anchoring on '@' and expanding over the allowed
+    local-part and domain characters; each character is visited a bounded
+    number of times because neither class contains '@'. Digits are read as
+    maximal numeric runs (digits joined by short separator sequences) and
+    each run is classified once: SSN shape, Luhn-valid card number, or phone
+    number (3-3-4 grouping, or a "+" country code). ISO dates are never
+    classified, so timestamps are not mistaken for phone numbers. A run that fits none of them, e.g. several numbers in a table
+    row, is split on whitespace and short groups of pieces are classified
+    instead, which keeps the work per character bounded.
+    """
+
+    def scan(self, text: str) -> List[PIIMatch]:
+        matches = self._emails(text)
+        for m in _NUMERIC_RUN_RE.finditer(text):
+            start, end = m.span()
+            left_ok = _boundary(text, start - 1)
+            right_ok = _boundary(text, end)
+            if left_ok and right_ok and end - start <= _MAX_NUMBER_CHARS:
+                kind = _classify(text, start, end)
+                if kind is not None:
+                    matches.append(_match(text, kind, start, end))
+                    continue
+            matches.extend(_split_run(text, start, end, left_ok, right_ok))
+        return matches
+
+    def scan_by_kind(self, text: str) -> Dict[str, List[PIIMatch]]:
+        by_kind: Dict[str, List[PIIMatch]] = {kind: [] for kind in KINDS}
+        for match in self.scan(text):
+            by_kind[match.kind].append(match)
+        return by_kind
+
+    def _emails(self, text: str) -> List[PIIMatch]:
+        matches: List[PIIMatch] = []
+        last_end = 0
+        at = text.find("@")
+        n = len(text)
+        while at != -1:
+            start = at
+            while start > last_end and text[start - 1] in _LOCAL_CHARS:
+                start -= 1
+            right = at + 1
+            while right < n and text[right] in _DOMAIN_CHARS:
+                right += 1
+            end = _domain_end(text, at + 1, right) if start < at else -1
+            if end != -1:
+                matches.append(PIIMatch(EMAIL, start, end))
+                last_end = end
+            at = text.find("@", max(at + 1, last_end))
+        return matches
+
+
+def _split_run(text: str, start: int, end: int, left_ok: bool, right_ok: bool) -> List[PIIMatch]:
+    """
+    Classify a run that fits no kind as a whole by its whitespace-separated
+    pieces, preferring the longest group of up to _MAX_GROUP consecutive
+    pieces (a spaced card number is four or five pieces). Pieces at the ends
+    of the run only count if the run itself is bounded on that side.
+    """
+    bounds: List[Tuple[int, int]] = []
+    prefix = [0]  # prefix[j] = digits in pieces[:j]
+    for m in _PIECE_RE.finditer(text, start, end):
+        bounds.append(m.span())
+        prefix.append(prefix[-1] + len(m.group(0).translate(_DROP_SEPARATORS)))
+    n = len(bounds)
+    if n < 2:
+        return []
+
+    matches: List[PIIMatch] = []
+    i = 0
+    while i < n:
+        k_max = min(_MAX_GROUP, n - i)
+        if i + k_max == n and not right_ok:
+            k_max -= 1
+        if i == 0 and not left_ok:
+            k_max = 0
+        if prefix[i + k_max] - prefix[i] < 7:
+            i += 1
+            continue
+        for k in range(k_max, 0, -1):
+            if prefix[i + k] - prefix[i] in _DIGIT_COUNTS:
+                lo, hi = _trim_to_digits(text, bounds[i][0], bounds[i + k - 1][1])
+                kind = _classify(text, lo, hi)
+                if kind is not None:
+                    matches.append(_match(text, kind, lo, hi))
+                    i += k
+                    break
+        else:
+            i += 1
+    return matches
+
+
+def _domain_end(text: str, begin: int, stop: int) -> int:
+    """
+    End of `name.tld` inside text[begin:stop]: the rightmost dot that has at
+    least one character before it and two or more letters after it.
+    """
+    dot = text.rfind(".", begin + 1, stop)
+    while dot != -1:
+        end = dot + 1
+        while end < stop and text[end].isascii() and text[end].isalpha():
+            end += 1
+        if end - dot > 2:
+            return end
+        dot = text.rfind(".", begin + 1, dot)
+    return -1
+
+
+def _boundary(text: str, i: int) -> bool:
+    """True if position i is outside the text or not a word character."""
+    if i < 0 or i >= len(text):
+        return True
+    ch = text[i]
+    return not (ch.isalnum() or ch == "_")
+
+
+def _trim_to_digits(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start] not in _DIGITS:
+        start += 1
+    while end > start and text[end - 1] not in _DIGITS:
+        end -= 1
+    return start, end
+
+
+def _match(text: str, kind: str, start: int, end: int) -> PIIMatch:
+    # Include the "+" of "+44 20 ..." and the "(" of "(555) 123-4567".
+    if kind == PHONE and start > 0:
+        if text[start - 1] == "+" or (text[start - 1] == "(" and ")" in text[start:end]):
+            start -= 1
+    return PIIMatch(kind, start, end)
+
+
+def _classify(text: str, start: int, end: int) -> Optional[str]:
+    if start >= end or _DATE_RE.match(text, start, end):
+        return None
+    if _SSN_RE.fullmatch(text, start, end):
+        return SSN
+    raw = text[start:end]
+    digits = "".join(ch for ch in raw if ch in _DIGITS)
+    count = len(digits)
+    if 13 <= count <= 19 and _CARD_RE.fullmatch(raw) and luhn_valid(digits):
+        return CARD
+    if (count == 10 or (count == 11 and digits[0] == "1")) and _PHONE_RE.fullmatch(raw):
+        return PHONE
+    if 11 <= count <= 13 and start > 0 and text[start - 1] == "+":
+        return PHONE
+    if count == 7 and len(raw) == 8 and raw[3] in "-. ":
+        return PHONE
+    return None
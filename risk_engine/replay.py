@@ -0,0 +1,375 @@
+"""
+Policy replay: how would a candidate policy have changed logged findings?
+
+Historical risk-log records (a segmented log store or a JSONL file) are
+re-evaluated with a candidate policy on all cores, and each record's new
+findings are compared with the findings it was logged with:
+
+    python -m risk_engine.replay --policy candidate.yaml --log logs/risks \\
+        --start 2026-09-01 --end 2026-10-01 --checkpoint replay.ckpt
+
+The report counts added, removed and unchanged findings per rule_id and
+per model. Findings are compared by (rule_id, severity, message). Raw log
+lines are chunked in the main process and parsed by the workers, and only
+per-chunk counters come back. Memory is therefore bounded by the chunks in
+flight, not by the number of records. With --checkpoint, progress and
+counters are saved every few seconds, and an interrupted replay resumes
+where the last checkpoint left off.
+
+Stateful rules (e.g. adaptive latency baselines) see each worker's share
+of the traffic only, and never persist their state during a replay.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from .engine import RiskEngine
+from .log_store import SegmentedLogStore
+from .models import EvaluationContext
+from .offline import Chunk, PoolStats, build_engine, iter_chunks, map_chunks
+from .snapshot import policy_hash
+
+CHECKPOINT_FORMAT = 1
+# Models beyond this many are counted together, to bound the report.
+MAX_MODELS = 1000
+OTHER_MODEL = "(other)"
+
+_CONTEXT_FIELDS = ("prompt", "response", "latency_ms", "model_name", "user_id", "source", "extra")
+
+# Per-process replay state, set by init_replay_worker.
+_worker_engine: Optional[RiskEngine] = None
+_worker_window: Tuple[Optional[str], Optional[str]] = (None, None)
+_worker_examples = 0
+
+
+class ReplayDiff:
+    """
+    Mergeable finding-diff counters of a replay, or of one chunk of it.
+
+    by_rule / by_model map a key to [added, removed, unchanged] findings.
+    """
+
+    def __init__(self) -> None:
+        self.records = 0
+        self.changed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.by_rule: Dict[str, List[int]] = {}
+        self.by_model: Dict[str, List[int]] = {}
+        self.examples: List[Dict[str, Any]] = []
+
+    def count(self, rule_id: str, model: str, column: int, n: int) -> None:
+        self.by_rule.setdefault(rule_id, [0, 0, 0])[column] += n
+        self.by_model.setdefault(model, [0, 0, 0])[column] += n
+
+    def merge(self, other: ReplayDiff, max_examples: int) -> None:
+        self.records += other.records
+        self.changed += other.changed
+        self.errors += other.errors
+        self.skipped += other.skipped
+        for rule_id, counts in other.by_rule.items():
+            _add(self.by_rule.setdefault(rule_id, [0, 0, 0]), counts)
+        for model, counts in other.by_model.items():
+            if model not in self.by_model and len(self.by_model) >= MAX_MODELS:
+                model = OTHER_MODEL
+            _add(self.by_model.setdefault(model, [0, 0, 0]), counts)
+        room = max_examples - len(self.examples)
+        if room > 0:
+            self.examples.extend(other.examples[:room])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "changed": self.changed,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "by_rule": self.by_rule,
+            "by_model": self.by_model,
+            "examples": self.examples,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> ReplayDiff:
+        diff = cls()
+        for name in ("records", "changed", "errors", "skipped", "by_rule", "by_model", "examples"):
+            setattr(diff, name, data[name])
+        return diff
+
+
+def _add(into: List[int], counts: List[int]) -> None:
+    for i, n in enumerate(counts):
+        into[i] += n
+
+
+def _finding_keys(findings: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str, str], int]:
+    keys: Dict[Tuple[str, str, str], int] = {}
+    for f in findings:
+        key = (f["rule_id"], f["severity"], f["message"])
+        keys[key] = keys.get(key, 0) + 1
+    return keys
+
+
+def diff_record(engine: RiskEngine, record: Dict[str, Any], diff: ReplayDiff) -> Optional[Dict[str, Any]]:
+    """
+    Re-evaluate one logged record into `diff`. Records written by deferred
+    workers (with a "tier") are compared against that tier only. Returns
+    the changed findings, or None if nothing changed.
+    """
+    ctx = EvaluationContext(**{k: record[k] for k in _CONTEXT_FIELDS if record.get(k) is not None})
+    new = engine.evaluate(ctx, tier=record.get("tier"))
+    old_keys = _finding_keys(record["findings"])
+    new_keys = _finding_keys(f.model_dump(mode="json") for f in new)
+    model = record.get("model_name") or "(none)"
+
+    added: List[List[str]] = []
+    removed: List[List[str]] = []
+    for key in old_keys.keys() | new_keys.keys():
+        before, after = old_keys.get(key, 0), new_keys.get(key, 0)
+        if after > before:
+            diff.count(key[0], model, 0, after - before)
+            added.append(list(key))
+        elif before > after:
+            diff.count(key[0], model, 1, before - after)
+            removed.append(list(key))
+        kept = min(before, after)
+        if kept:
+            diff.count(key[0], model, 2, kept)
+    diff.records += 1
+    if not added and not removed:
+        return None
+    diff.changed += 1
+    return {"added": sorted(added), "removed": sorted(removed)}
+
+
+def init_replay_worker(
+    policy_path: str, start: Optional[str], end: Optional[str], max_examples: int
+) -> None:
+    """Pool initializer: candidate engine plus the replay's time window."""
+    global _worker_engine, _worker_window, _worker_examples
+    # build_engine() detaches stateful rules: a replay must not overwrite
+    # production state (e.g. latency baselines).
+    engine = build_engine(policy_path)
+    _worker_engine = engine
+    _worker_window = (start, end)
+    _worker_examples = max_examples
+
+
+def diff_chunk(chunk: Chunk) -> Tuple[Dict[str, Any], int, str]:
+    """Worker task: diff a chunk of raw log lines; returns (diff, last line number, its digest)."""
+    engine = _worker_engine
+    if engine is None:
+        raise RuntimeError("Replay worker not initialised; use init_replay_worker as pool initializer")
+    start, end = _worker_window
+    diff = ReplayDiff()
+    for line_no, line in chunk:
+        try:
+            record = json.loads(line)
+            ts = record.get("timestamp")
+            if ts is not None and (
+                (start is not None and ts < start) or (end is not None and ts > end)
+            ):
+                continue
+            if "findings" not in record:
+                diff.skipped += 1
+                continue
+            changed = diff_record(engine, record, diff)
+        except Exception as e:
+            diff.errors += 1
+            if len(diff.examples) < _worker_examples:
+                diff.examples.append({"line": line_no, "error": f"{type(e).__name__}: {e}"})
+            continue
+        if changed is not None and len(diff.examples) < _worker_examples:
+            changed.update(
+                line=line_no,
+                timestamp=record.get("timestamp"),
+                model_name=record.get("model_name"),
+                interaction_id=record.get("interaction_id"),
+            )
+            diff.examples.append(changed)
+    last_no, last_line = chunk[-1]
+    return diff.to_dict(), last_no, _line_digest(last_line)
+
+
+def _line_digest(line: Any) -> str:
+    data = line.encode("utf-8") if isinstance(line, str) else bytes(line)
+    return hashlib.blake2b(data.rstrip(b"\r\n"), digest_size=8).hexdigest()
+
+
+def iter_log_lines(path: str, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Raw lines of a segmented store directory or a JSONL file, undecoded.
+    Segments outside [start, end] are skipped; per-record filtering by
+    timestamp is left to the workers.
+    """
+    if os.path.isdir(path):
+        yield from SegmentedLogStore(path).iter_lines(start, end)
+        return
+    with open(path, "rb") as f:
+        yield from f
+
+
+# ---------- checkpoints ---------- #
+
+def _replay_identity(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "format": CHECKPOINT_FORMAT,
+        "policy_hash": policy_hash(args.policy),
+        "log": os.path.abspath(args.log),
+        "start": args.start,
+        "end": args.end,
+    }
+
+
+def load_checkpoint(path: str, identity: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    for key, value in identity.items():
+        if checkpoint.get(key) != value:
+            raise ValueError(
+                f"Checkpoint {path} belongs to a different replay ({key} differs); "
+                "remove it or pass --restart"
+            )
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _skip_lines(lines: Iterator[bytes], n: int, digest: Optional[str]) -> None:
+    """Consume the n lines a checkpoint covers, checking the last one is unchanged."""
+    last = None
+    for last in itertools.islice(lines, n):
+        pass
+    if n and (last is None or _line_digest(last) != digest):
+        raise ValueError("The log changed since the checkpoint was written; pass --restart")
+
+
+# ---------- report ---------- #
+
+def write_report(report: Dict[str, Any], out: IO[str], top: int = 20) -> None:
+    diff = report["diff"]
+    records = diff["records"]
+    out.write(
+        f"Replayed {records} records against {report['policy']} "
+        f"({diff['errors']} errors, {diff['skipped']} without findings)\n"
+    )
+    share = diff["changed"] / records * 100 if records else 0.0
+    out.write(f"Records with changed findings: {diff['changed']} ({share:.2f}%)\n")
+    out.write(
+        f"Throughput: {report['records_per_s']:.0f} records/s over {report['wall_s']:.1f} s "
+        f"on {report['workers']} workers\n"
+    )
+    for title, table in (("rule_id", diff["by_rule"]), ("model", diff["by_model"])):
+        rows = sorted(table.items(), key=lambda item: (-(item[1][0] + item[1][1]), item[0]))
+        out.write(f"\n{'By ' + title:<40} {'added':>10} {'removed':>10} {'unchanged':>10}\n")
+        for key, (added, removed, unchanged) in rows[:top]:
+            out.write(f"  {key[:38]:<38} {added:>10} {removed:>10} {unchanged:>10}\n")
+        if len(rows) > top:
+            out.write(f"  ... {len(rows) - top} more\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.replay",
+        description="Replay logged interactions through a candidate policy and diff the findings.",
+    )
+    parser.add_argument("--policy", required=True, help="Candidate policy file")
+    parser.add_argument("--log", default="logs/risks", help="Segmented log store directory or JSONL file")
+    parser.add_argument("--start", help="Only records at or after this ISO timestamp")
+    parser.add_argument("--end", help="Only records at or before this ISO timestamp")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Records per task")
+    parser.add_argument("--checkpoint", help="Save progress here and resume from it")
+    parser.add_argument("--checkpoint-every", type=float, default=10.0, help="Seconds between checkpoints")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--examples", type=int, default=20, help="Changed records to keep as examples")
+    parser.add_argument("--json", dest="json_path", help="Also write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    identity = _replay_identity(args)
+    diff = ReplayDiff()
+    lines_done, digest, previous_s = 0, None, 0.0
+    if args.checkpoint and not args.restart:
+        try:
+            checkpoint = load_checkpoint(args.checkpoint, identity)
+        except ValueError as e:
+            parser.error(str(e))
+        if checkpoint is not None:
+            diff = ReplayDiff.from_dict(checkpoint["diff"])
+            lines_done, digest = checkpoint["line"], checkpoint["line_digest"]
+            previous_s = checkpoint["wall_s"]
+            print(f"Resuming after line {lines_done} ({diff.records} records done)", file=sys.stderr)
+
+    lines = iter(iter_log_lines(args.log, args.start, args.end))
+    try:
+        _skip_lines(lines, lines_done, digest)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = PoolStats()
+    results = map_chunks(
+        diff_chunk,
+        iter_chunks(lines, args.chunk_size, first_line=lines_done + 1),
+        stats,
+        workers=args.workers,
+        initializer=init_replay_worker,
+        initargs=(args.policy, args.start, args.end, args.examples),
+    )
+
+    def checkpoint_state() -> Dict[str, Any]:
+        return {
+            **identity,
+            "line": lines_done,
+            "line_digest": digest,
+            "wall_s": previous_s + stats.wall_s,
+            "diff": diff.to_dict(),
+        }
+
+    started = time.perf_counter()
+    saved_at = started
+    for _, (chunk_diff, lines_done, digest) in results:
+        diff.merge(ReplayDiff.from_dict(chunk_diff), args.examples)
+        if args.checkpoint and time.perf_counter() - saved_at >= args.checkpoint_every:
+            stats.wall_s = time.perf_counter() - started
+            save_checkpoint(args.checkpoint, checkpoint_state())
+            saved_at = time.perf_counter()
+    if args.checkpoint:
+        save_checkpoint(args.checkpoint, checkpoint_state())
+
+    report = {
+        "policy": args.policy,
+        "policy_hash": identity["policy_hash"],
+        "log": args.log,
+        "start": args.start,
+        "end": args.end,
+        "workers": args.workers,
+        # This run only; a resumed replay also spent previous_s before.
+        "wall_s": stats.wall_s,
+        "records_per_s": stats.records_per_s,
+        "total_wall_s": previous_s + stats.wall_s,
+        "diff": diff.to_dict(),
+    }
+    write_report(report, sys.stdout)
+    stats.report(sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .applicability import precondition_fields
+from .models import EvaluationContext, Finding
+from .rules_base import Rule
+
+# Fields that are effectively unique per call. Caching rules that read them
+# would only churn the cache, so those rules always run.
+VOLATILE_FIELDS = frozenset({"latency_ms"})
+# Cache plans kept per ResultCache, one per distinct rule list.
+_MAX_PLANS = 8
+
+
+class CacheGroup:
+    """Cacheable rules that read the same context fields, cached as one entry."""
+
+    def __init__(self, fields: Tuple[str, ...]) -> None:
+        self.fields = fields
+        self.indices: List[int] = []
+        # Identity of the member rules: plans over different rule lists (e.g.
+        # the inline and deferred tiers) may group the same fields.
+        self.members: Tuple[int, ...] = ()
+
+
+class CachePlan:
+    """
+    How a rule set is split for caching: groups of cacheable rules keyed by
+    the fields they read, and the rules that must run on every call
+    (stateful, volatile, or not declaring what they read).
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        groups: Dict[Tuple[str, ...], CacheGroup] = {}
+        self.uncached: List[int] = []
+        for idx, rule in enumerate(rules):
+            reads = rule.reads
+            if rule.stateful or reads is None or VOLATILE_FIELDS.intersection(reads):
+                self.uncached.append(idx)
+                continue
+            fields = tuple(sorted(set(reads).union(precondition_fields(rule) or ())))
+            groups.setdefault(fields, CacheGroup(fields)).indices.append(idx)
+        self.groups = list(groups.values())
+        for group in self.groups:
+            group.members = tuple(id(rules[i]) for i in group.indices)
+
+
+class CacheLookup:
+    """Result of probing the cache for one evaluation; see ResultCache.lookup()."""
+
+    def __init__(
+        self,
+        cache: "ResultCache",
+        rules: Sequence[Rule],
+        per_rule: List[Optional[List[Finding]]],
+        to_run: List[int],
+        missing: List[Tuple[Hashable, CacheGroup]],
+    ) -> None:
+        self.cache = cache
+        self.per_rule = per_rule
+        self.to_run = to_run
+        self.rules_to_run = [rules[i] for i in to_run]
+        self.missing = missing
+
+    def complete(self, results: Sequence[List[Finding]]) -> List[Finding]:
+        """Merge findings of rules_to_run, store missed groups, flatten in rule order."""
+        per_rule = self.per_rule
+        for idx, findings in zip(self.to_run, results):
+            per_rule[idx] = findings
+        for key, group in self.missing:
+            entry = tuple(per_rule[i] for i in group.indices)
+            if not any(f.rule_id == "ENGINE-ERROR" for findings in entry for f in findings):
+                self.cache.put(key, entry)
+
+        flat: List[Finding] = []
+        for findings in per_rule:
+            if findings:
+                flat.extend(findings)
+        return flat
+
+
+class ResultCache:
+    """
+    Bounded LRU memo of rule findings, keyed by content.
+
+    A key is the rule set's namespace (its policy version) plus digests of
+    exactly the context fields a group of rules reads, so identical prompt/response pairs hit regardless
+    of user, source or latency. Hits return the stored finding objects
+    without running or rebuilding anything; treat them as read-only.
+    Eviction keeps both the entry count and an estimate of the retained
+    finding bytes under their limits.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._plans: Dict[int, Tuple[Sequence[Rule], CachePlan]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Tuple[List[Finding], ...]) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def plan(self, rules: Sequence[Rule]) -> CachePlan:
+        cached = self._plans.get(id(rules))
+        if cached is not None and cached[0] is rules:
+            return cached[1]
+        plan = CachePlan(rules)
+        # Copy-on-write; a few rule lists (the full set and each tier of the
+        # current rule set) are in use at a time, older ones are dropped.
+        plans = dict(self._plans) if len(self._plans) < _MAX_PLANS else {}
+        plans[id(rules)] = (rules, plan)
+        self._plans = plans
+        return plan
+
+    def lookup(
+        self, ctx: EvaluationContext, rules: Sequence[Rule], namespace: Hashable
+    ) -> CacheLookup:
+        """Fill in cached findings; the rest are left in `rules_to_run`."""
+        plan = self.plan(rules)
+        per_rule: List[Optional[List[Finding]]] = [None] * len(rules)
+        to_run: List[int] = []
+        missing: List[Tuple[Hashable, CacheGroup]] = []
+        digests: Dict[str, bytes] = {}
+
+        for group in plan.groups:
+            key = (namespace, group.members, tuple(
+                digests.get(f) or digests.setdefault(f, _digest(getattr(ctx, f)))
+                for f in group.fields
+            ))
+            entry = self.get(key)
+            if entry is None:
+                missing.append((key, group))
+                to_run.extend(group.indices)
+            else:
+                for idx, findings in zip(group.indices, entry):
+                    per_rule[idx] = findings
+
+        to_run.extend(plan.uncached)
+        to_run.sort()
+        return CacheLookup(self, rules, per_rule, to_run, missing)
+
+
+def _digest(value: Any) -> bytes:
+    data = value.encode("utf-8", "surrogatepass") if isinstance(value, str) else repr(value).encode()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _estimate_size(value: Tuple[List[Finding], ...]) -> int:
+    size = 64
+    for findings in value:
+        for f in findings:
+            size += 200 + len(f.message)
+            for v in f.metadata.values():
+                size += len(v) if isinstance(v, str) else 16
+    return size
@@ -1,9 +1,10 @@
+import hashlib
 import importlib
-import yaml
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from .rules_base import Rule
+from .phrase_scanner import PhraseScanner
+from .rules_base import TIERS, Rule
 
 
 class RuleRegistry:
@@ -15,15 +16,29 @@ class RuleRegistry:
         self.config_path = Path(config_path)
         self.rules: List[Rule] = []
         self.policy_meta: Dict[str, Any] = {}
+        self.phrase_scanner: Optional[PhraseScanner] = None
+        self.policy_hash: Optional[str] = None
+
+    @property
+    def policy_version(self) -> Optional[str]:
+        """Declared policy.version plus a content hash, e.g. '1.0+3f2a9c1d04be'."""
+        if self.policy_hash is None:
+            return None
+        declared = self.policy_meta.get("version", "0")
+        return f"{declared}+{self.policy_hash[:12]}"
 
     def load(self) -> List[Rule]:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Policy config not found: {self.config_path}")
 
-        with open(self.config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f) or {}
+        import yaml  # not needed when the engine starts from a snapshot
+
+        raw = self.config_path.read_bytes()
+        config = yaml.safe_load(raw) or {}
 
+        self.policy_hash = hashlib.sha256(raw).hexdigest()
         self.policy_meta = config.get("policy", {})
+        self.rules = []
 
         for rule_conf in config.get("rules", []):
             if not rule_conf.get("enabled", True):
@@ -36,8 +51,21 @@ class RuleRegistry:
             module = importlib.import_module(module_name)
             rule_cls = getattr(module, class_name)
             rule_obj = rule_cls(**params)
+            if "cost" in rule_conf:
+                rule_obj.cost = float(rule_conf["cost"])
+            if "sources" in rule_conf:
+                rule_obj.sources = tuple(rule_conf["sources"])
+            if "tier" in rule_conf:
+                if rule_conf["tier"] not in TIERS:
+                    raise ValueError(
+                        f"Rule {rule_conf.get('id', class_name)}: tier must be one of {TIERS}"
+                    )
+                rule_obj.tier = rule_conf["tier"]
             self.rules.append(rule_obj)
 
+        # Merge every phrase-based rule into one automaton, built once per load.
+        self.phrase_scanner = PhraseScanner(self.rules)
+
         return self.rules
 
     def get_rules(self) -> List[Rule]:
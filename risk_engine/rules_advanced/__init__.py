@@ -1,5 +1,6 @@
 from .hallucination_rule import HallucinationRule
 from .pii_rule import PIIRule
 from .injection_rule import PromptInjectionRule
+from .adaptive_latency_rule import AdaptiveLatencyRule
 
-__all__ = ["HallucinationRule", "PIIRule", "PromptInjectionRule"]
+__all__ = ["HallucinationRule", "PIIRule", "PromptInjectionRule", "AdaptiveLatencyRule"]
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ..models import EvaluationContext, Finding, RiskType, Severity
+from ..rules_base import Rule
+from ..sketches import RollingSketch
+
+# Live rules with a snapshot_path, saved by one exit hook. Weak references,
+# so rules replaced by a policy reload or engine rebuild are freed.
+_persisted: "weakref.WeakValueDictionary[int, AdaptiveLatencyRule]" = weakref.WeakValueDictionary()
+_persisted_seq = 0
+_persisted_lock = threading.Lock()
+
+
+def _register_for_exit(rule: "AdaptiveLatencyRule") -> None:
+    global _persisted_seq
+    with _persisted_lock:
+        _persisted_seq += 1
+        _persisted[_persisted_seq] = rule
+
+
+@atexit.register
+def _save_snapshots_at_exit() -> None:
+    # Rules sharing a path (e.g. before and after a reload) share baselines;
+    # only the most recently created one writes the file, and only if it
+    # observed anything since its last snapshot.
+    latest: Dict[str, AdaptiveLatencyRule] = {}
+    with _persisted_lock:
+        for _, rule in sorted(_persisted.items()):
+            if rule.snapshot_path:
+                latest[os.path.realpath(rule.snapshot_path)] = rule
+    for rule in latest.values():
+        if rule._since_snapshot:
+            rule.save_snapshot()
+
+
+class AdaptiveLatencyRule(Rule):
+    """
+    Flags calls that are slow relative to the model's own recent latency.
+
+    Keeps a rolling DDSketch per model_name and flags a call whose latency is
+    above the configured quantile of that model's baseline, once the baseline
+    has min_samples observations. Memory is bounded by max_models (least
+    recently seen models are evicted) times the fixed sketch size. Baselines
+    are snapshotted to snapshot_path every snapshot_every observations and at
+    exit, and restored from it on start-up.
+    """
+
+    id = "LAT-002"
+    name = "Adaptive Per-Model Latency Outlier"
+    description = "Flags latency above a per-model rolling quantile baseline."
+    stateful = True
+    reads = ("latency_ms", "model_name")
+    cost = 3.0
+    max_severity = Severity.HIGH
+    requires = ("latency_ms",)
+
+    def __init__(
+        self,
+        quantile: float = 0.99,
+        min_samples: int = 200,
+        window: int = 5000,
+        max_models: int = 500,
+        relative_accuracy: float = 0.01,
+        max_bins: int = 512,
+        threshold_refresh: int = 32,
+        snapshot_path: Optional[str] = None,
+        snapshot_every: int = 1000,
+    ) -> None:
+        super().__init__()
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_models = max_models
+        self.sketch_options = {"relative_accuracy": relative_accuracy, "max_bins": max_bins}
+        # Thresholds are recomputed every `threshold_refresh` observations
+        # instead of walking the sketch on every call.
+        self.threshold_refresh = threshold_refresh
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self._init_baselines()
+
+    def _init_baselines(self) -> None:
+        self._sketches: "OrderedDict[str, RollingSketch]" = OrderedDict()
+        self._thresholds: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+        if self.snapshot_path:
+            self.load_snapshot(self.snapshot_path)
+            _register_for_exit(self)
+
+    # Pickled (engine snapshots) as configuration only: baselines are process
+    # state, restored from snapshot_path like a freshly constructed rule.
+    _RUNTIME_STATE = ("_sketches", "_thresholds", "_lock", "_since_snapshot", "_snapshot_thread")
+
+    def __getstate__(self) -> Dict:
+        return {k: v for k, v in self.__dict__.items() if k not in self._RUNTIME_STATE}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._init_baselines()
+
+    def apply(self, ctx: EvaluationContext) -> List[Finding]:
+        latency = ctx.latency_ms
+        if latency is None:
+            return []
+        model = ctx.model_name or "<unknown>"
+
+        with self._lock:
+            sketch = self._sketches.get(model)
+            if sketch is None:
+                sketch = self._sketches[model] = RollingSketch(self.window, **self.sketch_options)
+                while len(self._sketches) > self.max_models:
+                    evicted, _ = self._sketches.popitem(last=False)
+                    self._thresholds.pop(evicted, None)
+            else:
+                self._sketches.move_to_end(model)
+
+            threshold = self._threshold(model, sketch)
+            samples = sketch.count
+            sketch.add(latency)
+            self._since_snapshot += 1
+            snapshot_due = self.snapshot_path and self._since_snapshot >= self.snapshot_every
+
+        if snapshot_due:
+            self._snapshot_in_background()
+
+        if threshold is None or latency <= threshold:
+            return []
+        return [
+            Finding(
+                risk_type=RiskType.LATENCY,
+                severity=Severity.HIGH,
+                rule_id=self.id,
+                rule_name=self.name,
+                message=(
+                    f"Latency {latency:.0f} ms exceeds the p{self.quantile * 100:g} "
+                    f"baseline of {threshold:.0f} ms for model '{model}'."
+                ),
+                metadata={
+                    "latency_ms": latency,
+                    "baseline_ms": threshold,
+                    "quantile": self.quantile,
+                    "baseline_samples": samples,
+                    "model_name": ctx.model_name,
+                },
+            )
+        ]
+
+    def _threshold(self, model: str, sketch: RollingSketch) -> Optional[float]:
+        if sketch.count < self.min_samples:
+            return None
+        # Keyed on sketch.total: sketch.count drops when the window rotates.
+        cached = self._thresholds.get(model)
+        if cached is not None and sketch.total - cached[0] < self.threshold_refresh:
+            return cached[1]
+        # Upper edge of the sketch's error band, so values equal to the
+        # baseline quantile are not flagged because of bucket rounding.
+        threshold = sketch.quantile(self.quantile) * (1 + self.sketch_options["relative_accuracy"])
+        self._thresholds[model] = (sketch.total, threshold)
+        return threshold
+
+    def inherit_state(self, previous: Rule) -> None:
+        # Share the live baselines (and their lock) when the sketch layout is
+        # unchanged; otherwise keep the baselines restored from the snapshot.
+        if (
+            isinstance(previous, AdaptiveLatencyRule)
+            and previous.window == self.window
+            and previous.sketch_options == self.sketch_options
+        ):
+            self._lock = previous._lock
+            self._sketches = previous._sketches
+            self._thresholds = {}
+            self._since_snapshot = previous._since_snapshot
+
+    def detach_state(self) -> None:
+        with self._lock:
+            self.snapshot_path = None
+            self._sketches.clear()
+            self._thresholds.clear()
+
+    # ---------- persistence ---------- #
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "rule_id": self.id,
+                "models": {name: s.to_dict() for name, s in self._sketches.items()},
+            }
+
+    def save_snapshot(self, path: Optional[str] = None) -> None:
+        path = path or self.snapshot_path
+        if not path:
+            return
+        data = self.snapshot()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unique per writer: the background snapshot and the atexit save may overlap.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load_snapshot(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._sketches.clear()
+            self._thresholds.clear()
+            for name, sketch in data.get("models", {}).items():
+                self._sketches[name] = RollingSketch.from_dict(sketch)
+            while len(self._sketches) > self.max_models:
+                self._sketches.popitem(last=False)
+
+    def _snapshot_in_background(self) -> None:
+        with self._lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return
+            self._since_snapshot = 0
+            self._snapshot_thread = threading.Thread(
+                target=self.save_snapshot, name="latency-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
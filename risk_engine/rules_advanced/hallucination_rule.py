@@ -1,17 +1,33 @@
-from typing import List, Dict, Optional
 import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Pattern, Tuple
 
-from risk_engine.models import EvaluationContext, RiskFinding, RiskType, Severity
+from risk_engine.fact_store import FactStore
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity, TextView
 from risk_engine.rules_base import Rule
 
 
+@lru_cache(maxsize=4096)
+def _phrase_pattern(tokens: Tuple[str, ...]) -> Pattern[str]:
+    """Matches `tokens` as consecutive whole word tokens of a normalized text."""
+    first, *rest = map(re.escape, tokens)
+    # Leading with the literal (boundary checked behind it) lets the regex
+    # engine skip ahead to candidate positions on long texts.
+    return re.compile(
+        first + rf"(?<!\w{first})" + "".join(r"\W+" + token for token in rest) + r"(?!\w)"
+    )
+
+
 class HallucinationRule(Rule):
     """
-    Naive hallucination check for 'What is the capital of X?' style questions.
+    Deterministic fact check for 'What is the capital of X?' style questions.
 
-    It only supports a small, explicit map of countries to capitals. If the prompt
-    clearly asks for a capital we know, and the response does NOT mention the
-    expected capital, we flag it as a hallucination risk.
+    Facts come from a FactStore: by default a small, explicit map of
+    countries to capitals, or a compiled store file (`fact_store`) with any
+    number of entity -> relation -> value facts. If the prompt clearly asks
+    for a fact we know (a cue such as "capital of" followed by a known
+    entity), and the response does NOT mention any accepted value, we flag
+    it as a hallucination risk.
 
     This is intentionally narrow and deterministic: it's a demo of how to plug
     factual checks into the engine, not a general QA system.
@@ -21,8 +37,17 @@ class HallucinationRule(Rule):
     id = "HALL-001"
     name = "Naive Capital Hallucination Check"
     description = "Flags potential hallucinations for simple 'capital of X' questions."
-
-    def __init__(self, capitals: Optional[Dict[str, List[str]]] = None) -> None:
+    reads = ("prompt", "response")
+    max_severity = Severity.HIGH
+    requires = ("prompt", "response")
+    # An answer anywhere in the response counts, so never judge part of it.
+    windowed = False
+
+    def __init__(
+        self,
+        capitals: Optional[Dict[str, List[str]]] = None,
+        fact_store: Optional[str] = None,
+    ) -> None:
         super().__init__()
 
         # Very small, explicit knowledge base
@@ -46,58 +71,62 @@ class HallucinationRule(Rule):
             "us": ["washington", "washington dc", "washington d.c."],
         }
 
-    def _extract_country(self, text: str) -> Optional[str]:
-        """
-        Look for patterns like 'capital of X' in the prompt.
-        Returns a normalized country name or None.
-        """
-        lowered = text.lower()
-        match = re.search(r"capital of\s+([a-z\s]+)\??", lowered)
-        if not match:
-            return None
-
-        country = match.group(1).strip()
-        # remove leading 'the ' if present (e.g. "the united states")
-        if country.startswith("the "):
-            country = country[4:]
-
-        return country
+        if fact_store is not None:
+            self.facts = FactStore.open(fact_store)
+        else:
+            self.facts = FactStore.from_facts(
+                {"relation": "capital", "entity": country, "values": values}
+                for country, values in self.capitals.items()
+            )
+        # A prompt without any cue word cannot ask for a fact.
+        self.triggers = {"prompt": self.facts.cue_words}
 
-    def apply(self, ctx: EvaluationContext) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
+    def apply(self, ctx: EvaluationContext) -> List[Finding]:
+        findings: List[Finding] = []
 
         if not ctx.prompt or not ctx.response:
             return findings
 
-        country = self._extract_country(ctx.prompt)
-        if not country:
-            # Prompt isn't clearly a capital question
-            return findings
-
-        expected_capitals = self.capitals.get(country)
-        if not expected_capitals:
-            # Country not in our tiny knowledge base
+        prepared = ctx.prepared()
+        questions = self.facts.questions(prepared.prompt.tokens)
+        if not questions:
+            # Prompt doesn't clearly ask for a fact we know
             return findings
 
-        response_lower = ctx.response.lower()
-
-        # If NONE of the expected tokens appear in the response, flag a risk
-        if not any(token in response_lower for token in expected_capitals):
+        # Whole-token matching on normalized text: "Washington, D.C." matches
+        # the alias "washington d.c.". Searched in place rather than on a
+        # token list, so very large responses cost no per-token objects.
+        response = prepared.response.normalized
+
+        for relation, entity in questions:
+            expected = self.facts.lookup(relation, entity)
+            if not expected:
+                continue
+            aliases = (tuple(TextView(value).tokens) for value in expected)
+            if any(_phrase_pattern(alias).search(response) for alias in aliases if alias):
+                continue
+
+            metadata = {
+                "relation": relation,
+                "entity": entity,
+                "expected": expected,
+                "response_snippet": ctx.response[:200],
+            }
+            if relation == "capital":
+                # Keys emitted before other relations were supported.
+                metadata["country"] = entity
+                metadata["expected_capitals"] = expected
             findings.append(
-                RiskFinding(
+                Finding(
                     risk_type=RiskType.HALLUCINATION,
                     severity=Severity.HIGH,
                     rule_id=self.id,
                     rule_name=self.name,
                     message=(
-                        f"Response may hallucinate the capital of '{country}'. "
-                        f"Expected something like: {', '.join(expected_capitals)}."
+                        f"Response may hallucinate the {relation} of '{entity}'. "
+                        f"Expected something like: {', '.join(expected)}."
                     ),
-                    metadata={
-                        "country": country,
-                        "expected_capitals": expected_capitals,
-                        "response_snippet": ctx.response[:200],
-                    },
+                    metadata=metadata,
                 )
             )
 
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List, Optional, Set
 
-from ..models import EvaluationContext, RiskFinding, RiskType, Severity
-from ..rules_base import Rule
+from ..models import EvaluationContext, Finding, RiskType, Severity
+from ..rules_base import PhraseRule
 
 
-class PromptInjectionRule(Rule):
+class PromptInjectionRule(PhraseRule):
     """
     Detects common prompt-injection / jailbreak phrases in prompt or response.
     """
@@ -14,9 +14,14 @@ class PromptInjectionRule(Rule):
     id = "INJ-001"
     name = "Prompt Injection Heuristic Detector"
     description = "Flags instructions that try to override prior rules or bypass safety."
+    fields = ("prompt", "response")
+    max_severity = Severity.HIGH
 
-    def __init__(self):
+    def __init__(self, normalize_unicode: bool = False, lexicons: Optional[List[str]] = None):
         super().__init__()
+        if normalize_unicode:
+            self.text_view = "normalized"
+        self.load_lexicons(lexicons)
         self.patterns = [
             "ignore previous instructions",
             "ignore all previous instructions",
@@ -32,30 +37,33 @@ class PromptInjectionRule(Rule):
             "override your guidelines",
         ]
 
-    def _scan_text(self, text: str, location: str) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
-        lower = text.lower()
-
-        for pattern in self.patterns:
-            if pattern in lower:
-                findings.append(
-                    RiskFinding(
-                        risk_type=RiskType.SAFETY,
-                        severity=Severity.HIGH,
-                        rule_id=self.id,
-                        rule_name=self.name,
-                        message=(
-                            f"Potential prompt injection phrase detected in {location}: "
-                            f"'{pattern}'."
-                        ),
-                        metadata={"pattern": pattern, "location": location},
-                    )
+    def get_phrases(self) -> List[str]:
+        return self.patterns
+
+    def _findings_for(self, matched: Set[Any], location: str) -> List[Finding]:
+        findings: List[Finding] = []
+
+        for pattern in self.matched_terms(matched):
+            findings.append(
+                Finding(
+                    risk_type=RiskType.SAFETY,
+                    severity=Severity.HIGH,
+                    rule_id=self.id,
+                    rule_name=self.name,
+                    message=(
+                        f"Potential prompt injection phrase detected in {location}: "
+                        f"'{pattern}'."
+                    ),
+                    metadata={"pattern": pattern, "location": location},
                 )
+            )
 
         return findings
 
-    def apply(self, ctx: EvaluationContext) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
-        findings.extend(self._scan_text(ctx.prompt, "prompt"))
-        findings.extend(self._scan_text(ctx.response, "response"))
+    def build_findings(
+        self, ctx: EvaluationContext, matches: Dict[str, Set[int]]
+    ) -> List[Finding]:
+        findings: List[Finding] = []
+        findings.extend(self._findings_for(matches.get("prompt", set()), "prompt"))
+        findings.extend(self._findings_for(matches.get("response", set()), "response"))
         return findings
@@ -1,56 +1,83 @@
 from __future__ import annotations
 
-import re
 from typing import List
 
-from ..models import EvaluationContext, RiskFinding, RiskType, Severity
+from ..documents import OWNED_RANGE_KEY
+from ..models import EvaluationContext, Finding, RiskType, Severity
+from ..pii_scanner import PIIScanner
 from ..rules_base import Rule
 
 
 class PIIRule(Rule):
     """
-    Detects obvious PII patterns (email, phone numbers, SSN-like patterns, long card-like numbers).
-    Purely deterministic regexes, no external calls.
+    Detects obvious PII patterns (email, phone numbers, SSN-like patterns,
+    Luhn-valid card numbers) with a single linear-time PIIScanner pass.
+
+    At most `max_matches_per_kind` findings are emitted per kind; further hits
+    are summarised in one extra finding carrying the total count, so
+    digit-heavy text (logs, tables, dumps) cannot produce thousands of findings.
+    On a window of a large document only matches the window owns are
+    considered, so the summary counts of all windows add up exactly.
     """
 
     id = "PII-001"
     name = "PII Pattern Detector"
     description = "Flags responses that appear to contain personal identifiers."
+    cpu_heavy = True
+    reads = ("response",)
+    cost = 20.0
+    # Every kind contains an '@' or a digit.
+    triggers = {"response": ("@",) + tuple("0123456789")}
 
-    def __init__(self):
+    def __init__(self, max_matches_per_kind: int = 20):
         super().__init__()
+        self.max_matches_per_kind = max_matches_per_kind
+        self.scanner = PIIScanner()
 
-        self.email_re = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-        self.ssn_re = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-        self.phone_re = re.compile(
-            r"\b(?:\+?\d{1,3}[-.\s]?)?(?:\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}\b"
+    def _finding(self, text: str, kind: str, start: int, end: int) -> Finding:
+        return Finding(
+            risk_type=RiskType.SAFETY,
+            severity=Severity.CRITICAL,
+            rule_id=self.id,
+            rule_name=self.name,
+            message=f"Potential {kind} detected in model output.",
+            metadata={
+                "kind": kind,
+                "match": text[start:end],
+                "snippet": text[max(0, start - 20): end + 20],
+                "offset": start,
+            },
         )
-        # Very naive credit-card-like pattern: long digit sequences
-        self.cc_re = re.compile(r"\b(?:\d[ -]*?){13,16}\b")
-
-    def _scan(self, pattern: re.Pattern, text: str, kind: str) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
-        for m in pattern.finditer(text):
-            snippet = text[max(0, m.start() - 20): m.end() + 20]
-            findings.append(
-                RiskFinding(
-                    risk_type=RiskType.SAFETY,
-                    severity=Severity.CRITICAL,
-                    rule_id=self.id,
-                    rule_name=self.name,
-                    message=f"Potential {kind} detected in model output.",
-                    metadata={"kind": kind, "match": m.group(0), "snippet": snippet},
-                )
-            )
-        return findings
 
-    def apply(self, ctx: EvaluationContext) -> List[RiskFinding]:
-        findings: List[RiskFinding] = []
+    def apply(self, ctx: EvaluationContext) -> List[Finding]:
+        findings: List[Finding] = []
         text = ctx.response
+        cap = self.max_matches_per_kind
+        owned = ctx.extra.get(OWNED_RANGE_KEY)
 
-        findings.extend(self._scan(self.email_re, text, "email address"))
-        findings.extend(self._scan(self.ssn_re, text, "SSN-like pattern"))
-        findings.extend(self._scan(self.phone_re, text, "phone number"))
-        findings.extend(self._scan(self.cc_re, text, "long card-like number"))
+        for kind, matches in self.scanner.scan_by_kind(text).items():
+            if owned is not None:
+                matches = [m for m in matches if owned[0] <= m.start < owned[1]]
+            for m in matches[:cap]:
+                findings.append(self._finding(text, kind, m.start, m.end))
+            if len(matches) > cap:
+                findings.append(
+                    Finding(
+                        risk_type=RiskType.SAFETY,
+                        severity=Severity.CRITICAL,
+                        rule_id=self.id,
+                        rule_name=self.name,
+                        message=(
+                            f"{len(matches)} potential {kind} matches in model output; "
+                            f"{len(matches) - cap} not listed individually."
+                        ),
+                        metadata={
+                            "kind": kind,
+                            "count": len(matches),
+                            "omitted": len(matches) - cap,
+                            "sample_offsets": [m.start for m in matches[cap:cap + 10]],
+                        },
+                    )
+                )
 
         return findings
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from .models import EvaluationContext, RiskFinding
+from .lexicon import Lexicon, load_lexicon
+from .models import EvaluationContext, Finding, Severity
+
+# Rule tiers: "inline" rules run on the request path; "deferred" rules run
+# later on a durable job queue (see deferred.py).
+TIERS = ("inline", "deferred")
 
 
 class Rule(ABC):
@@ -15,6 +20,34 @@ class Rule(ABC):
     id: str
     name: str
     description: str
+    # Expensive rules (large regex scans, lookups) that async callers should
+    # run off the event loop; see RiskEngine.evaluate_async().
+    cpu_heavy: bool = False
+    # Rules whose result depends on state accumulated across evaluations.
+    stateful: bool = False
+    # EvaluationContext fields the result depends on. Declaring them lets a
+    # ResultCache reuse findings for repeated content; None means unknown,
+    # and such rules are never cached.
+    reads: Optional[Tuple[str, ...]] = None
+    # Scheduling hints for RiskEngine.evaluate_gate(): relative cost per call
+    # (roughly microseconds on a typical response) and the most severe
+    # finding the rule can emit. Policies may override `cost` per rule.
+    cost: float = 10.0
+    max_severity: Severity = Severity.CRITICAL
+    # Cheap preconditions, compiled into the engine's ApplicabilityIndex;
+    # a rule whose preconditions fail is not called. `requires`: fields
+    # that must be set and non-empty. `triggers`: text field -> substrings
+    # (case-insensitive), at least one of which must occur. `sources`:
+    # allowed EvaluationContext.source values (None = any).
+    requires: Tuple[str, ...] = ()
+    triggers: Optional[Dict[str, Tuple[str, ...]]] = None
+    sources: Optional[Tuple[str, ...]] = None
+    # Whether RiskEngine.evaluate_document() may run the rule on windows of
+    # a large response. Rules judging the response as a whole (e.g. "does
+    # not mention X anywhere") set this to False and always see all of it.
+    windowed: bool = True
+    # One of TIERS; policies set it per rule with `tier:`.
+    tier: str = "inline"
 
     def __init__(self):
         if not hasattr(self, "id"):
@@ -25,6 +58,99 @@ class Rule(ABC):
             self.description = ""
 
     @abstractmethod
-    def apply(self, ctx: EvaluationContext) -> List[RiskFinding]:
-        """Evaluate this rule against the given context."""
+    def apply(self, ctx: EvaluationContext) -> List[Finding]:
+        """
+        Evaluate this rule against the given context. Findings may be
+        Finding or RiskFinding instances; the engine treats them alike.
+        """
+        ...
+
+    def inherit_state(self, previous: "Rule") -> None:
+        """
+        Called on stateful rules when a policy reload replaces `previous`
+        (same class and id), so accumulated state survives the swap.
+        """
+
+    def detach_state(self) -> None:
+        """
+        Called on stateful rules built by tools (benchmarks, offline runs,
+        replays): start from empty state and never persist it, so they
+        neither depend on nor overwrite the service's state.
+        """
+
+
+def detach_state(rules: Iterable[Rule]) -> None:
+    """Detach every stateful rule in `rules` (see Rule.detach_state)."""
+    for rule in rules:
+        if rule.stateful:
+            rule.detach_state()
+
+
+class PhraseRule(Rule):
+    """
+    Base class for rules that flag fixed, case-insensitive phrases.
+
+    Subclasses expose their phrase list and turn the set of matched phrases
+    into findings. The engine merges the phrases of every PhraseRule into one
+    PhraseScanner, so each text field is scanned once per evaluation instead of
+    once per rule and phrase. A rule must only report phrases it was told
+    matched, which lets the engine skip rules without any hit.
+    """
+
+    # Context fields scanned for this rule's phrases.
+    fields: Tuple[str, ...] = ("response",)
+    # TextView attribute matched against: "lower", or "normalized" to also
+    # catch NFKC look-alikes and zero-width obfuscation.
+    text_view: str = "lower"
+    # Compiled term lists matched on whole words in addition to get_phrases();
+    # see lexicon.py. Set from paths with load_lexicons().
+    lexicons: Tuple[Lexicon, ...] = ()
+
+    @property
+    def reads(self) -> Tuple[str, ...]:
+        return self.fields
+
+    def load_lexicons(self, paths: Optional[Sequence[str]]) -> None:
+        self.lexicons = tuple(load_lexicon(path) for path in paths or ())
+
+    def matched_terms(self, matched: Iterable[Any]) -> List[str]:
+        """
+        Phrases for one field's matches: get_phrases() hits in list order,
+        then lexicon hits not already reported.
+        """
+        phrases = self.get_phrases()
+        hits = set(matched)
+        terms = [phrase for idx, phrase in enumerate(phrases) if idx in hits]
+        lexicon_hits = sorted(hit for hit in hits if isinstance(hit, str))
+        if lexicon_hits:
+            seen = {term.lower() for term in terms}
+            terms.extend(term for term in lexicon_hits if term.lower() not in seen)
+        return terms
+
+    @abstractmethod
+    def get_phrases(self) -> List[str]:
+        """Phrases to search for; matching is case-insensitive."""
         ...
+
+    @abstractmethod
+    def build_findings(
+        self, ctx: EvaluationContext, matches: Dict[str, Set[int]]
+    ) -> List[Finding]:
+        """
+        Build findings from scan results. `matches` maps each scanned field
+        to the indices into get_phrases() that occurred in it, plus the
+        matched lexicon terms as strings; matched_terms() resolves both.
+        """
+        ...
+
+    def apply(self, ctx: EvaluationContext) -> List[Finding]:
+        # Standalone use (outside an engine): scan with a private scanner.
+        scanner = self.__dict__.get("_own_scanner")
+        if scanner is None:
+            from .phrase_scanner import PhraseScanner
+
+            scanner = self._own_scanner = PhraseScanner([self])
+        matches = scanner.scan(ctx).get(self)
+        if not matches:
+            return []
+        return self.build_findings(ctx, matches)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Optional
+
+
+class DDSketch:
+    """
+    Constant-memory quantile sketch with relative-error guarantees (DDSketch).
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of the true value. When more than `max_bins`
+    buckets are in use the lowest ones are collapsed together, which keeps
+    memory fixed and only degrades the low quantiles we do not alert on.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_bins: int = 512,
+        min_value: float = 1e-3,
+    ) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, weight: int = 1) -> None:
+        self.count += weight
+        if value <= self.min_value:
+            self.zero_count += weight
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        bins = self.bins
+        bins[key] = bins.get(key, 0) + weight
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "DDSketch") -> None:
+        for key, weight in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        return quantile_of([self], q)
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        folded = sum(self.bins.pop(key) for key in keys[: excess + 1])
+        self.bins[keys[excess]] = folded
+
+    def value_of(self, key: int) -> float:
+        # Bucket midpoint in the relative-error sense.
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "min_value": self.min_value,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "bins": [[key, weight] for key, weight in self.bins.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data["max_bins"], data["min_value"])
+        sketch.bins = {int(key): int(weight) for key, weight in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        return sketch
+
+
+def quantile_of(sketches: Iterable[DDSketch], q: float) -> Optional[float]:
+    """Quantile of the union of sketches sharing the same accuracy settings."""
+    sketches = [s for s in sketches if s.count]
+    if not sketches:
+        return None
+    total = sum(s.count for s in sketches)
+    rank = q * (total - 1)
+
+    seen = sum(s.zero_count for s in sketches)
+    if rank < seen:
+        return 0.0
+
+    merged: Dict[int, int] = {}
+    for s in sketches:
+        for key, weight in s.bins.items():
+            merged[key] = merged.get(key, 0) + weight
+    head = sketches[0]
+    for key in sorted(merged):
+        seen += merged[key]
+        if seen > rank:
+            return head.value_of(key)
+    return head.value_of(max(merged))
+
+
+class RollingSketch:
+    """
+    Quantiles over roughly the last `window` to `2 * window` observations.
+
+    Two DDSketches are kept: the one being filled and the previous, full one.
+    When the current sketch reaches `window` observations it replaces the
+    previous one, so old behaviour ages out without storing raw samples.
+    """
+
+    def __init__(self, window: int = 5000, **sketch_options: Any) -> None:
+        self.window = window
+        self.sketch_options = sketch_options
+        self.current = DDSketch(**sketch_options)
+        self.previous: Optional[DDSketch] = None
+        # Observations ever added; unlike `count` it never drops on rotation.
+        self.total = 0
+
+    @property
+    def count(self) -> int:
+        return self.current.count + (self.previous.count if self.previous else 0)
+
+    def add(self, value: float) -> None:
+        if self.current.count >= self.window:
+            self.previous = self.current
+            self.current = DDSketch(**self.sketch_options)
+        self.current.add(value)
+        self.total += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        return quantile_of([s for s in (self.previous, self.current) if s is not None], q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "current": self.current.to_dict(),
+            "previous": self.previous.to_dict() if self.previous else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingSketch":
+        current = DDSketch.from_dict(data["current"])
+        rolling = cls(
+            data["window"],
+            relative_accuracy=current.relative_accuracy,
+            max_bins=current.max_bins,
+            min_value=current.min_value,
+        )
+        rolling.current = current
+        if data.get("previous"):
+            rolling.previous = DDSketch.from_dict(data["previous"])
+        rolling.total = rolling.count
+        return rolling
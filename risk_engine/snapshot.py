@@ -0,0 +1,175 @@
+"""
+Precompiled engine snapshots, for fast cold starts.
+
+Loading a policy parses YAML, imports every rule module by name and builds
+the rules and their matchers. A snapshot is that finished RuleSet, pickled
+once by a compile step (e.g. while building the container image):
+
+    python -m risk_engine.snapshot config/policies.yaml
+
+default_engine() and the offline workers then load the snapshot instead,
+without importing PyYAML. A snapshot is only used while the policy file
+hashes to the value recorded in it and the source files of the engine, the
+rule modules and the rules' lexicon term lists are unchanged; otherwise the
+policy is loaded as usual. Lexicons and fact stores are recorded by path and
+mapped again on load.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .engine import RuleSet
+from .rules_base import detach_state
+
+# Bump when the pickled layout of RuleSet or the header changes.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def snapshot_path_for(policy_path: str) -> str:
+    """Default snapshot location: next to the policy, e.g. config/policies.snapshot."""
+    return os.path.splitext(policy_path)[0] + SNAPSHOT_SUFFIX
+
+
+def policy_hash(policy_path: str) -> str:
+    """Same content hash RuleRegistry uses for policy_version."""
+    with open(policy_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _source_files(ruleset: RuleSet) -> List[str]:
+    """Engine modules, the module of every rule class, and rule lexicons."""
+    names = {name for name in sys.modules if name == "risk_engine" or name.startswith("risk_engine.")}
+    names.update(type(rule).__module__ for rule in ruleset.rules)
+    files = []
+    for name in sorted(names):
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if path:
+            files.append(os.path.abspath(path))
+    # A lexicon's terms are compiled from its term list: editing the list
+    # must invalidate the snapshot like editing the policy does.
+    lexicons = {}
+    for rule in ruleset.rules:
+        for lexicon in getattr(rule, "lexicons", ()):
+            lexicons[lexicon.source or lexicon.path] = None
+    files.extend(os.path.abspath(path) for path in lexicons)
+    return files
+
+
+def _fingerprint(files: List[str]) -> Dict[str, Tuple[int, int]]:
+    out = {}
+    for path in files:
+        st = os.stat(path)
+        out[path] = (st.st_size, st.st_mtime_ns)
+    return out
+
+
+def _header(policy_path: str, ruleset: RuleSet) -> Dict[str, Any]:
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "python": list(sys.version_info[:2]),
+        "policy_path": os.path.abspath(policy_path),
+        "policy_hash": policy_hash(policy_path),
+        "sources": _fingerprint(_source_files(ruleset)),
+    }
+
+
+def compile_policy(policy_path: str = "config/policies.yaml", output: Optional[str] = None) -> str:
+    """Build the RuleSet for `policy_path` and write its snapshot; returns the path."""
+    output = output or snapshot_path_for(policy_path)
+    ruleset = RuleSet.from_policy(policy_path)
+    header = _header(policy_path, ruleset)
+    tmp = f"{output}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(ruleset, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, output)
+    return output
+
+
+def stale_reason(header: Dict[str, Any], policy_path: str) -> Optional[str]:
+    """Why a snapshot with `header` cannot stand in for `policy_path`, or None."""
+    if header.get("format") != SNAPSHOT_FORMAT:
+        return "snapshot format changed"
+    if header.get("python") != list(sys.version_info[:2]):
+        return "different Python version"
+    if header.get("policy_hash") != policy_hash(policy_path):
+        return "policy file changed"
+    for path, recorded in header.get("sources", {}).items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            return f"{path} is missing"
+        if (st.st_size, st.st_mtime_ns) != tuple(recorded):
+            return f"{path} changed"
+    return None
+
+
+def load_snapshot(policy_path: str, snapshot_path: Optional[str] = None) -> Optional[RuleSet]:
+    """The snapshotted RuleSet if a current snapshot exists, else None."""
+    snapshot_path = snapshot_path or snapshot_path_for(policy_path)
+    try:
+        f = open(snapshot_path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        try:
+            header = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(header, dict) or stale_reason(header, policy_path) is not None:
+            return None
+        try:
+            ruleset = pickle.load(f)
+        except Exception:
+            # Truncated, or referring to classes that no longer unpickle.
+            return None
+    return ruleset if isinstance(ruleset, RuleSet) else None
+
+
+def load_ruleset(policy_path: str = "config/policies.yaml", persist_state: bool = True) -> RuleSet:
+    """
+    RuleSet for `policy_path`, from its snapshot when one is current;
+    persist_state as for RuleSet.from_policy().
+    """
+    ruleset = load_snapshot(policy_path)
+    if ruleset is None:
+        return RuleSet.from_policy(policy_path, persist_state)
+    if not persist_state:
+        detach_state(ruleset.rules)
+    return ruleset
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m risk_engine.snapshot",
+        description="Compile a policy file into an engine snapshot for fast startup.",
+    )
+    parser.add_argument("policy", nargs="?", default="config/policies.yaml")
+    parser.add_argument("-o", "--output", help="Snapshot path (default: next to the policy)")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report whether the existing snapshot is current (exit 1 if not)")
+    args = parser.parse_args(argv)
+
+    output = args.output or snapshot_path_for(args.policy)
+    if args.check:
+        try:
+            with open(output, "rb") as f:
+                reason = stale_reason(pickle.load(f), args.policy)
+        except FileNotFoundError:
+            reason = "no snapshot"
+        print(f"{output}: {reason or 'current'}", file=sys.stderr)
+        return 1 if reason else 0
+
+    compile_policy(args.policy, output)
+    print(f"{output}: {os.path.getsize(output)} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import unicodedata
+from typing import Any, Dict, List, Optional, Set
+
+from .models import EvaluationContext, Finding, normalize_text
+from .phrase_scanner import PhraseAutomaton
+
+# Only the response grows while streaming; every other field is known up front.
+STREAM_FIELD = "response"
+
+
+class _ViewMatcher:
+    """
+    Incremental matcher for one (response, text view) automaton.
+
+    Keeps the last max_phrase_len - 1 characters of the view as a tail and
+    scans tail + new text, so a phrase split across chunks is still found
+    while each character is scanned a bounded number of times.
+    """
+
+    def __init__(self, automaton: PhraseAutomaton, view: str) -> None:
+        self.automaton = automaton
+        self.normalized = view == "normalized"
+        self.keep = max(automaton.max_phrase_len - 1, 0)
+        self.tail = ""
+        # Raw text held back until it can be NFKC-normalized on its own.
+        self.pending = ""
+
+    def feed(self, chunk: str, final: bool = False) -> Set[Any]:
+        if self.normalized:
+            raw = self.pending + chunk
+            split = len(raw) if final else _stable_prefix(raw)
+            self.pending = raw[split:]
+            segment = normalize_text(raw[:split])
+        else:
+            segment = chunk.lower()
+        if not segment:
+            return set()
+
+        window = self.tail + segment
+        found: Set[Any] = set()
+        payloads_for = self.automaton.payloads_for
+        for _, longest in self.automaton.iter_matches(window):
+            found.update(payloads_for(longest))
+        self.tail = window[-self.keep:] if self.keep else ""
+        return found
+
+
+def _stable_prefix(raw: str) -> int:
+    """
+    Length of the prefix of `raw` whose normalization cannot change when
+    more text arrives: everything before the last starter character.
+    """
+    i = len(raw) - 1
+    while i > 0 and unicodedata.combining(raw[i]):
+        i -= 1
+    return max(i, 0)
+
+
+class StreamSession:
+    """
+    Incremental evaluation of a response that arrives in chunks.
+
+    Phrase rules run as chunks arrive: each response automaton of the rule
+    set's PhraseScanner keeps a short tail across chunk boundaries, and a
+    finding is built as soon as a phrase is first seen. Phrase matches in the
+    prompt are reported by the first feed(). Every other rule needs the whole
+    response and runs once in close(), as does lexicon matching of phrase
+    rules (on the whole response's word tokens). Total matching work is
+    linear in the response length.
+
+    Findings reported by feed() are built against the response received so
+    far. The buffer is joined only for chunks that complete a new match, and
+    each (rule, phrase) is reported once, so the number of joins is bounded
+    by the phrase count, not the stream length. A match of a rule whose
+    preconditions (see ApplicabilityIndex) are not met yet is held back
+    until they are, and dropped if they still fail in close(), exactly as
+    evaluate() would skip the rule.
+
+    Obtain a session with RiskEngine.stream().
+    """
+
+    def __init__(self, engine: Any, tier: Optional[str] = None, **fields: Any) -> None:
+        self.engine = engine
+        self.ruleset = engine.ruleset
+        self.rules = self.ruleset.tier_rules(tier)
+        # Phrase matches of rules outside `tier` are ignored.
+        self._in_tier = set(self.rules)
+        self.fields = fields
+        self.findings: List[Finding] = []
+        self.chars = 0
+        self.closed = False
+
+        self._chunks: List[str] = []
+        self._ctx: Optional[EvaluationContext] = None
+        self._seen: Dict[Any, Dict[str, Set[int]]] = {}
+        self._unreported: List[Finding] = []
+        # Matches of rules whose preconditions did not hold yet.
+        self._held: Dict[Any, Dict[str, Set[int]]] = {}
+        self._applicable: Optional[Set[int]] = None
+
+        scanner = self.ruleset.phrase_scanner
+        self._matchers = [
+            _ViewMatcher(automaton, view)
+            for (field, view), automaton in scanner.automata.items()
+            if field == STREAM_FIELD
+        ]
+        # Fixed fields (the prompt) are scanned once, against an empty response.
+        start_ctx = self._ctx = EvaluationContext(**fields, response="")
+        for rule, per_field in scanner.scan(start_ctx).items():
+            for field, indices in per_field.items():
+                self._record(rule, field, indices)
+
+    def feed(self, chunk: str) -> List[Finding]:
+        """Add a response chunk; returns findings first detected by it."""
+        if self.closed:
+            raise RuntimeError("Stream session is closed")
+        if chunk:
+            self._chunks.append(chunk)
+            self.chars += len(chunk)
+            self._match(chunk, final=False)
+        return self._drain()
+
+    def close(self, **updates: Any) -> List[Finding]:
+        """
+        Finish the stream and run the rules that need the whole response.
+        `updates` (e.g. latency_ms) are applied to the context first.
+        Returns the findings not reported by earlier feed() calls.
+        """
+        if self.closed:
+            return []
+        self.closed = True
+        self._match("", final=True)
+        self.fields.update(updates)
+        self._ctx = None
+
+        ctx = self._current(rebuild=True)
+        scanner = self.ruleset.phrase_scanner
+        for rule, per_field in scanner.scan_lexicons(ctx, (STREAM_FIELD,)).items():
+            new = per_field[STREAM_FIELD] - self._seen.get(rule, {}).get(STREAM_FIELD, set())
+            if new:
+                self._record(rule, STREAM_FIELD, new)
+        self._release_held()
+        self._held.clear()
+        rest = [
+            rule for rule in self.rules
+            if not scanner.covers(rule)
+        ]
+        for rule_findings in self.engine._run_rules(ctx, rest, self.ruleset):
+            self._unreported.extend(rule_findings)
+        return self._drain()
+
+    def context(self) -> EvaluationContext:
+        """The context as received so far."""
+        return EvaluationContext(**self.fields, response="".join(self._chunks))
+
+    # ---------- internals ---------- #
+
+    def _match(self, chunk: str, final: bool) -> None:
+        rules = self.ruleset.phrase_scanner.rules
+        new: Dict[Any, Set[int]] = {}
+        for matcher in self._matchers:
+            for slot, idx in matcher.feed(chunk, final):
+                rule = rules[slot]
+                if idx not in self._seen.get(rule, {}).get(STREAM_FIELD, ()):
+                    new.setdefault(rule, set()).add(idx)
+        if new:
+            self._current(rebuild=True)
+            self._release_held()
+            for rule, indices in new.items():
+                self._record(rule, STREAM_FIELD, indices)
+
+    def _current(self, rebuild: bool = False) -> EvaluationContext:
+        """The context findings are built against; `rebuild` catches up with the buffer."""
+        ctx = self._ctx
+        if rebuild and (ctx is None or len(ctx.response) != self.chars):
+            ctx = self._ctx = self.context()
+            self._applicable = None
+        return ctx
+
+    def _is_applicable(self, rule: Any) -> bool:
+        index = self.ruleset.applicability
+        if index.trivial:
+            return True
+        if self._applicable is None:
+            self._applicable = index.applicable(self._ctx)
+        return self.ruleset.slots[id(rule)] in self._applicable
+
+    def _record(self, rule: Any, field: str, indices: Set[int]) -> None:
+        if rule not in self._in_tier:
+            return
+        self._seen.setdefault(rule, {}).setdefault(field, set()).update(indices)
+        if not self._is_applicable(rule):
+            self._held.setdefault(rule, {}).setdefault(field, set()).update(indices)
+            return
+        self._unreported.extend(rule.build_findings(self._ctx, {field: indices}))
+
+    def _release_held(self) -> None:
+        """Report held matches of rules whose preconditions now hold."""
+        for rule in [rule for rule in self._held if self._is_applicable(rule)]:
+            self._unreported.extend(rule.build_findings(self._ctx, self._held.pop(rule)))
+
+    def _drain(self) -> List[Finding]:
+        out, self._unreported = self._unreported, []
+        self.findings.extend(out)
+        return out
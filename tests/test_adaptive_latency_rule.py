@@ -0,0 +1,92 @@
+from risk_engine.models import EvaluationContext
+from risk_engine.rules_advanced.adaptive_latency_rule import AdaptiveLatencyRule
+
+
+def _ctx(latency_ms: float, model: str = "m") -> EvaluationContext:
+    return EvaluationContext(prompt="p", response="r", latency_ms=latency_ms, model_name=model)
+
+
+def test_flags_outlier_after_min_samples():
+    rule = AdaptiveLatencyRule(min_samples=50, window=100)
+    for i in range(60):
+        assert rule.apply(_ctx(100 + i % 5)) == []
+    findings = rule.apply(_ctx(1000))
+    assert [f.rule_id for f in findings] == ["LAT-002"]
+    assert findings[0].metadata["baseline_samples"] == 60
+
+
+def test_threshold_refreshes_after_window_rotation():
+    window = 100
+    rule = AdaptiveLatencyRule(min_samples=50, window=window, threshold_refresh=8)
+    # Fill past one rotation (count drops from 2 * window to window + 1).
+    for _ in range(3 * window):
+        rule.apply(_ctx(100))
+    # The model's latency shifts for good: the baseline must follow it
+    # within a window rather than flag every call against 100 ms forever.
+    flagged = [bool(rule.apply(_ctx(500))) for _ in range(4 * window)]
+    assert any(flagged[:window])
+    assert not any(flagged[-window:])
+
+
+def test_models_have_separate_baselines():
+    rule = AdaptiveLatencyRule(min_samples=20, window=50)
+    for _ in range(30):
+        rule.apply(_ctx(100, "fast"))
+        rule.apply(_ctx(2000, "slow"))
+    assert rule.apply(_ctx(1500, "fast"))
+    assert rule.apply(_ctx(1500, "slow")) == []
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    rule = AdaptiveLatencyRule(min_samples=20, window=50, snapshot_path=path)
+    for _ in range(30):
+        rule.apply(_ctx(100))
+    rule.save_snapshot()
+
+    restored = AdaptiveLatencyRule(min_samples=20, window=50, snapshot_path=path)
+    assert restored.apply(_ctx(1000))
+    assert restored.apply(_ctx(100)) == []
+
+
+def test_replaced_rules_are_not_kept_for_exit_snapshot(tmp_path):
+    import gc
+
+    from risk_engine.rules_advanced import adaptive_latency_rule
+
+    path = str(tmp_path / "baselines.json")
+    before = len(adaptive_latency_rule._persisted)
+    rules = [AdaptiveLatencyRule(snapshot_path=path) for _ in range(3)]
+    assert len(adaptive_latency_rule._persisted) == before + 3
+    del rules
+    gc.collect()
+    assert len(adaptive_latency_rule._persisted) == before
+
+
+def test_tool_rule_sets_do_not_touch_baselines(tmp_path):
+    from risk_engine.engine import RuleSet
+
+    path = tmp_path / "baselines.json"
+    seeded = AdaptiveLatencyRule(min_samples=20, window=50, snapshot_path=str(path))
+    for _ in range(30):
+        seeded.apply(_ctx(100))
+    seeded.save_snapshot()
+    saved = path.read_text()
+
+    policy = tmp_path / "policy.yaml"
+    policy.write_text(
+        "rules:\n"
+        "  - id: LAT-002\n"
+        "    module: risk_engine.rules_advanced.adaptive_latency_rule\n"
+        "    class: AdaptiveLatencyRule\n"
+        "    params:\n"
+        "      min_samples: 20\n"
+        "      window: 50\n"
+        f"      snapshot_path: {path}\n"
+    )
+    rule = RuleSet.from_policy(str(policy), persist_state=False).rules[0]
+    assert rule.snapshot_path is None
+    # Starts from an empty baseline rather than the service's.
+    assert rule.apply(_ctx(1000)) == []
+    rule.save_snapshot()
+    assert path.read_text() == saved
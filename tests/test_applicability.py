@@ -0,0 +1,82 @@
+import itertools
+
+from risk_engine.applicability import ApplicabilityIndex, precondition_fields
+from risk_engine.engine import RiskEngine
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity
+from risk_engine.rules_base import Rule
+
+
+class _Rule(Rule):
+    name = "test"
+
+    def __init__(self, rule_id, **preconditions):
+        self.id = rule_id
+        super().__init__()
+        for key, value in preconditions.items():
+            setattr(self, key, value)
+        self.calls = 0
+
+    def apply(self, ctx):
+        self.calls += 1
+        return [Finding(RiskType.SAFETY, Severity.LOW, self.id, self.name, "hit", {})]
+
+
+RULES = [
+    _Rule("ALWAYS"),
+    _Rule("MODEL", requires=("model_name",)),
+    _Rule("CHAT", sources=("chat", "voice")),
+    _Rule("CAPITAL", triggers={"response": ("capital",), "prompt": ("Capital Of",)}),
+    _Rule("ALL", requires=("model_name",), sources=("chat",), triggers={"response": ("capital",)}),
+]
+
+
+def _expected(ctx):
+    """Slots whose preconditions hold, checked rule by rule."""
+    out = set()
+    for slot, rule in enumerate(RULES):
+        if any(getattr(ctx, field) in (None, "") for field in rule.requires):
+            continue
+        if rule.sources is not None and ctx.source not in rule.sources:
+            continue
+        if rule.triggers and not any(
+            phrase.lower() in getattr(ctx, field).lower()
+            for field, phrases in rule.triggers.items()
+            for phrase in phrases
+        ):
+            continue
+        out.add(slot)
+    return out
+
+
+def test_index_agrees_with_rule_by_rule_checks():
+    index = ApplicabilityIndex(RULES)
+    assert not index.trivial
+    assert index.unconditional == {0}
+
+    for model, source, prompt, response in itertools.product(
+        (None, "", "m"),
+        ("chat", "voice", "api"),
+        ("hi", "the CAPITAL OF France?"),
+        ("Paris", "Its Capital is Paris"),
+    ):
+        ctx = EvaluationContext(prompt=prompt, response=response, model_name=model, source=source)
+        assert index.applicable(ctx) == _expected(ctx), ctx
+
+
+def test_trivial_index_allows_every_rule():
+    index = ApplicabilityIndex([_Rule("A"), _Rule("B")])
+    assert index.trivial
+    assert index.applicable(EvaluationContext(prompt="p", response="r")) == {0, 1}
+
+
+def test_engine_skips_inapplicable_rules():
+    rules = [_Rule("ALWAYS"), _Rule("CHAT", sources=("chat",))]
+    engine = RiskEngine(rules=rules)
+    findings = engine.evaluate(EvaluationContext(prompt="p", response="r", source="api"))
+    assert [f.rule_id for f in findings] == ["ALWAYS"]
+    assert [rule.calls for rule in rules] == [1, 0]
+
+
+def test_precondition_fields():
+    assert precondition_fields(RULES[0]) is None
+    assert precondition_fields(RULES[4]) == ("model_name", "response", "source")
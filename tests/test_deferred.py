@@ -0,0 +1,84 @@
+import time
+
+from risk_engine.deferred import JobQueue
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity
+
+
+def _ctx(text: str = "r") -> EvaluationContext:
+    return EvaluationContext(prompt="p", response=text, model_name="m")
+
+
+def _finding() -> Finding:
+    return Finding(
+        risk_type=RiskType.SAFETY,
+        severity=Severity.HIGH,
+        rule_id="T-001",
+        rule_name="Test",
+        message="found",
+    )
+
+
+def test_enqueue_claim_complete(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    assert queue.enqueue("a", _ctx("hello"))
+    assert not queue.enqueue("a", _ctx("again"))
+
+    [job] = queue.claim(limit=5)
+    assert job.interaction_id == "a"
+    assert job.context.response == "hello"
+    assert job.attempts == 1
+    assert queue.claim() == []  # leased
+
+    queue.complete(job, [_finding()])
+    result = queue.get("a")
+    assert result["status"] == "done"
+    assert [f["rule_id"] for f in result["findings"]] == ["T-001"]
+    assert queue.get("missing") is None
+    assert queue.stats() == {"queued": 0, "running": 0, "done": 1, "failed": 0}
+
+
+def test_enqueue_many_reports_duplicates(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    queue.enqueue("a", _ctx())
+    assert queue.enqueue_many([("a", _ctx()), ("b", _ctx()), ("c", _ctx())]) == [False, True, True]
+    assert [job.interaction_id for job in queue.claim(limit=10)] == ["a", "b", "c"]
+
+
+def test_failed_job_is_retried_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"), max_attempts=2)
+    queue.enqueue("a", _ctx())
+
+    [job] = queue.claim()
+    queue.fail(job, "boom")
+    assert queue.get("a")["status"] == "queued"
+
+    [job] = queue.claim()
+    assert job.attempts == 2
+    queue.fail(job, "boom again")
+    result = queue.get("a")
+    assert (result["status"], result["error"]) == ("failed", "boom again")
+    assert queue.claim() == []
+
+
+def test_expired_lease_is_reclaimed_then_failed(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"), lease_s=0.0, max_attempts=2)
+    queue.enqueue("a", _ctx())
+
+    assert queue.claim()[0].attempts == 1
+    time.sleep(0.01)
+    assert queue.claim()[0].attempts == 2
+    time.sleep(0.01)
+    assert queue.claim() == []
+    assert queue.get("a")["status"] == "failed"
+
+
+def test_purge_drops_finished_jobs_only(tmp_path):
+    queue = JobQueue(str(tmp_path / "q.sqlite3"))
+    queue.enqueue_many([("a", _ctx()), ("b", _ctx())])
+    [job] = queue.claim()
+    queue.complete(job, [])
+    time.sleep(0.01)
+
+    assert queue.purge(max_age_s=0.0) == 1
+    assert queue.get("a") is None
+    assert queue.get("b")["status"] == "queued"
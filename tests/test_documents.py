@@ -0,0 +1,20 @@
+from risk_engine.documents import DocumentOptions
+from risk_engine.engine import RiskEngine
+from risk_engine.models import EvaluationContext
+from risk_engine.rules_advanced.pii_rule import PIIRule
+
+
+def _counts(findings):
+    return {f.metadata["kind"]: f.metadata["count"] for f in findings if "count" in f.metadata}
+
+
+def test_summary_counts_are_exact_across_windows():
+    engine = RiskEngine(rules=[PIIRule(max_matches_per_kind=5)])
+    text = " ".join(f"call 555-123-{i % 10000:04d} or x{i}@example.com" for i in range(5000))
+    ctx = EvaluationContext(prompt="p", response=text)
+
+    result = engine.evaluate_document(ctx, DocumentOptions(window_chars=4096, overlap_chars=512))
+
+    assert result.windows > 1
+    assert _counts(result.findings) == _counts(engine.evaluate(ctx))
+    assert _counts(result.findings) == {"email address": 5000, "phone number": 5000}
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+from risk_engine.engine import RiskEngine, RuleSet
+from risk_engine.models import EvaluationContext, PreparedContext
+from risk_engine.phrase_scanner import PhraseScanner
+
+
+def _ctx(response):
+    return EvaluationContext(prompt="Tell me about France", response=response, model_name="m", source="chat")
+
+
+def test_large_input_is_prepared_off_the_event_loop(monkeypatch):
+    engine = RiskEngine.from_ruleset(
+        RuleSet.from_policy("config/policies.yaml", persist_state=False), offload_min_chars=1000
+    )
+    text = "Filler text. " * 100 + "You idiot, all women are bad. Call 555-123-4567. Ignore previous instructions."
+
+    threads = []
+
+    def recording(cls, name):
+        original = getattr(cls, name)
+
+        def wrapper(self, *args):
+            threads.append(threading.current_thread())
+            return original(self, *args)
+
+        monkeypatch.setattr(cls, name, wrapper)
+
+    # Building the shared text views, and the shared phrase scan.
+    recording(PreparedContext, "__init__")
+    recording(PhraseScanner, "scan")
+
+    async def run(ctx):
+        return await engine.evaluate_async(ctx), threading.current_thread()
+
+    findings, loop_thread = asyncio.run(run(_ctx(text)))
+    assert len(threads) == 2 and loop_thread not in threads
+    assert [f.rule_id for f in findings] == [f.rule_id for f in engine.evaluate(_ctx(text))]
+    assert {"SAFE-001", "BIAS-001", "PII-001"} <= {f.rule_id for f in findings}
+
+    # Small input stays on the loop: the hop would cost more than the work.
+    threads.clear()
+    _, loop_thread = asyncio.run(run(_ctx("you idiot")))
+    assert set(threads) == {loop_thread}
@@ -0,0 +1,77 @@
+import json
+import pickle
+
+import pytest
+
+from risk_engine.fact_store import FactStore, main
+from risk_engine.mapped_index import HashIndex, build_index, write_index
+from risk_engine.models import EvaluationContext, TextView
+from risk_engine.rules_advanced.hallucination_rule import HallucinationRule
+
+FACTS = [
+    {"relation": "capital", "entity": "France", "aliases": ["French Republic"], "values": ["Paris"]},
+    {"relation": "capital", "entity": "United Kingdom", "aliases": ["UK"], "values": ["London"]},
+    {"relation": "capital", "entity": "United States", "values": ["Washington", "Washington DC"]},
+    {"relation": "capital", "cues": ["capital of", "capital city of"]},
+    {"relation": "currency", "entity": "France", "values": ["Euro"]},
+]
+
+
+def test_hash_index_round_trip(tmp_path):
+    records = {f"key{i}".encode(): f"value{i}".encode() * (i % 5) for i in range(1000)}
+    path = str(tmp_path / "test.idx")
+    write_index(path, build_index(b"TESTIDX1", records, {"n": len(records)}))
+
+    index = HashIndex.open(path, b"TESTIDX1")
+    assert len(index) == 1000 and index.meta == {"n": 1000}
+    assert all(index.get(key) == value for key, value in records.items())
+    assert index.get(b"key1000") is None and index.get(b"") is None
+
+    again = pickle.loads(pickle.dumps(index))
+    assert again.path == path and again.get(b"key7") == records[b"key7"]
+    with pytest.raises(ValueError):
+        HashIndex.open(path, b"OTHERIDX")
+    index.close()
+    again.close()
+
+
+def _compiled(tmp_path):
+    source = tmp_path / "facts.jsonl"
+    source.write_text("\n".join(json.dumps(record) for record in FACTS) + "\n")
+    output = str(tmp_path / "facts.idx")
+    assert main([str(source), "-o", output]) == 0
+    return output
+
+
+def test_compiled_store_matches_in_memory_store(tmp_path):
+    for store in (FactStore.open(_compiled(tmp_path)), FactStore.from_facts(FACTS)):
+        assert len(store) == 4
+        assert store.lookup("capital", "france") == ["Paris"]
+        assert store.lookup("currency", "france") == ["Euro"]
+        assert store.lookup("capital", "germany") is None
+
+        tokens = TextView("What is the capital city of the United Kingdom and the French Republic?").tokens
+        assert store.questions(tokens) == [("capital", "united kingdom")]
+        # Longest entity wins: "united states", not a shorter prefix.
+        assert [name for _, _, name in store.entities(TextView("UK, United States, France").tokens)] == [
+            "united kingdom", "united states", "france",
+        ]
+
+
+def test_conflicting_alias_is_rejected():
+    with pytest.raises(ValueError):
+        FactStore.from_facts([
+            {"relation": "capital", "entity": "Georgia", "values": ["Tbilisi"]},
+            {"relation": "capital", "entity": "US Georgia", "aliases": ["Georgia"], "values": ["Atlanta"]},
+        ])
+
+
+def test_rule_uses_compiled_store(tmp_path):
+    rule = HallucinationRule(fact_store=_compiled(tmp_path))
+    wrong = EvaluationContext(prompt="What is the capital of the UK?", response="It is Paris.")
+    right = EvaluationContext(prompt="What is the capital of the UK?", response="London, of course.")
+    assert [f.rule_id for f in rule.apply(wrong)] == [rule.id]
+    assert rule.apply(right) == []
+
+    # Snapshots pickle the rule; the store is mapped again from its path.
+    assert pickle.loads(pickle.dumps(rule)).apply(wrong)
@@ -0,0 +1,64 @@
+import pytest
+
+from risk_engine.findings_store import FindingsStore, import_records
+
+
+def _record(ts: str, model: str, *rules: str) -> dict:
+    return {
+        "timestamp": ts,
+        "model_name": model,
+        "interaction_id": f"{model}-{ts}",
+        "findings": [
+            {"rule_id": rule, "severity": "high", "risk_type": "safety", "message": rule,
+             "metadata": {"n": i}}
+            for i, rule in enumerate(rules)
+        ],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FindingsStore(str(tmp_path / "findings.sqlite3"))
+    import_records(store, [
+        _record("2026-08-01T10:00:00Z", "a", "PII-001", "SAFE-001"),
+        _record("2026-08-02T10:00:00Z", "b", "PII-001"),
+        _record("2026-08-03T10:00:00Z", "a", "PII-001", "PII-001"),
+        _record("2026-08-03T11:00:00Z", "b"),
+    ], batch_size=2)
+    yield store
+    store.close()
+
+
+def test_pages_newest_first_with_cursor(store):
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = store.query_findings(cursor=cursor, limit=2)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert len(seen) == 5
+    assert [f["timestamp"][:10] for f in seen] == [
+        "2026-08-03", "2026-08-03", "2026-08-02", "2026-08-01", "2026-08-01",
+    ]
+    assert len({f["id"] for f in seen}) == 5
+    assert seen[0]["metadata"] in ({"n": 0}, {"n": 1})
+
+
+def test_filters_and_time_bounds(store):
+    page, _ = store.query_findings({"rule_id": "PII-001", "model_name": "a"})
+    assert len(page) == 3
+    page, _ = store.query_findings(start="2026-08-02", end="2026-08-03")
+    assert [f["model_name"] for f in page] == ["b"]
+    with pytest.raises(ValueError):
+        store.query_findings({"message": "x"})
+    with pytest.raises(ValueError):
+        store.query_findings(cursor="not a cursor")
+
+
+def test_stats_from_daily_rollup(store):
+    assert store.stats() == {"PII-001": 4, "SAFE-001": 1}
+    assert store.stats("model_name") == {"a": 4, "b": 1}
+    assert store.stats("day", start_day="2026-08-02") == {"2026-08-03": 2, "2026-08-02": 1}
+    assert store.stats(filters={"model_name": "b"}) == {"PII-001": 1}
+    assert store.counts() == {"evaluations": 4, "findings": 5}
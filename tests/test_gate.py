@@ -0,0 +1,61 @@
+from risk_engine.engine import RiskEngine
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity
+from risk_engine.rules_base import Rule
+
+
+class _Rule(Rule):
+    name = "test"
+    fires = True
+    emits = None  # severity of the finding; max_severity by default
+
+    def __init__(self, rule_id, cost, max_severity=Severity.CRITICAL, **attrs):
+        self.id = rule_id
+        super().__init__()
+        self.cost = cost
+        self.max_severity = max_severity
+        self.calls = 0
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
+    def apply(self, ctx):
+        self.calls += 1
+        if not self.fires:
+            return []
+        return [Finding(RiskType.SAFETY, self.emits or self.max_severity, self.id, self.name, "hit", {})]
+
+
+def _ctx(source="api"):
+    return EvaluationContext(prompt="p", response="r", source=source)
+
+
+def test_gate_counts_every_rule_once():
+    rules = [
+        _Rule("LOW", cost=1, max_severity=Severity.LOW),   # cannot reach the gate
+        _Rule("CHAT", cost=2, sources=("chat",)),          # preconditions fail
+        _Rule("DEFER", cost=0, tier="deferred"),
+        _Rule("QUIET", cost=3, fires=False),
+        _Rule("HIT", cost=4),
+        _Rule("LATE", cost=5),                             # after the gate tripped
+    ]
+    engine = RiskEngine(rules=rules)
+
+    gate = engine.evaluate_gate(_ctx(), stop_severity=Severity.CRITICAL)
+    assert gate.triggered
+    assert [f.rule_id for f in gate.findings] == ["HIT"]
+    assert (gate.rules_run, gate.rules_inapplicable, gate.rules_deferred, gate.rules_skipped) == (2, 1, 1, 2)
+    assert [r.id for r in rules if r.calls] == ["QUIET", "HIT"]
+
+
+def test_gate_runs_applicable_rules_and_stops_at_max_findings():
+    rules = [_Rule("CHAT", cost=1, sources=("chat",)), _Rule("A", cost=2), _Rule("B", cost=3)]
+    engine = RiskEngine(rules=rules)
+
+    gate = engine.evaluate_gate(_ctx("chat"), stop_severity=Severity.CRITICAL)
+    assert [f.rule_id for f in gate.findings] == ["CHAT"]
+    assert (gate.rules_run, gate.rules_inapplicable, gate.rules_skipped) == (1, 0, 2)
+
+    low = [_Rule(rule_id, cost=i, emits=Severity.LOW) for i, rule_id in enumerate("XYZ")]
+    gate = RiskEngine(rules=low).evaluate_gate(_ctx(), stop_severity=Severity.CRITICAL, max_findings=2)
+    assert not gate.triggered
+    assert [f.rule_id for f in gate.findings] == ["X", "Y"]
+    assert (gate.rules_run, gate.rules_skipped) == (2, 1)
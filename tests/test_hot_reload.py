@@ -0,0 +1,83 @@
+import os
+
+from risk_engine.engine import RiskEngine, RuleSet
+from risk_engine.hot_reload import PolicyReloader
+from risk_engine.models import EvaluationContext, Severity
+from risk_engine.result_cache import ResultCache
+
+POLICY = """
+rules:
+  - id: SAFE-001
+    module: risk_engine.rules_builtin
+    class: ToxicKeywordRule
+    params:
+      blocked_terms: ["idiot"]
+      lexicons: ["{lexicon}"]
+policy:
+  version: 1.0
+  metrics:
+    sample_every: {sample_every}
+  gate:
+    stop_severity: {stop_severity}
+"""
+
+
+def _write(path, text, bump=0):
+    path.write_text(text)
+    # Later than anything written before, whatever the mtime granularity.
+    stamp = os.path.getmtime(path) + bump
+    os.utime(path, (stamp, stamp))
+
+
+def _setup(tmp_path, **options):
+    lexicon = tmp_path / "terms.txt"
+    _write(lexicon, "dolt\n")
+    policy = tmp_path / "policy.yaml"
+    _write(policy, _policy(lexicon, **options))
+    ruleset = RuleSet.from_policy(str(policy), persist_state=False)
+    engine = RiskEngine.from_ruleset(ruleset)
+    engine.apply_policy_options(ruleset.policy_meta)
+    return engine, PolicyReloader(engine, str(policy)), policy, lexicon
+
+
+def _policy(lexicon, sample_every=4, stop_severity="critical"):
+    return POLICY.format(lexicon=lexicon, sample_every=sample_every, stop_severity=stop_severity)
+
+
+def _hits(engine, text):
+    return [f.rule_id for f in engine.evaluate(EvaluationContext(prompt="p", response=text))]
+
+
+def test_unchanged_policy_is_not_reloaded(tmp_path):
+    engine, reloader, policy, _ = _setup(tmp_path)
+    _write(policy, policy.read_text(), bump=5)  # touched, same content
+    assert not reloader.reload()
+    assert reloader.reload_count == 0 and reloader.last_error is None
+
+
+def test_lexicon_edit_reloads_without_version_bump(tmp_path):
+    engine, reloader, _, lexicon = _setup(tmp_path)
+    version = engine.policy_version
+    assert _hits(engine, "you dolt") == ["SAFE-001"]
+    assert _hits(engine, "you nitwit") == []
+
+    _write(lexicon, "dolt\nnitwit\n", bump=5)
+    assert reloader.reload()
+    assert engine.policy_version == version
+    assert _hits(engine, "you nitwit") == ["SAFE-001"]
+    assert not reloader.reload()
+
+
+def test_engine_options_are_reapplied(tmp_path):
+    engine, reloader, policy, lexicon = _setup(tmp_path)
+    metrics = engine.metrics
+    engine.evaluate(EvaluationContext(prompt="p", response="you dolt"))
+    cache = engine.result_cache = ResultCache()  # set in code; not in the policy
+
+    _write(policy, _policy(lexicon, sample_every=16, stop_severity="high"), bump=5)
+    assert reloader.reload()
+    assert engine.gate_severity == Severity.HIGH
+    assert engine.result_cache is cache
+    # Reconfigured in place: the counters survive.
+    assert engine.metrics is metrics and metrics.sample_every == 16
+    assert metrics.rules["SAFE-001"].calls == 1
@@ -0,0 +1,83 @@
+import errno
+import os
+import pickle
+
+from risk_engine import lexicon as lexicon_module
+from risk_engine.engine import RiskEngine
+from risk_engine.lexicon import Lexicon, load_lexicon
+from risk_engine.models import EvaluationContext, TextView
+from risk_engine.rules_builtin import ToxicKeywordRule
+
+TERMS = "# insults\nkill\n\nTake  Down\nwell-known scam\nkill\n"
+
+
+def _find(lexicon, text):
+    return lexicon.find(TextView(text).tokens)
+
+
+def _source(tmp_path, text=TERMS):
+    path = tmp_path / "terms.txt"
+    path.write_text(text)
+    return str(path)
+
+
+def test_whole_word_and_phrase_matching():
+    lexicon = Lexicon.from_terms(TERMS.splitlines()[1:])
+    assert len(lexicon) == 3
+    assert _find(lexicon, "skill and killer") == set()
+    assert _find(lexicon, "KILL it!") == {"kill"}
+    # Phrases match across any whitespace or punctuation; the first spelling is reported.
+    assert _find(lexicon, "take\ndown the well known, scam") == {"Take Down", "well-known scam"}
+    assert _find(lexicon, "a well-known new scam") == set()
+    assert _find(lexicon, "take") == set()
+
+
+def test_compiled_file_round_trip(tmp_path):
+    source = _source(tmp_path)
+    lexicon = load_lexicon(source)
+    assert os.path.exists(source + ".lex")
+    assert lexicon.source == source
+    assert load_lexicon(source) is lexicon  # shared while the file is unchanged
+    assert load_lexicon(source + ".lex") is lexicon
+    assert _find(lexicon, "kill") == {"kill"}
+
+    again = pickle.loads(pickle.dumps(lexicon))
+    assert _find(again, "take down") == {"Take Down"}
+
+
+def test_edited_source_is_recompiled(tmp_path):
+    source = _source(tmp_path)
+    old = load_lexicon(source)
+    with open(source, "a") as f:
+        f.write("nitwit\n")
+    later = os.path.getmtime(source + ".lex") + 5
+    os.utime(source, (later, later))
+
+    new = load_lexicon(source)
+    assert new is not old
+    assert _find(new, "you nitwit") == {"nitwit"}
+
+
+def test_phrase_rule_reports_lexicon_terms(tmp_path):
+    rule = ToxicKeywordRule(blocked_terms=["idiot"], lexicons=[_source(tmp_path)])
+    engine = RiskEngine(rules=[rule])
+    findings = engine.evaluate(EvaluationContext(prompt="p", response="They will take down the skill tree."))
+    assert [f.rule_id for f in findings] == ["SAFE-001"]
+    assert "Take Down" in findings[0].message
+    assert engine.evaluate(EvaluationContext(prompt="p", response="skills")) == []
+
+
+def test_unwritable_directory_compiles_in_memory(tmp_path, monkeypatch):
+    def read_only(path, blob):
+        raise OSError(errno.EROFS, "Read-only file system", path)
+
+    monkeypatch.setattr(lexicon_module, "write_index", read_only)
+    source = _source(tmp_path)
+    lexicon = load_lexicon(source)
+    assert not os.path.exists(source + ".lex")
+    assert lexicon.source == source
+    assert load_lexicon(source) is lexicon
+    assert _find(lexicon, "KILL it") == {"kill"}
+
+    # Pickled by reference to the source, as snapshots need.
+    assert _find(pickle.loads(pickle.dumps(lexicon)), "take down") == {"Take Down"}
@@ -0,0 +1,116 @@
+import json
+import threading
+
+from risk_engine.log_sink import LogSink
+
+
+class _Target:
+    """In-memory sink target; append() waits while `gate` is cleared."""
+
+    def __init__(self):
+        self.lines = []
+        self.closed = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def append(self, lines, timestamps):
+        self.gate.wait()
+        self.lines.extend(json.loads(line) for line in lines)
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class _Store(_Target):
+    """Transactional record target that rejects records without a "rule_id"."""
+
+    def append_records(self, records):
+        self.lines.extend([r["rule_id"] for r in records])
+
+
+def _circular():
+    record = {"i": "circular"}
+    record["self"] = record
+    return record
+
+
+def test_bad_record_is_dropped_alone(tmp_path):
+    target = _Target()
+    sink = LogSink(str(tmp_path / "x.jsonl"), target=target, flush_interval=0.01)
+    sink.submit({"i": 1, "extra": {"tags": {"a"}}})  # a set: written with str()
+    sink.submit(_circular())
+    sink.submit({"i": 3})
+    assert sink.flush(timeout=5)
+
+    assert [r["i"] for r in target.lines] == [1, 3]
+    assert target.lines[0]["extra"]["tags"] == "{'a'}"
+    assert (sink.written, sink.errors) == (2, 1)
+    sink.close()
+
+
+def test_writer_survives_target_exceptions(tmp_path):
+    target = _Store()
+    sink = LogSink(str(tmp_path / "x.sqlite3"), target=target, flush_interval=0.01)
+    for record in ({"rule_id": "A"}, {"oops": True}, {"rule_id": "B"}):
+        sink.submit(record)
+    assert sink.flush(timeout=5)
+    assert target.lines == ["A", "B"]
+    assert sink.errors == 1 and sink.last_error.startswith("KeyError")
+
+    sink.submit({"rule_id": "C"})
+    assert sink.flush(timeout=5)
+    assert target.lines == ["A", "B", "C"]
+    sink.close()
+
+
+def test_full_queue_drop_and_block(tmp_path):
+    target = _Target()
+    target.gate.clear()
+    sink = LogSink(str(tmp_path / "x.jsonl"), target=target, max_queue=2, max_batch=1,
+                   on_full="drop", flush_interval=0.01)
+    results = [sink.submit({"i": i}) for i in range(10)]
+    assert not all(results)
+    assert sink.dropped == results.count(False)
+    target.gate.set()
+    assert sink.flush(timeout=5)
+    assert len(target.lines) == results.count(True)
+    sink.close()
+
+    target = _Target()
+    target.gate.clear()
+    sink = LogSink(str(tmp_path / "y.jsonl"), target=target, max_queue=2, max_batch=1,
+                   on_full="block", flush_interval=0.01)
+    producer = threading.Thread(target=lambda: [sink.submit({"i": i}) for i in range(10)])
+    producer.start()
+    producer.join(timeout=0.3)
+    assert producer.is_alive()  # waiting for queue space
+    target.gate.set()
+    producer.join(timeout=5)
+    assert sink.flush(timeout=5)
+    assert [r["i"] for r in target.lines] == list(range(10))
+    assert sink.dropped == 0
+    sink.close()
+
+
+def test_close_writes_queued_records(tmp_path):
+    target = _Target()
+    sink = LogSink(str(tmp_path / "x.jsonl"), target=target, flush_interval=60)
+    for i in range(100):
+        sink.submit({"i": i})
+    sink.close(timeout=5)
+    assert [r["i"] for r in target.lines] == list(range(100))
+    assert target.closed
+
+
+def test_flush_times_out_instead_of_hanging(tmp_path):
+    target = _Target()
+    target.gate.clear()
+    sink = LogSink(str(tmp_path / "x.jsonl"), target=target, flush_interval=0.01)
+    sink.submit({"i": 1})
+    assert not sink.flush(timeout=0.1)
+    target.gate.set()
+    assert sink.flush(timeout=5)
+    sink.close()
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+
+from risk_engine.log_store import SegmentedLogStore, iter_log_records
+
+
+def _lines(n, start=0, day="2026-01-01"):
+    records = [
+        {"timestamp": f"{day}T00:00:{i % 60:02d}.{i:06d}Z", "i": i} for i in range(start, start + n)
+    ]
+    return [(json.dumps(r) + "\n").encode() for r in records], [r["timestamp"] for r in records]
+
+
+def test_round_trip_rollover_and_compression(tmp_path):
+    store = SegmentedLogStore(str(tmp_path), max_segment_bytes=2000, checkpoint_every=5)
+    for batch in range(10):
+        store.append(*_lines(10, start=batch * 10))
+    store.close()
+
+    segments = store.read_index()["segments"]
+    assert len(segments) > 1
+    assert all(not s["active"] and s["compressed"] for s in segments)
+    assert sum(s["records"] for s in segments) == 100
+    assert [r["i"] for r in store.iter_records()] == list(range(100))
+
+
+def test_time_window_reads(tmp_path):
+    store = SegmentedLogStore(str(tmp_path), max_segment_bytes=1000, checkpoint_every=3)
+    store.append(*_lines(20, day="2026-01-01"))
+    store.append(*_lines(20, start=20, day="2026-01-02"))
+    store.close()
+
+    day2 = list(store.iter_records("2026-01-02", "2026-01-03"))
+    assert [r["i"] for r in day2] == list(range(20, 40))
+    assert list(iter_log_records(str(tmp_path), end="2026-01-01T23")) == list(
+        store.iter_records(end="2026-01-01T23")
+    )
+
+
+def test_second_store_in_process_keeps_live_segment(tmp_path):
+    first = SegmentedLogStore(str(tmp_path))
+    first.append(*_lines(5))
+    # e.g. open_sink() replacing a sink builds its store before closing the old one.
+    second = SegmentedLogStore(str(tmp_path))
+    second.append(*_lines(5, start=5))
+
+    first.append(*_lines(5, start=10))
+    first.close()
+    second.close()
+    assert sorted(r["i"] for r in first.iter_records()) == list(range(15))
+
+
+def test_recovers_segment_of_dead_writer(tmp_path):
+    # A writer process that dies without closing its store.
+    script = (
+        "import json, os, sys\n"
+        "from risk_engine.log_store import SegmentedLogStore\n"
+        "store = SegmentedLogStore(sys.argv[1], index_interval_s=0)\n"
+        "for i in range(7):\n"
+        "    line = json.dumps({'timestamp': '2026-01-01T00:00:0%dZ' % i, 'i': i}) + '\\n'\n"
+        "    store.append([line.encode()], [None])\n"
+        "os._exit(0)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    subprocess.run([sys.executable, "-c", script, str(tmp_path)], check=True, env=env)
+    [entry] = SegmentedLogStore(str(tmp_path)).read_index()["segments"]
+    assert entry["active"]
+
+    store = SegmentedLogStore(str(tmp_path))
+    store.append(*_lines(1, start=7))
+    store.close()
+
+    recovered = store.read_index()["segments"][0]
+    assert not recovered["active"] and recovered["compressed"]
+    assert recovered["records"] == 7
+    assert recovered["first_ts"] == "2026-01-01T00:00:00Z"
+    assert sorted(r["i"] for r in store.iter_records()) == list(range(8))
+
+
+def test_imports_legacy_single_file_log(tmp_path):
+    legacy = tmp_path / "risks.jsonl"
+    lines, _ = _lines(4, day="2025-12-31")
+    legacy.write_bytes(b"".join(lines))
+
+    store = SegmentedLogStore(str(tmp_path / "risks"))
+    store.append(*_lines(3, start=4))
+    store.close()
+
+    assert not legacy.exists()
+    oldest = store.read_index()["segments"][0]
+    assert oldest["legacy"] == "risks.jsonl" and oldest["records"] == 4
+    assert [r["i"] for r in store.iter_records()] == list(range(7))
+    assert [r["i"] for r in store.iter_records(end="2025-12-31T23")] == list(range(4))
+    # Only once.
+    assert SegmentedLogStore(str(tmp_path / "risks")).import_legacy() is False
@@ -0,0 +1,73 @@
+import threading
+
+from risk_engine.engine import RiskEngine
+from risk_engine.metrics import EngineMetrics
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity
+from risk_engine.rules_base import Rule
+
+
+class _Rule(Rule):
+    name = "test"
+
+    def __init__(self, rule_id, result="hit", **preconditions):
+        self.id = rule_id
+        super().__init__()
+        self.result = result
+        for key, value in preconditions.items():
+            setattr(self, key, value)
+
+    def apply(self, ctx):
+        if self.result == "raise":
+            raise RuntimeError("boom")
+        if self.result == "hit":
+            return [Finding(RiskType.SAFETY, Severity.CRITICAL, self.id, self.name, "hit", {})]
+        return []
+
+
+class _CountingLock:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquired = 0
+
+    def __enter__(self):
+        self.acquired += 1
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+
+
+def _engine():
+    rules = [
+        _Rule("HIT"),
+        _Rule("QUIET", result=None),
+        _Rule("BROKEN", result="raise"),
+        _Rule("CHAT", sources=("chat",)),
+    ]
+    return RiskEngine(rules=rules, metrics=EngineMetrics(sample_every=2))
+
+
+def test_one_lock_acquisition_per_evaluation():
+    engine = _engine()
+    lock = engine.metrics._lock = _CountingLock()
+    ctx = EvaluationContext(prompt="p", response="r", source="api")
+    for _ in range(3):
+        engine.evaluate(ctx)
+    assert lock.acquired == 3
+
+    stats = engine.metrics.snapshot()
+    assert stats["HIT"] == {"calls": 3, "skipped": 0, "findings": 3, "errors": 0}
+    assert stats["QUIET"]["findings"] == 0
+    assert stats["BROKEN"]["errors"] == 3
+    assert stats["CHAT"] == {"calls": 0, "skipped": 3, "findings": 0, "errors": 0}
+    # Every other evaluation is timed.
+    assert engine.metrics.rules["HIT"].duration.count == 2
+
+
+def test_gate_records_only_the_rules_it_ran():
+    engine = _engine()
+    gate = engine.evaluate_gate(EvaluationContext(prompt="p", response="r", source="api"))
+    assert gate.triggered
+    stats = engine.metrics.snapshot()
+    assert stats["HIT"]["calls"] == 1
+    assert "QUIET" not in stats
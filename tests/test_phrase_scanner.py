@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from risk_engine.models import EvaluationContext
+from risk_engine.phrase_scanner import SUBSTRING_SCAN_LIMIT, PhraseAutomaton, PhraseScanner
+from risk_engine.rules_builtin import BiasHeuristicRule, ToxicKeywordRule
+
+
+def _phrases(rng, n):
+    # A small alphabet, so phrases overlap and are prefixes of each other.
+    phrases = set()
+    while len(phrases) < n:
+        phrases.add("".join(rng.choice("ab c") for _ in range(rng.randint(1, 6))))
+    return sorted(phrases)
+
+
+@pytest.mark.parametrize("n", [1, SUBSTRING_SCAN_LIMIT, SUBSTRING_SCAN_LIMIT + 1, 300])
+def test_automaton_matches_substring_search(n):
+    rng = random.Random(n)
+    phrases = _phrases(rng, n)
+    # Repeated phrases keep every payload.
+    entries = [(p, i) for i, p in enumerate(phrases)] + [(phrases[0], "dup")]
+    automaton = PhraseAutomaton(entries)
+    assert len(automaton) == n
+
+    for _ in range(200):
+        text = "".join(rng.choice("ab cd") for _ in range(rng.randint(0, 40)))
+        expected = {payload for phrase, payload in entries if phrase in text}
+        assert automaton.scan(text) == expected, text
+
+
+def test_empty_automaton_and_empty_phrase():
+    assert PhraseAutomaton().scan("anything") == set()
+    assert PhraseAutomaton([("", 1), ("x", 2)]).scan("abc") == {1}
+
+
+@pytest.mark.parametrize("n", [5, SUBSTRING_SCAN_LIMIT * 2])
+def test_scanner_credits_each_rule(n):
+    rng = random.Random(n)
+    toxic = ToxicKeywordRule(blocked_terms=[f"Bad{i}" for i in range(n)] + ["Kill"])
+    bias = BiasHeuristicRule()
+    scanner = PhraseScanner([toxic, bias])
+
+    for _ in range(50):
+        words = [f"bad{rng.randrange(n * 2)}" for _ in range(3)] + ["KILLER", "all women are"]
+        rng.shuffle(words)
+        ctx = EvaluationContext(prompt="p", response=" ".join(words[:rng.randint(0, 5)]))
+        matches = scanner.scan(ctx)
+        for rule in (toxic, bias):
+            text = ctx.response.lower()
+            expected = {i for i, p in enumerate(rule.get_phrases()) if p.lower() in text}
+            assert matches.get(rule, {}).get("response", set()) == expected
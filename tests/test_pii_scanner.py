@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from risk_engine.pii_scanner import CARD, EMAIL, PHONE, SSN, PIIScanner
+
+
+def _found(text):
+    return [(m.kind, text[m.start:m.end]) for m in PIIScanner().scan(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "2024-01-15 10:30:00 INFO worker started",
+    "2024-01-15T10:30:00Z",
+    "released on 2024-01-15, patched 2024-02-01 1030",
+    "row: 12 34 56 78 90",
+])
+def test_dates_and_timestamps_are_not_pii(text):
+    assert _found(text) == []
+
+
+@pytest.mark.parametrize("text, match", [
+    ("call 555-123-4567 now", "555-123-4567"),
+    ("call (555) 123-4567 now", "(555) 123-4567"),
+    ("call +1 555 123 4567 now", "+1 555 123 4567"),
+    ("call 1-555-123-4567 now", "1-555-123-4567"),
+    ("call +44 20 7946 0958 now", "+44 20 7946 0958"),
+])
+def test_phone_numbers(text, match):
+    assert _found(text) == [(PHONE, match)]
+
+
+def test_cards_must_pass_luhn():
+    assert _found("card 4111 1111 1111 1111 ok") == [(CARD, "4111 1111 1111 1111")]
+    assert _found("card 4111111111111111 ok") == [(CARD, "4111111111111111")]
+    assert _found("card 4111 1111 1111 1112 ok") == []
+
+
+def test_ssn_and_email():
+    assert _found("ssn 123-45-6789, mail jane.doe+x@example.co.uk") == [
+        (EMAIL, "jane.doe+x@example.co.uk"),
+        (SSN, "123-45-6789"),
+    ]
+
+
+def test_adversarial_digit_runs_scan_in_linear_time():
+    def seconds(n):
+        text = "1 2-3.4(5 " * n  # one unbroken numeric run
+        started = time.perf_counter()
+        PIIScanner().scan(text)
+        return time.perf_counter() - started
+
+    small = min(seconds(1_000) for _ in range(3))
+    large = min(seconds(8_000) for _ in range(3))
+    # 8x the input; a quadratic scan would take ~64x as long.
+    assert large < small * 20
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from risk_engine import replay
+from risk_engine.engine import RiskEngine
+from risk_engine.models import EvaluationContext, dump_findings
+from risk_engine.rules_builtin import ToxicKeywordRule
+
+POLICY = """
+rules:
+  - id: SAFE-001
+    module: risk_engine.rules_builtin
+    class: ToxicKeywordRule
+    params:
+      blocked_terms: ["idiot", "dolt"]
+policy:
+  version: 2.0
+"""
+
+WORDS = ["idiot", "stupid", "dolt", "fine", "hello"]
+
+
+def _write_log(path, n=60):
+    # Logged under an older blocklist: "stupid" is dropped and "dolt" added.
+    logged = RiskEngine(rules=[ToxicKeywordRule(blocked_terms=["idiot", "stupid"])])
+    with open(path, "w") as f:
+        for i in range(n):
+            ctx = EvaluationContext(
+                prompt="p", response=f"{WORDS[i % 5]} and {WORDS[i % 3]}", model_name=f"m{i % 2}"
+            )
+            record = {
+                "timestamp": f"2026-10-01T00:{i // 60:02d}:{i % 60:02d}Z",
+                **ctx.model_dump(mode="json"),
+                "findings": dump_findings(logged.evaluate(ctx), mode="json"),
+            }
+            f.write(json.dumps(record) + "\n")
+            if i % 10 == 0:
+                f.write(json.dumps({"note": "no findings"}) + "\n")
+
+
+def _run(tmp_path, name, *extra):
+    output = tmp_path / f"{name}.json"
+    args = [
+        "--policy", str(tmp_path / "candidate.yaml"), "--log", str(tmp_path / "log.jsonl"),
+        "--workers", "1", "--chunk-size", "7", "--json", str(output), *extra,
+    ]
+    assert replay.main(args) == 0
+    return json.loads(output.read_text())["diff"]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    (tmp_path / "candidate.yaml").write_text(POLICY)
+    _write_log(tmp_path / "log.jsonl")
+    return tmp_path
+
+
+def test_replay_counts_added_and_removed(setup):
+    diff = _run(setup, "full")
+    assert diff["records"] == 60 and diff["skipped"] == 6 and diff["errors"] == 0
+    assert diff["changed"] > 0
+    added, removed, unchanged = diff["by_rule"]["SAFE-001"]
+    assert added and removed and unchanged
+    assert set(diff["by_model"]) == {"m0", "m1"}
+
+
+def test_resumed_replay_matches_uninterrupted_run(setup, monkeypatch):
+    expected = _run(setup, "full")
+    checkpoint = str(setup / "replay.ckpt")
+    map_chunks = replay.map_chunks
+
+    def interrupted(*args, **kwargs):
+        for i, result in enumerate(map_chunks(*args, **kwargs)):
+            if i == 4:
+                raise KeyboardInterrupt
+            yield result
+
+    monkeypatch.setattr(replay, "map_chunks", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        _run(setup, "partial", "--checkpoint", checkpoint, "--checkpoint-every", "0")
+    saved = json.load(open(checkpoint))
+    assert 0 < saved["diff"]["records"] < expected["records"]
+
+    monkeypatch.setattr(replay, "map_chunks", map_chunks)
+    assert _run(setup, "resumed", "--checkpoint", checkpoint) == expected
+
+
+def test_checkpoint_only_resumes_the_same_replay_and_log(setup):
+    checkpoint = str(setup / "replay.ckpt")
+    _run(setup, "full", "--checkpoint", checkpoint)
+
+    with pytest.raises(SystemExit):
+        _run(setup, "other", "--checkpoint", checkpoint, "--start", "2026-10-02")
+
+    # Appended to: the resumed replay only adds the new records.
+    _write_log(setup / "log.jsonl", n=70)
+    assert _run(setup, "appended", "--checkpoint", checkpoint)["records"] == 70
+
+    log = setup / "log.jsonl"
+    log.write_text("".join(reversed(log.read_text().splitlines(keepends=True))))
+    with pytest.raises(SystemExit):
+        _run(setup, "changed", "--checkpoint", checkpoint)
+    assert _run(setup, "restarted", "--checkpoint", checkpoint, "--restart")["records"] == 70
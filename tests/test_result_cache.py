@@ -0,0 +1,66 @@
+from risk_engine.engine import RiskEngine, RuleSet
+from risk_engine.models import EvaluationContext, Finding, RiskType, Severity
+from risk_engine.result_cache import ResultCache
+from risk_engine.rules_base import Rule
+
+
+class _Counting(Rule):
+    name = "counting"
+
+    def __init__(self, rule_id, reads):
+        self.id = rule_id
+        super().__init__()
+        self.reads = reads
+        self.calls = 0
+
+    def apply(self, ctx):
+        self.calls += 1
+        return [Finding(RiskType.SAFETY, Severity.LOW, self.id, self.name, ctx.response, {})]
+
+
+def _ctx(response="r", prompt="p", latency_ms=1.0):
+    return EvaluationContext(prompt=prompt, response=response, latency_ms=latency_ms)
+
+
+def test_key_covers_only_the_fields_a_rule_reads():
+    response_rule = _Counting("RESP", ("response",))
+    latency_rule = _Counting("LAT", ("latency_ms",))  # volatile: never cached
+    opaque_rule = _Counting("ANY", None)  # reads undeclared: never cached
+    engine = RiskEngine(rules=[response_rule, latency_rule, opaque_rule], result_cache=ResultCache())
+
+    first = engine.evaluate(_ctx())
+    again = engine.evaluate(_ctx(prompt="other", latency_ms=2.0))
+    assert [f.rule_id for f in again] == [f.rule_id for f in first] == ["RESP", "LAT", "ANY"]
+    assert (response_rule.calls, latency_rule.calls, opaque_rule.calls) == (1, 2, 2)
+
+    changed = engine.evaluate(_ctx(response="s"))
+    assert response_rule.calls == 2
+    assert changed[0].message == "s"
+    assert engine.result_cache.stats()["hits"] == 1
+
+
+def test_lru_eviction_and_size_limit():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", ([],))
+    cache.put("b", ([],))
+    assert cache.get("a") is not None  # now most recently used
+    cache.put("c", ([],))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1
+
+    tiny = ResultCache(max_bytes=10)
+    tiny.put("a", ([],))
+    assert len(tiny) == 0
+
+
+def test_swapped_ruleset_does_not_reuse_findings():
+    rule = _Counting("RESP", ("response",))
+    engine = RiskEngine(rules=[rule], result_cache=ResultCache())
+    engine.evaluate(_ctx())
+    engine.evaluate(_ctx())
+    assert rule.calls == 1
+
+    engine.swap_ruleset(RuleSet([rule], policy_version=engine.policy_version))
+    engine.evaluate(_ctx())
+    assert rule.calls == 2
@@ -0,0 +1,84 @@
+import os
+import pickle
+
+from risk_engine.engine import RuleSet
+from risk_engine.models import EvaluationContext
+from risk_engine.snapshot import compile_policy, load_ruleset, load_snapshot, main, stale_reason
+
+POLICY = """
+rules:
+  - id: SAFE-001
+    module: risk_engine.rules_builtin
+    class: ToxicKeywordRule
+    params:
+      blocked_terms: ["idiot"]
+      lexicons: ["{lexicon}"]
+policy:
+  version: 1.0
+"""
+
+
+def _later(path):
+    # Past the recorded mtime, whatever the file system's granularity.
+    stamp = os.path.getmtime(path) + 5
+    os.utime(path, (stamp, stamp))
+
+
+def _setup(tmp_path):
+    lexicon = tmp_path / "terms.txt"
+    lexicon.write_text("dolt\n")
+    policy = tmp_path / "policy.yaml"
+    policy.write_text(POLICY.format(lexicon=lexicon))
+    return str(policy), str(lexicon), compile_policy(str(policy))
+
+
+def _header(snapshot):
+    with open(snapshot, "rb") as f:
+        return pickle.load(f)
+
+
+def test_current_snapshot_is_loaded(tmp_path):
+    policy, _, snapshot = _setup(tmp_path)
+    assert snapshot == str(tmp_path / "policy.snapshot")
+    assert stale_reason(_header(snapshot), policy) is None
+
+    ruleset = load_snapshot(policy)
+    expected = RuleSet.from_policy(policy, persist_state=False)
+    assert isinstance(ruleset, RuleSet)
+    assert ruleset.policy_version == expected.policy_version
+    assert [rule.id for rule in ruleset.rules] == ["SAFE-001"]
+    ctx = EvaluationContext(prompt="p", response="you idiot dolt")
+    assert [f.message for f in ruleset.rules[0].apply(ctx)] == [
+        f.message for f in expected.rules[0].apply(ctx)
+    ]
+    assert main([policy, "--check"]) == 0
+
+
+def test_policy_edit_invalidates_snapshot(tmp_path):
+    policy, _, snapshot = _setup(tmp_path)
+    with open(policy, "a") as f:
+        f.write("  # comment\n")
+    assert stale_reason(_header(snapshot), policy) == "policy file changed"
+    assert load_snapshot(policy) is None
+    assert main([policy, "--check"]) == 1
+    # Falls back to the policy itself.
+    assert load_ruleset(policy).policy_version == RuleSet.from_policy(policy).policy_version
+
+
+def test_touched_source_invalidates_snapshot(tmp_path):
+    policy, lexicon, snapshot = _setup(tmp_path)
+    _later(lexicon)
+    assert stale_reason(_header(snapshot), policy) == f"{lexicon} changed"
+    assert load_snapshot(policy) is None
+
+    compile_policy(policy)
+    assert load_snapshot(policy) is not None
+
+
+def test_damaged_snapshot_falls_back_to_policy(tmp_path):
+    policy, _, snapshot = _setup(tmp_path)
+    with open(snapshot, "r+b") as f:
+        f.truncate(os.path.getsize(snapshot) - 10)
+    assert load_snapshot(policy) is None
+    assert [rule.id for rule in load_ruleset(policy).rules] == ["SAFE-001"]
+    assert load_snapshot(policy, str(tmp_path / "missing.snapshot")) is None